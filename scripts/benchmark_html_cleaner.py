@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the precompiled HTML cleaners in enex_to_artwall_files.py.
+
+Runs clean_html_content, clean_metadata_for_yaml and extract_auto_description
+against the original re.sub chains (kept below as legacy_*) on the ENML of real
+notes, checks that the output is byte-identical and reports the timings.
+
+Usage:
+    python scripts/benchmark_html_cleaner.py [bestand.enex ...] [--repeat N]
+
+Without .enex arguments, all exports in SOURCE_ENEX_FOLDER are used.
+"""
+import pathlib
+import re
+import sys
+import tempfile
+import time
+
+import enex_to_artwall_files as converter
+
+
+def legacy_clean_metadata_for_yaml(html_block: str) -> str:
+    text_with_newlines = re.sub(r'</div>', '\n', html_block, flags=re.IGNORECASE)
+    cleaned_text = re.sub(r'<[^>]+>', '', text_with_newlines)
+    cleaned_text = re.sub(r'`(\d+)', r'\1', cleaned_text)
+    cleaned_text = cleaned_text.replace('`', '')
+    lines = [line.strip() for line in cleaned_text.split('\n') if line.strip()]
+    return '\n'.join(lines)
+
+
+def legacy_clean_html_content(html: str) -> str:
+    clean_html = html
+    clean_html = re.sub(r'<\?xml[^>]*\?>', '', clean_html)
+    clean_html = re.sub(r'<!DOCTYPE[^>]*>', '', clean_html)
+    clean_html = re.sub(r'<en-note[^>]*>', '', clean_html)
+    clean_html = re.sub(r'</en-note>', '', clean_html)
+    clean_html = re.sub(r'<div style="display:none;[^"]*"[^>]*>.*?</div>', '', clean_html, flags=re.DOTALL)
+    clean_html = re.sub(r'<div[^>]*style="[^"]*display:\s*none[^"]*"[^>]*>.*?</div>', '', clean_html, flags=re.DOTALL)
+    clean_html = re.sub(r'\s*style="[^"]*"', '', clean_html)
+    clean_html = re.sub(r'<br\s*/?>', '<br>', clean_html, flags=re.IGNORECASE)
+    clean_html = re.sub(r'<div><br></div>', '<br>', clean_html, flags=re.IGNORECASE)
+    clean_html = re.sub(r'<div[^>]*>', '', clean_html, flags=re.IGNORECASE)
+    clean_html = re.sub(r'</div>', '<br>', clean_html, flags=re.IGNORECASE)
+    clean_html = re.sub(r'^(<br>\s*)+', '', clean_html, flags=re.IGNORECASE)
+    clean_html = re.sub(r'(<br>\s*)+$', '', clean_html, flags=re.IGNORECASE)
+    return clean_html.strip()
+
+
+def legacy_extract_auto_description(content_html: str, max_length: int = 100, category=None) -> str:
+    html_lines = content_html.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
+    html_lines = re.sub(r'</div>', '\n', html_lines, flags=re.IGNORECASE)
+    html_lines = re.sub(r'<div[^>]*>', '', html_lines, flags=re.IGNORECASE)
+    text_content = re.sub(r'<[^>]+>', '', html_lines)
+    lines = [line.strip() for line in text_content.split('\n') if line.strip()]
+    if not lines:
+        return ""
+    start_index = 0
+    if len(lines) > 1 and len(lines[0]) <= 100:
+        start_index = 1
+    available_lines = lines[start_index:]
+    if not available_lines:
+        return ""
+    if category in ['poetry', 'music'] and len(available_lines) >= 2:
+        description_text = f"{available_lines[0]} {available_lines[1]}"
+    else:
+        description_text = available_lines[0]
+        sentence_match = re.match(r'^([^.!?]+[.!?])', description_text)
+        if sentence_match:
+            description_text = sentence_match.group(1).strip()
+    if len(description_text) > max_length - 3:
+        truncated = description_text[:max_length - 3]
+        last_space = truncated.rfind(' ')
+        if last_space > (max_length - 3) * 0.7:
+            description_text = truncated[:last_space]
+        else:
+            description_text = truncated
+    description_text = description_text.rstrip(',').strip()
+    description_text += "..."
+    return description_text
+
+
+def load_corpus(enex_files):
+    """Collects (main content, metadata block) pairs from the notes in the given exports."""
+    corpus = []
+    with tempfile.TemporaryDirectory(prefix='enex-bench-') as spool_dir:
+        for enex_file in enex_files:
+            for note in converter.iter_enex_notes(enex_file, pathlib.Path(spool_dir)):
+                content = note.findtext('content', '')
+                main_content, _, rest = content.partition('---META_BEGIN---')
+                meta_block = rest.partition('---META_END---')[0]
+                corpus.append((main_content, meta_block))
+                converter.release_note_resources(note)
+    return corpus
+
+
+def benchmark(name, legacy_func, new_func, inputs, repeat):
+    mismatches = sum(1 for text in inputs if legacy_func(text) != new_func(text))
+    timings = []
+    for func in (legacy_func, new_func):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for text in inputs:
+                func(text)
+        timings.append(time.perf_counter() - start)
+    legacy_time, new_time = timings
+    speedup = legacy_time / new_time if new_time else float('inf')
+    print(f"  {name:36} oud {legacy_time * 1000:9.1f} ms   nieuw {new_time * 1000:9.1f} ms   x{speedup:4.1f}   verschillen: {mismatches}")
+    return mismatches
+
+
+def main(argv):
+    repeat = 20
+    if '--repeat' in argv:
+        repeat = int(argv[argv.index('--repeat') + 1])
+        del argv[argv.index('--repeat'):argv.index('--repeat') + 2]
+    enex_files = [pathlib.Path(arg) for arg in argv] or sorted(converter.SOURCE_ENEX_FOLDER.glob('*.enex'))
+    if not enex_files:
+        print("⚠️  Geen .enex bestanden gevonden voor de benchmark.")
+        return 1
+
+    corpus = load_corpus(enex_files)
+    contents = [main_content for main_content, _ in corpus]
+    meta_blocks = [meta_block for _, meta_block in corpus if meta_block]
+    print(f"📊 {len(corpus)} notities uit {len(enex_files)} export(s), {repeat} herhalingen")
+
+    mismatches = 0
+    mismatches += benchmark('clean_html_content', legacy_clean_html_content, converter.clean_html_content, contents, repeat)
+    mismatches += benchmark('clean_metadata_for_yaml', legacy_clean_metadata_for_yaml, converter.clean_metadata_for_yaml, meta_blocks, repeat)
+    mismatches += benchmark('extract_auto_description', legacy_extract_auto_description, converter.extract_auto_description, contents, repeat)
+    mismatches += benchmark('extract_auto_description (poetry)', lambda text: legacy_extract_auto_description(text, category='poetry'), lambda text: converter.extract_auto_description(text, category='poetry'), contents, repeat)
+    if mismatches:
+        print(f"❌ {mismatches} uitvoerverschillen gevonden")
+        return 1
+    print("✅ Uitvoer is identiek")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
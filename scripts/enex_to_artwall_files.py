@@ -45,12 +45,32 @@ import re
 import sys
 import yaml  # Vereist: pip install pyyaml
 import base64
+import collections
+import concurrent.futures
+import contextlib
+import hashlib
+import shutil
+import tempfile
+import threading
 import time
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, Iterator, List, Set, Tuple, Optional
+
+try:
+    # Optioneel (pip install watchdog): --watch reageert dan op bestandssysteem-
+    # events (inotify/ReadDirectoryChangesW) in plaats van de map te pollen
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
 
 # --- CONFIGURATIE ---
 SOURCE_ENEX_FOLDER = pathlib.Path('G:/Mijn Drive/Creatief/Artwall')
 DESTINATION_MEDIA_FOLDER = pathlib.Path('G:/Mijn Drive/Creatief/Artwall')
+ENEX_READ_CHUNK_SIZE = 1024 * 1024  # Bytes per leesactie bij het streamen van een .enex bestand
+MANIFEST_FILENAME = '.enex-manifest.json'  # Per-notitie hashes van de vorige run, in de doelmap
+MANIFEST_VERSION = 3  # Ophogen als de conversie-uitvoer wijzigt, zodat alles opnieuw wordt gegenereerd
+FILE_SETTLE_SECONDS = 6  # Een .enex bestand dat zo lang niet is gewijzigd, is volledig geschreven
+WATCH_POLL_INTERVAL = 2  # Seconden tussen scans in --watch zonder watchdog
 
 # --- VALIDATIE REGELS ---
 """
@@ -145,15 +165,51 @@ def auto_detect_medium_subtype_from_content(content: str, resources: Optional[li
     # Default fallback
     return ('writing', 'other')
 
+# --- HTML OPSCHONING ---
+# Voorgecompileerde patronen voor clean_html_content, clean_metadata_for_yaml en
+# extract_auto_description. Patronen met dezelfde vervanging zijn samengevoegd tot
+# één pass; omdat ENML well-formed XML is (geen losse '<' in tekst of attributen)
+# geeft dat dezelfde uitvoer als de oorspronkelijke reeks re.sub's. Patronen met
+# verschillende vervangingen blijven aparte passes: een Python-callback per match
+# is trager dan een extra pass in C.
+# Vergelijk met: python scripts/benchmark_html_cleaner.py <bestand.enex ...>
+ENML_WRAPPER_PATTERN = re.compile(r'<\?xml[^>]*\?>|<!DOCTYPE[^>]*>|<en-note[^>]*>|</en-note>')
+HIDDEN_DIV_PATTERN = re.compile(r'<div style="display:none;[^"]*"[^>]*>.*?</div>', re.DOTALL)
+HIDDEN_STYLED_DIV_PATTERN = re.compile(r'<div[^>]*style="[^"]*display:\s*none[^"]*"[^>]*>.*?</div>', re.DOTALL)
+STYLE_ATTRIBUTE_PATTERN = re.compile(r'style="[^"]*"')
+BR_PATTERN = re.compile(r'<br\s*/?>', re.IGNORECASE)
+EMPTY_LINE_DIV_PATTERN = re.compile(r'<div><br></div>', re.IGNORECASE)
+OPENING_DIV_PATTERN = re.compile(r'<div[^>]*>', re.IGNORECASE)
+CLOSING_DIV_PATTERN = re.compile(r'</div>', re.IGNORECASE)
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+def remove_style_attributes(html: str) -> str:
+    """
+    Verwijdert style="..." attributen inclusief de witruimte ervoor; gelijk aan
+    re.sub(r'\\s*style="[^"]*"', '', html), maar zonder bij elke witruimte een
+    match te proberen.
+    """
+    pieces = []
+    last_end = 0
+    for match in STYLE_ATTRIBUTE_PATTERN.finditer(html):
+        start = match.start()
+        while start > last_end and html[start - 1].isspace():
+            start -= 1
+        pieces.append(html[last_end:start])
+        last_end = match.end()
+    if not pieces:
+        return html
+    pieces.append(html[last_end:])
+    return ''.join(pieces)
+
 def clean_metadata_for_yaml(html_block: str) -> str:
     """Verwijdert HTML-tags uit de metadata-tekst veel robuuster."""
-    text_with_newlines = re.sub(r'</div>', '\n', html_block, flags=re.IGNORECASE)
-    cleaned_text = re.sub(r'<[^>]+>', '', text_with_newlines)
+    text_with_newlines = CLOSING_DIV_PATTERN.sub('\n', html_block)
+    cleaned_text = HTML_TAG_PATTERN.sub('', text_with_newlines)
     
     # Clean problematic characters that can cause YAML parsing issues
-    # Remove backticks that are often used incorrectly
-    cleaned_text = re.sub(r'`(\d+)', r'\1', cleaned_text)  # Remove backticks before numbers
-    cleaned_text = cleaned_text.replace('`', '')  # Remove any remaining backticks
+    # Remove backticks that are often used incorrectly (also before numbers)
+    cleaned_text = cleaned_text.replace('`', '')
     
     lines = [line.strip() for line in cleaned_text.split('\n') if line.strip()]
     return '\n'.join(lines)
@@ -268,34 +324,33 @@ def extract_metadata_and_content(note_content: str) -> Tuple[Dict[str, Any] | No
 
 def clean_html_content(html: str) -> str:
     """Cleans up Evernote HTML content for display."""
-    clean_html = html
-    
     # Remove XML declaration and ENML wrapper
-    clean_html = re.sub(r'<\?xml[^>]*\?>', '', clean_html)
-    clean_html = re.sub(r'<!DOCTYPE[^>]*>', '', clean_html)
-    clean_html = re.sub(r'<en-note[^>]*>', '', clean_html)
-    clean_html = re.sub(r'</en-note>', '', clean_html)
+    clean_html = ENML_WRAPPER_PATTERN.sub('', html)
     
     # Remove Evernote styling and hidden elements
-    clean_html = re.sub(r'<div style="display:none;[^"]*"[^>]*>.*?</div>', '', clean_html, flags=re.DOTALL)
-    clean_html = re.sub(r'<div[^>]*style="[^"]*display:\s*none[^"]*"[^>]*>.*?</div>', '', clean_html, flags=re.DOTALL)
+    if 'display:' in clean_html:
+        clean_html = HIDDEN_DIV_PATTERN.sub('', clean_html)
+        clean_html = HIDDEN_STYLED_DIV_PATTERN.sub('', clean_html)
     
     # Remove all style attributes but keep the content
-    clean_html = re.sub(r'\s*style="[^"]*"', '', clean_html)
+    clean_html = remove_style_attributes(clean_html)
     
     # First, normalize all <br> variants to <br>
-    clean_html = re.sub(r'<br\s*/?>', '<br>', clean_html, flags=re.IGNORECASE)
+    clean_html = BR_PATTERN.sub('<br>', clean_html)
     
     # Handle special case: <div><br></div> should become just <br> (one empty line)
-    clean_html = re.sub(r'<div><br></div>', '<br>', clean_html, flags=re.IGNORECASE)
+    clean_html = EMPTY_LINE_DIV_PATTERN.sub('<br>', clean_html)
     
     # Convert remaining Evernote formatting to standard HTML
-    clean_html = re.sub(r'<div[^>]*>', '', clean_html, flags=re.IGNORECASE)
-    clean_html = re.sub(r'</div>', '<br>', clean_html, flags=re.IGNORECASE)
+    clean_html = OPENING_DIV_PATTERN.sub('', clean_html)
+    clean_html = CLOSING_DIV_PATTERN.sub('<br>', clean_html)
     
     # Only remove leading and trailing <br> tags, preserve all internal spacing
-    clean_html = re.sub(r'^(<br>\s*)+', '', clean_html, flags=re.IGNORECASE)  # Remove leading br
-    clean_html = re.sub(r'(<br>\s*)+$', '', clean_html, flags=re.IGNORECASE)  # Remove trailing br
+    while clean_html.startswith('<br>'):
+        clean_html = clean_html[4:].lstrip()
+    clean_html = clean_html.rstrip()
+    while clean_html.endswith('<br>'):
+        clean_html = clean_html[:-4].rstrip()
     
     # Clean up whitespace but preserve all line breaks
     clean_html = clean_html.strip()
@@ -381,11 +436,10 @@ def extract_auto_description(content_html: str, max_length: int = 100, category:
     """
     # First, let's work with the original HTML structure to better identify lines
     html_lines = content_html.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
-    html_lines = re.sub(r'</div>', '\n', html_lines, flags=re.IGNORECASE)
-    html_lines = re.sub(r'<div[^>]*>', '', html_lines, flags=re.IGNORECASE)
+    html_lines = CLOSING_DIV_PATTERN.sub('\n', html_lines)
     
-    # Now clean remaining HTML tags but preserve basic formatting markers
-    text_content = re.sub(r'<[^>]+>', '', html_lines)
+    # Now clean remaining HTML tags (including opening divs) but preserve basic formatting markers
+    text_content = HTML_TAG_PATTERN.sub('', html_lines)
     lines = [line.strip() for line in text_content.split('\n') if line.strip()]
     
     if not lines:
@@ -432,293 +486,563 @@ def extract_auto_description(content_html: str, max_length: int = 100, category:
     
     return description_text
 
-def process_enex_files(source_dir: pathlib.Path, dest_dir: pathlib.Path):
-    """Valideert en verwerkt alle .enex bestanden in een enkele, efficiënte pass."""
+def get_mime_extension(mime: str) -> str:
+    """Bepaalt de extensie van een bijlage op basis van het MIME-type; '.dat' als het type onbekend is."""
+    if 'jpeg' in mime or 'jpg' in mime:
+        return '.jpg'
+    elif 'png' in mime:
+        return '.png'
+    elif 'gif' in mime:
+        return '.gif'
+    elif 'webp' in mime:
+        return '.webp'
+    elif 'mp3' in mime:
+        return '.mp3'
+    elif 'wav' in mime:
+        return '.wav'
+    elif 'ogg' in mime:
+        return '.ogg'
+    elif 'flac' in mime:
+        return '.flac'
+    elif 'aac' in mime:
+        return '.aac'
+    elif 'm4a' in mime:
+        return '.m4a'
+    elif 'mp4' in mime:
+        return '.mp4'
+    elif 'webm' in mime:
+        return '.webm'
+    elif 'mov' in mime:
+        return '.mov'
+    elif 'pdf' in mime:
+        return '.pdf'
+    elif 'svg' in mime:
+        return '.svg'
+    elif 'audio' in mime:
+        return '.mp3'
+    else:
+        return '.dat'
+
+def sniff_audio_extension(head: bytes) -> str:
+    """Bepaalt de extensie van een audiobestand op basis van de eerste bytes (magic bytes)."""
+    if head[:4] == b'MThd':
+        return '.midi'
+    elif head[:3] == b'ID3' or (len(head) > 1 and head[0] == 0xFF and head[1] in [0xFB, 0xF3, 0xFA]):
+        return '.mp3'
+    elif head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return '.wav'
+    elif head[:4] == b'OggS':
+        return '.ogg'
+    elif head[:4] == b'fLaC':
+        return '.flac'
+    elif len(head) > 1 and head[0] == 0xFF and head[1] in [0xF1, 0xF9]:
+        return '.aac'
+    elif head[4:11] == b'ftypM4A':
+        return '.m4a'
+    return '.dat'
+
+class Base64FileDecoder:
+    """
+    Decodeert base64-tekst die in stukken binnenkomt rechtstreeks naar een bestand.
+    Alleen de eerste bytes worden bewaard voor het herkennen van het bestandstype.
+    """
+
+    HEAD_SIZE = 16
+
+    def __init__(self, file_path: pathlib.Path):
+        self.file_path = file_path
+        self.file = open(file_path, 'wb')
+        self.pending = ''
+        self.head = b''
+        self.size = 0
+        self.md5 = hashlib.md5()
+        self.error = None
+
+    def write(self, text: str) -> None:
+        if self.error:
+            return
+        text = self.pending + ''.join(text.split())
+        usable = len(text) - len(text) % 4
+        self.pending = text[usable:]
+        if usable:
+            self._write_decoded(text[:usable])
+
+    def close(self) -> None:
+        if self.pending and not self.error:
+            self._write_decoded(self.pending)
+        self.pending = ''
+        self.file.close()
+
+    def _write_decoded(self, text: str) -> None:
+        try:
+            data = base64.b64decode(text)
+        except ValueError as e:
+            self.error = str(e)
+            return
+        if len(self.head) < self.HEAD_SIZE:
+            self.head += data[:self.HEAD_SIZE - len(self.head)]
+        self.file.write(data)
+        self.md5.update(data)
+        self.size += len(data)
+
+class EnexNoteBuilder:
+    """
+    XMLParser target dat <note> elementen opbouwt, maar de base64-inhoud van
+    <resource><data> niet in het geheugen houdt: die wordt tijdens het parsen
+    naar een bestand in spool_dir gedecodeerd. Het <resource> element krijgt de
+    attributen 'spool-path', 'hash' (MD5 van de inhoud) en 'audio-ext' (of
+    'decode-error').
+    """
+
+    def __init__(self, spool_dir: pathlib.Path):
+        self.spool_dir = spool_dir
+        self.builder = None
+        self.tags = []
+        self.resource = None
+        self.decoder = None
+        self.resource_count = 0
+        self.notes = []
+
+    def start(self, tag, attrib):
+        self.tags.append(tag)
+        if tag == 'note':
+            self.builder = ET.TreeBuilder()
+        if self.builder is None:
+            return
+        elem = self.builder.start(tag, attrib)
+        if tag == 'resource':
+            self.resource = elem
+        elif tag == 'data' and self.resource is not None and self.tags[-2] == 'resource':
+            self.resource_count += 1
+            self.decoder = Base64FileDecoder(self.spool_dir / f"resource_{self.resource_count:06d}.bin")
+
+    def data(self, text):
+        if self.decoder is not None:
+            self.decoder.write(text)
+        elif self.builder is not None:
+            self.builder.data(text)
+
+    def end(self, tag):
+        self.tags.pop()
+        if self.builder is None:
+            return
+        if tag == 'data' and self.decoder is not None:
+            self.decoder.close()
+            if self.decoder.error:
+                self.resource.set('decode-error', self.decoder.error)
+            if self.decoder.size:
+                self.resource.set('spool-path', str(self.decoder.file_path))
+                self.resource.set('hash', self.decoder.md5.hexdigest())
+                self.resource.set('audio-ext', sniff_audio_extension(self.decoder.head))
+            else:
+                self.decoder.file_path.unlink()
+            self.decoder = None
+        elif tag == 'resource':
+            self.resource = None
+        self.builder.end(tag)
+        if tag == 'note':
+            self.notes.append(self.builder.close())
+            self.builder = None
+
+    def close(self):
+        return None
+
+def iter_enex_notes(enex_file: pathlib.Path, spool_dir: pathlib.Path) -> Iterator[ET.Element]:
+    """
+    Leest een .enex bestand incrementeel en levert één <note> element per keer op.
+
+    Het bestand wordt in blokken van ENEX_READ_CHUNK_SIZE gelezen en nooit in zijn
+    geheel in het geheugen gehouden. Bijlagen worden tijdens het parsen naar
+    spool_dir gedecodeerd (zie EnexNoteBuilder), zodat het geheugengebruik niet
+    meegroeit met de grootte van de export of van afzonderlijke bijlagen.
+    Gebruik release_note_resources() om de spoolbestanden na verwerking op te ruimen.
+    """
+    target = EnexNoteBuilder(spool_dir)
+    parser = ET.XMLParser(target=target)
+    with open(enex_file, 'rb') as f:
+        while True:
+            chunk = f.read(ENEX_READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            while target.notes:
+                yield target.notes.pop(0)
+    parser.close()
+    while target.notes:
+        yield target.notes.pop(0)
+
+def release_note_resources(note: ET.Element) -> None:
+    """Verwijdert de gespoolde bijlagen van een verwerkte notitie."""
+    for resource in note.findall('resource'):
+        spool_path = resource.get('spool-path')
+        if spool_path:
+            pathlib.Path(spool_path).unlink(missing_ok=True)
+
+EN_MEDIA_HASH_PATTERN = re.compile(r'<en-media\b[^>]*?\bhash="([0-9a-fA-F]+)"', re.IGNORECASE)
+
+def find_main_content_media_hashes(content_xml: str) -> set:
+    """
+    Geeft de MD5-hashes van de <en-media> verwijzingen die alleen vóór het
+    ---META_BEGIN--- blok voorkomen, en dus niet in of na de metadata.
+    Evernote verwijst naar bijlagen via deze hash, niet via de base64-inhoud.
+    """
+    meta_begin_pos = content_xml.find('---META_BEGIN---')
+    before_meta, elsewhere = set(), set()
+    for match in EN_MEDIA_HASH_PATTERN.finditer(content_xml):
+        media_hash = match.group(1).lower()
+        if meta_begin_pos == -1 or match.start() < meta_begin_pos:
+            before_meta.add(media_hash)
+        else:
+            elsewhere.add(media_hash)
+    return before_meta - elsewhere
+
+def compute_note_hash(note: ET.Element, note_title: str) -> str:
+    """
+    Berekent een hash over alles wat de uitvoer van een notitie bepaalt: de
+    (genummerde) titel, de ENML-inhoud en de MD5 en metadata van elke bijlage.
+    """
+    digest = hashlib.sha256()
+    digest.update(note_title.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(note.findtext('content', '').encode('utf-8'))
+    for resource in note.findall('resource'):
+        for value in (resource.get('hash', ''), resource.findtext('mime', ''), resource.findtext('file-name', '')):
+            digest.update(b'\0')
+            digest.update(value.encode('utf-8'))
+    return digest.hexdigest()
+
+def get_note_manifest_key(note: ET.Element, note_title: str) -> str:
+    """Sleutel van een notitie in het manifest: de GUID als die geëxporteerd is, anders de titel."""
+    guid = note.findtext('guid')
+    return f"guid:{guid}" if guid else f"title:{note_title}"
+
+def load_manifest(dest_dir: pathlib.Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Leest het conversiemanifest; een ontbrekend of onleesbaar manifest geeft een leeg manifest.
+    Van een verouderd manifest blijven alleen de bestandslijsten over: alle notities worden
+    opnieuw gegenereerd, maar uitvoer die niet meer ontstaat kan nog worden opgeruimd.
+    """
+    manifest_path = dest_dir / MANIFEST_FILENAME
+    try:
+        data = json.loads(manifest_path.read_text('utf-8'))
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != MANIFEST_VERSION:
+        return {key: {'files': entry.get('files', [])} for key, entry in data.get('notes', {}).items()}
+    return data.get('notes', {})
+
+def save_manifest(dest_dir: pathlib.Path, notes: Dict[str, Dict[str, Any]]) -> None:
+    """Schrijft het conversiemanifest atomair weg."""
+    manifest_path = dest_dir / MANIFEST_FILENAME
+    tmp_path = manifest_path.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps({'version': MANIFEST_VERSION, 'notes': notes}, ensure_ascii=False, indent=1, sort_keys=True), encoding='utf-8')
+    os.replace(tmp_path, manifest_path)
+
+def remove_stale_files(dest_dir: pathlib.Path, stale_files: Set[str], manifest: Dict[str, Dict[str, Any]]) -> int:
+    """
+    Verwijdert uitvoerbestanden van een vorige run die een notitie nu niet meer oplevert
+    (bijvoorbeeld een bijlage met een andere extensie), zodat de sync ze niet als extra
+    media uploadt. Bestanden die een andere notitie in het manifest nog noemt, blijven staan.
+    """
+    current_files = {rel_path for entry in manifest.values() for rel_path in entry.get('files', [])}
+    removed = 0
+    for rel_path in sorted(stale_files - current_files):
+        try:
+            (dest_dir / rel_path).unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+def is_note_unchanged(entry: Optional[Dict[str, Any]], note_hash: str, dest_dir: pathlib.Path) -> bool:
+    """True als de notitie sinds de vorige run niet gewijzigd is en al haar uitvoerbestanden nog bestaan."""
+    if not entry or entry.get('hash') != note_hash:
+        return False
+    return all((dest_dir / rel_path).exists() for rel_path in entry.get('files', []))
+
+def convert_note(note: ET.Element, note_title_raw: str, dest_dir: pathlib.Path) -> Dict[str, Any]:
+    """
+    Converteert één notitie naar HTML- en mediabestanden in dest_dir.
+
+    De functie raakt geen gedeelde tellers aan en kan daardoor ook in een
+    worker-proces draaien. Het resultaat wordt door record_note_result() in het
+    rapport verwerkt: 'warnings', 'medium'/'subtype' (gezet zodra de notitie
+    gevalideerd is), 'success' (rapportregel) of 'error' (reden van falen).
+    """
+    result = {'title': note_title_raw, 'warnings': [], 'medium': None, 'subtype': None, 'success': None, 'error': None, 'files': []}
+    try:
+        content_xml = note.findtext('content', '')
+        meta, main_content_html = extract_metadata_and_content(content_xml)
+        if meta is not None:
+            # Always strip everything before and including the first colon and space (': ') in the note title
+            title_clean = note_title_raw
+            colon_pos = title_clean.find(': ')
+            if colon_pos != -1:
+                title_clean = title_clean[colon_pos + 2:].lstrip()
+            meta['title'] = title_clean
+        if meta is None:
+            raise ValueError(main_content_html)
+        resources = note.findall('resource')
+        if 'medium' not in meta or 'subtype' not in meta:
+            detected_medium, detected_subtype = auto_detect_medium_subtype_from_content(main_content_html, resources)
+            if 'medium' not in meta:
+                meta['medium'] = detected_medium
+                result['warnings'].append(f"🔍 Auto-detected medium: {detected_medium} for '{note_title_raw}'")
+            if 'subtype' not in meta:
+                meta['subtype'] = detected_subtype
+                result['warnings'].append(f"🔍 Auto-detected subtype: {detected_subtype} for '{note_title_raw}'")
+            if 'category' not in meta:
+                meta['category'] = 'other'
+        medium = meta.get('medium', 'other')
+        subtype = meta.get('subtype', 'other')
+        translation_delimiter = r'---TRANSLATION_([a-z]{2})---'
+        split_result = re.split(translation_delimiter, main_content_html, flags=re.IGNORECASE)
+        parts = [split_result[i] for i in range(0, len(split_result), 2)]
+        has_translations = len(parts) > 1
+        num_translation_parts = len(parts)
+        has_resources = len(resources) > 0
+        validation_errors = validate_note_metadata(
+            meta,
+            medium,
+            has_translations=has_translations,
+            num_translation_parts=num_translation_parts,
+            has_resources=has_resources
+        )
+        if validation_errors:
+            error_msg = "Validatiefouten: " + "; ".join(validation_errors)
+            raise ValueError(error_msg)
+        result['medium'] = medium
+        result['subtype'] = subtype
+        medium_folder = dest_dir / medium
+        medium_folder.mkdir(parents=True, exist_ok=True)
+        created_files_count = 0
+        if medium in ['writing', 'audio']:
+            translation_delimiter = r'---TRANSLATION_([a-z]{2})---'
+            split_result = re.split(translation_delimiter, main_content_html, flags=re.IGNORECASE)
+            parts = [split_result[i] for i in range(0, len(split_result), 2)]
+            languages_from_meta = [l for l in [meta.get('language1'), meta.get('language2'), meta.get('language3')] if l]
+            if len(parts) != len(languages_from_meta):
+                raise ValueError(f"Aantal tekstblokken ({len(parts)}) komt niet overeen met het aantal talen in metadata ({len(languages_from_meta)}). Gevonden delen: {len(parts)}, verwachte talen: {len(languages_from_meta)}")
+            for i, lang_code in enumerate(languages_from_meta):
+                content_html = parts[i]
+                meta_lang = {}
+                for key, value in meta.items():
+                    meta_lang[key] = value
+                    if key == 'version':
+                        meta_lang['language'] = lang_code
+                filename_lang = generate_filename(meta, lang=lang_code)
+                file_path = medium_folder / f"{filename_lang}.html"
+                generate_html_file(meta_lang, content_html, file_path)
+                result['files'].append(file_path.relative_to(dest_dir).as_posix())
+                created_files_count += 1
+        if resources:
+            for resource in resources:
+                if resource.get('decode-error'):
+                    raise ValueError(f"Bijlage kon niet gedecodeerd worden: {resource.get('decode-error')}")
+            # Bijlagen die in de hoofdtekst (vóór de metadata) staan, krijgen een
+            # extensie op basis van de inhoud of bestandsnaam in plaats van het MIME-type.
+            main_content_hashes = find_main_content_media_hashes(content_xml)
+            written_resources = set()
+            for idx, resource in enumerate(resources):
+                if not resource.get('spool-path') or resource.get('hash') not in main_content_hashes:
+                    continue
+                mime = resource.findtext('mime', '')
+                file_name = resource.findtext('file-name', '')
+                ext = ''
+                if medium == 'audio':
+                    ext = resource.get('audio-ext', '.dat')
+                    if ext == '.dat':
+                        # Onbekende magic bytes: het MIME-type bepaalt de extensie, zoals vóór de en-media pass
+                        ext = ''
+                else:
+                    if file_name and '.' in file_name:
+                        ext = os.path.splitext(file_name)[1].lower()
+                if not ext:
+                    ext = get_mime_extension(mime)
+                version = idx + 1
+                media_filename = generate_filename(meta, version=version)
+                media_path = medium_folder / f"{media_filename}{ext}"
+                shutil.copyfile(resource.get('spool-path'), media_path)
+                result['files'].append(media_path.relative_to(dest_dir).as_posix())
+                written_resources.add(idx)
+                created_files_count += 1
+            created_files_log = []
+            if medium not in ['writing', 'audio']:
+                meta_with_lang = {}
+                for key, value in meta.items():
+                    meta_with_lang[key] = value
+                    if key == 'version':
+                        primary_lang = meta.get('language1', 'en')
+                        meta_with_lang['language'] = primary_lang
+                base_filename = generate_filename(meta)
+                html_path = medium_folder / f"{base_filename}.html"
+                generate_html_file(meta_with_lang, main_content_html, html_path)
+                result['files'].append(html_path.relative_to(dest_dir).as_posix())
+                created_files_count += 1
+            if not resources:
+                raise ValueError(f"Medium is '{medium}' maar er is geen afbeelding/bestand bijgevoegd.")
+
+            # Process media files
+            for idx, resource in enumerate(resources):
+                mime = resource.findtext('mime', '')
+                file_name = resource.findtext('file-name', '')
+                ext = ''
+                spool_path = resource.get('spool-path')
+                if not spool_path or idx in written_resources:
+                    continue
+                if not ext:
+                    ext = get_mime_extension(mime)
+                version = idx + 1
+                media_filename = generate_filename(meta, version=version)
+                media_path = medium_folder / f"{media_filename}{ext}"
+                shutil.copyfile(spool_path, media_path)
+                result['files'].append(media_path.relative_to(dest_dir).as_posix())
+                # print(f"    📄 File saved: {media_path}")  # Verbose output removed
+                # media_file_status = "Overschreven" if media_path.exists() else "Nieuw"
+                # created_files_log.append(f"{media_path.name} ({media_file_status})")
+
+            result['success'] = {'title': meta.get('title', note_title_raw), 'files': created_files_log}
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+def record_note_result(result: Dict[str, Any], report: Dict[str, list], medium_counts: Dict[str, int], subtype_counts: Dict[str, int]) -> None:
+    """Verwerkt het resultaat van convert_note() in het rapport en de tellingen."""
+    report['warnings'].extend(result['warnings'])
+    if result['medium'] is not None:
+        medium, subtype = result['medium'], result['subtype']
+        medium_counts[medium] = medium_counts.get(medium, 0) + 1
+        subtype_key = f"{medium}/{subtype}"
+        subtype_counts[subtype_key] = subtype_counts.get(subtype_key, 0) + 1
+    if result['error'] is not None:
+        report['failed'].append({'title': result['title'], 'reason': result['error']})
+    elif result['success'] is not None:
+        report['success'].append(result['success'])
+
+def process_enex_files(source_dir: pathlib.Path, dest_dir: pathlib.Path, workers: int = 1, force: bool = False):
+    """
+    Valideert en verwerkt alle .enex bestanden in een enkele, efficiënte pass.
+
+    Notities waarvan de hash gelijk is aan die in het manifest van de vorige run
+    (zie MANIFEST_FILENAME) worden overgeslagen; hun uitvoerbestanden worden niet
+    aangeraakt, zodat de mtimes waar firebase-master-sync.py op let stabiel blijven.
+
+    :param workers: Aantal processen voor de conversie van notities (1 = sequentieel)
+    :param force: Als True, negeer het manifest en genereer alle notities opnieuw
+    """
     enex_files = list(source_dir.glob('*.enex'))
     if not enex_files:
         print("⚠️  Geen .enex bestanden gevonden om te verwerken.")
         return
 
-    report = {'success': [], 'failed': [], 'warnings': []}
+    report = {'success': [], 'failed': [], 'warnings': [], 'skipped': []}
     category_counts = {}  # Track notes per category
     medium_counts = {}   # Track notes per medium
     subtype_counts = {}  # Track notes per medium/subtype combination
     
     print("\n--- Starten van Conversie & Generatie ---")
 
-    # --- Duplicate title detection ---
-    all_titles = []
-    title_counts = {}
-    for enex_file in enex_files:
-        try:
-            enex_content = enex_file.read_text('utf-8')
-            note_contents = re.findall(r'<note>(.*?)</note>', enex_content, re.DOTALL)
-        except Exception:
-            continue
-        for note_str in note_contents:
-            try:
-                note_xml = f"<note>{note_str}</note>"
-                note = ET.fromstring(note_xml)
-                note_title_raw = note.findtext('title', 'Onbekende Titel')
-                all_titles.append(note_title_raw)
-                title_counts[note_title_raw] = title_counts.get(note_title_raw, 0) + 1
-            except Exception:
-                continue
+    manifest = load_manifest(dest_dir)
+    if force:
+        # Alleen de bestandslijsten blijven bewaard, voor het opruimen van verouderde uitvoer
+        manifest = {key: {'files': entry.get('files', [])} for key, entry in manifest.items()}
+    stale_files = set()  # Uitvoer van de vorige run die niet opnieuw is aangemaakt
 
-    duplicate_title_next_number = {}
-    for title, count in title_counts.items():
-        if count > 1:
-            print(f"⚠️  Dubbele titel gevonden: '{title}' komt {count} keer voor. Titels worden genummerd.")
-            duplicate_title_next_number[title] = 1
-
-    for enex_file in enex_files:
-        print(f"\n🔄 Verwerken van {enex_file.name} ({enex_file.stat().st_size / (1024*1024):.1f} MB)...")
-        if not wait_for_file_stability(enex_file, max_wait_seconds=120):
-            print(f"  ❌ Bestand {enex_file.name} is nog niet stabiel - overslaan")
-            report['failed'].append({'title': f"Bestand: {enex_file.name}", 'reason': "Bestand was nog niet volledig geschreven"})
-            continue
+    def finish_note(note: ET.Element, title_warnings: List[str], manifest_key: str, note_hash: str, result: Dict[str, Any]) -> None:
+        convert_warnings = list(result['warnings'])
+        result['warnings'][:0] = title_warnings
+        record_note_result(result, report, medium_counts, subtype_counts)
+        if result['error'] is None:
+            previous_files = (manifest.get(manifest_key) or {}).get('files', [])
+            stale_files.update(set(previous_files) - set(result['files']))
+            manifest[manifest_key] = {
+                'hash': note_hash,
+                'title': result['title'],
+                'medium': result['medium'],
+                'subtype': result['subtype'],
+                'files': result['files'],
+                'warnings': convert_warnings,
+                'success': result['success'],
+            }
+        else:
+            manifest.pop(manifest_key, None)
+        release_note_resources(note)
+
+    def finish_pending_note(note: ET.Element, title_warnings: List[str], manifest_key: str, note_hash: str, future: concurrent.futures.Future) -> None:
         try:
-            enex_content = enex_file.read_text('utf-8')
-            note_contents = re.findall(r'<note>(.*?)</note>', enex_content, re.DOTALL)
-            print(f"  Gevonden {len(note_contents)} notities in bestand.")
+            result = future.result()
         except Exception as e:
-            report['failed'].append({'title': f"Bestand: {enex_file.name}", 'reason': f"Kon bestand niet lezen. Fout: {e}"})
-            continue
-        for note_index, note_str in enumerate(note_contents, 1):
-            note_title_raw = "Onbekende Notitie"
+            result = {'title': note.findtext('title', 'Onbekende Titel'), 'warnings': [], 'medium': None, 'subtype': None, 'success': None, 'error': str(e), 'files': []}
+        finish_note(note, title_warnings, manifest_key, note_hash, result)
+
+    # --- Duplicate title detection ---
+    # Titels worden tijdens de conversie zelf geteld: de eerste notitie houdt
+    # haar titel, elke volgende met dezelfde titel krijgt een volgnummer.
+    # Daardoor is geen aparte leespass over alle exports meer nodig.
+    title_counts = {}
+
+    # Bij workers > 1 worden notities in een procespool geconverteerd; het
+    # parsen, de titelnummering en het rapport blijven in dit proces. De pool
+    # wordt ook bij een fout tijdens het parsen of verwerken altijd afgesloten.
+    with (concurrent.futures.ProcessPoolExecutor(max_workers=workers) if workers > 1 else contextlib.nullcontext()) as executor:
+        for enex_file in enex_files:
+            print(f"\n🔄 Verwerken van {enex_file.name} ({enex_file.stat().st_size / (1024*1024):.1f} MB)...")
+            if not wait_for_file_stability(enex_file, max_wait_seconds=120):
+                print(f"  ❌ Bestand {enex_file.name} is nog niet stabiel - overslaan")
+                report['failed'].append({'title': f"Bestand: {enex_file.name}", 'reason': "Bestand was nog niet volledig geschreven"})
+                continue
+            note_count = 0
+            pending = collections.deque()
+            spool_dir = tempfile.TemporaryDirectory(prefix='enex-spool-')
             try:
-                note_xml = f"<note>{note_str}</note>"
-                note = ET.fromstring(note_xml)
-                note_title_raw = note.findtext('title', 'Onbekende Titel')
-                # Collect warnings for apostrophe in title
-                if "'" in note_title_raw:
-                    report['warnings'].append(f"⚠️  Titel bevat een apostrof: '{note_title_raw}'. Overweeg deze titel aan te passen.")
-                # Collect warnings for duplicate title renaming
-                original_title = note_title_raw
-                if title_counts.get(original_title, 0) > 1:
-                    if duplicate_title_next_number[original_title] == 1:
-                        new_title = original_title
+                for note in iter_enex_notes(enex_file, pathlib.Path(spool_dir.name)):
+                    note_count += 1
+                    note_title_raw = note.findtext('title', 'Onbekende Titel')
+                    title_warnings = []
+                    # Collect warnings for apostrophe in title
+                    if "'" in note_title_raw:
+                        title_warnings.append(f"⚠️  Titel bevat een apostrof: '{note_title_raw}'. Overweeg deze titel aan te passen.")
+                    # Collect warnings for duplicate title renaming
+                    original_title = note_title_raw
+                    title_counts[original_title] = title_counts.get(original_title, 0) + 1
+                    if title_counts[original_title] > 1:
+                        new_title = f"{original_title} {title_counts[original_title]}"
+                        title_warnings.append(f"⚠️  Titel '{original_title}' hernoemd naar '{new_title}' vanwege duplicaat.")
+                        note_title_raw = new_title
+                    manifest_key = get_note_manifest_key(note, note_title_raw)
+                    note_hash = compute_note_hash(note, note_title_raw)
+                    entry = manifest.get(manifest_key)
+                    if is_note_unchanged(entry, note_hash, dest_dir):
+                        report['skipped'].append(note_title_raw)
+                        result = {'title': note_title_raw, 'warnings': list(entry['warnings']), 'medium': entry['medium'], 'subtype': entry['subtype'], 'success': entry['success'], 'error': None, 'files': entry['files']}
+                        finish_note(note, title_warnings, manifest_key, note_hash, result)
+                    elif executor is None:
+                        finish_note(note, title_warnings, manifest_key, note_hash, convert_note(note, note_title_raw, dest_dir))
                     else:
-                        new_title = f"{original_title} {duplicate_title_next_number[original_title]}"
-                        report['warnings'].append(f"⚠️  Titel '{original_title}' hernoemd naar '{new_title}' vanwege duplicaat.")
-                    duplicate_title_next_number[original_title] += 1
-                    note_title_raw = new_title
-                content_xml = note.findtext('content', '')
-                meta, main_content_html = extract_metadata_and_content(content_xml)
-                if meta is not None:
-                    # Always strip everything before and including the first colon and space (': ') in the note title
-                    title_clean = note_title_raw
-                    colon_pos = title_clean.find(': ')
-                    if colon_pos != -1:
-                        title_clean = title_clean[colon_pos + 2:].lstrip()
-                    meta['title'] = title_clean
-                if meta is None:
-                    raise ValueError(main_content_html)
-                resources = note.findall('resource')
-                if 'medium' not in meta or 'subtype' not in meta:
-                    detected_medium, detected_subtype = auto_detect_medium_subtype_from_content(main_content_html, resources)
-                    if 'medium' not in meta:
-                        meta['medium'] = detected_medium
-                        report['warnings'].append(f"🔍 Auto-detected medium: {detected_medium} for '{note_title_raw}'")
-                    if 'subtype' not in meta:
-                        meta['subtype'] = detected_subtype
-                        report['warnings'].append(f"🔍 Auto-detected subtype: {detected_subtype} for '{note_title_raw}'")
-                    if 'category' not in meta:
-                        meta['category'] = 'other'
-                medium = meta.get('medium', 'other')
-                subtype = meta.get('subtype', 'other')
-                translation_delimiter = r'---TRANSLATION_([a-z]{2})---'
-                split_result = re.split(translation_delimiter, main_content_html, flags=re.IGNORECASE)
-                parts = [split_result[i] for i in range(0, len(split_result), 2)]
-                has_translations = len(parts) > 1
-                num_translation_parts = len(parts)
-                has_resources = len(resources) > 0
-                validation_errors = validate_note_metadata(
-                    meta,
-                    medium,
-                    has_translations=has_translations,
-                    num_translation_parts=num_translation_parts,
-                    has_resources=has_resources
-                )
-                if validation_errors:
-                    error_msg = "Validatiefouten: " + "; ".join(validation_errors)
-                    raise ValueError(error_msg)
-                medium_counts[medium] = medium_counts.get(medium, 0) + 1
-                subtype_key = f"{medium}/{subtype}"
-                subtype_counts[subtype_key] = subtype_counts.get(subtype_key, 0) + 1
-                medium_folder = dest_dir / medium
-                medium_folder.mkdir(parents=True, exist_ok=True)
-                created_files_count = 0
-                if medium in ['writing', 'audio']:
-                    translation_delimiter = r'---TRANSLATION_([a-z]{2})---'
-                    split_result = re.split(translation_delimiter, main_content_html, flags=re.IGNORECASE)
-                    parts = [split_result[i] for i in range(0, len(split_result), 2)]
-                    languages_from_meta = [l for l in [meta.get('language1'), meta.get('language2'), meta.get('language3')] if l]
-                    if len(parts) != len(languages_from_meta):
-                        raise ValueError(f"Aantal tekstblokken ({len(parts)}) komt niet overeen met het aantal talen in metadata ({len(languages_from_meta)}). Gevonden delen: {len(parts)}, verwachte talen: {len(languages_from_meta)}")
-                    for i, lang_code in enumerate(languages_from_meta):
-                        content_html = parts[i]
-                        meta_lang = {}
-                        for key, value in meta.items():
-                            meta_lang[key] = value
-                            if key == 'version':
-                                meta_lang['language'] = lang_code
-                        filename_lang = generate_filename(meta, lang=lang_code)
-                        file_path = medium_folder / f"{filename_lang}.html"
-                        generate_html_file(meta_lang, content_html, file_path)
-                        created_files_count += 1
-                if resources:
-                    meta_begin_pos = content_xml.find('---META_BEGIN---')
-                    meta_end_pos = content_xml.find('---META_END---')
-                    before_meta = content_xml[:meta_begin_pos] if meta_begin_pos != -1 else content_xml
-                    after_meta = content_xml[meta_end_pos + len('---META_END---'):] if meta_end_pos != -1 else ''
-                    for idx, resource in enumerate(resources):
-                        data_b64 = resource.findtext('data')
-                        if not data_b64:
-                            continue
-                        in_before = before_meta.find(data_b64) != -1
-                        in_meta_block = False
-                        in_after = after_meta.find(data_b64) != -1
-                        if meta_begin_pos != -1 and meta_end_pos != -1:
-                            meta_block = content_xml[meta_begin_pos:meta_end_pos + len('---META_END---')]
-                            in_meta_block = meta_block.find(data_b64) != -1
-                        if not in_before or in_meta_block or in_after:
-                            continue
-                        mime = resource.findtext('mime', '')
-                        file_name = resource.findtext('file-name', '')
-                        ext = ''
-                        data_bytes = base64.b64decode(data_b64)
-                        if medium == 'audio':
-                            if data_bytes[:4] == b'MThd':
-                                ext = '.midi'
-                            elif data_bytes[:3] == b'ID3' or (len(data_bytes) > 1 and data_bytes[0] == 0xFF and data_bytes[1] in [0xFB, 0xF3, 0xFA]):
-                                ext = '.mp3'
-                            elif data_bytes[:4] == b'RIFF' and data_bytes[8:12] == b'WAVE':
-                                ext = '.wav'
-                            elif data_bytes[:4] == b'OggS':
-                                ext = '.ogg'
-                            elif data_bytes[:4] == b'fLaC':
-                                ext = '.flac'
-                            elif len(data_bytes) > 1 and data_bytes[0] == 0xFF and data_bytes[1] in [0xF1, 0xF9]:
-                                ext = '.aac'
-                            elif data_bytes[4:11] == b'ftypM4A':
-                                ext = '.m4a'
-                            else:
-                                ext = '.dat'
-                        else:
-                            if file_name and '.' in file_name:
-                                ext = os.path.splitext(file_name)[1].lower()
-                        if not ext:
-                            if 'jpeg' in mime or 'jpg' in mime:
-                                ext = '.jpg'
-                            elif 'png' in mime:
-                                ext = '.png'
-                            elif 'gif' in mime:
-                                ext = '.gif'
-                            elif 'webp' in mime:
-                                ext = '.webp'
-                            elif 'mp3' in mime:
-                                ext = '.mp3'
-                            elif 'wav' in mime:
-                                ext = '.wav'
-                            elif 'ogg' in mime:
-                                ext = '.ogg'
-                            elif 'flac' in mime:
-                                ext = '.flac'
-                            elif 'aac' in mime:
-                                ext = '.aac'
-                            elif 'm4a' in mime:
-                                ext = '.m4a'
-                            elif 'mp4' in mime:
-                                ext = '.mp4'
-                            elif 'webm' in mime:
-                                ext = '.webm'
-                            elif 'mov' in mime:
-                                ext = '.mov'
-                            elif 'pdf' in mime:
-                                ext = '.pdf'
-                            elif 'svg' in mime:
-                                ext = '.svg'
-                            elif 'audio' in mime:
-                                ext = '.mp3'
-                            else:
-                                ext = '.dat'
-                        version = idx + 1
-                        media_filename = generate_filename(meta, version=version)
-                        media_path = medium_folder / f"{media_filename}{ext}"
-                        media_path.write_bytes(data_bytes)
-                        created_files_count += 1
-                    created_files_log = []
-                    if medium not in ['writing', 'audio']:
-                        meta_with_lang = {}
-                        for key, value in meta.items():
-                            meta_with_lang[key] = value
-                            if key == 'version':
-                                primary_lang = meta.get('language1', 'en')
-                                meta_with_lang['language'] = primary_lang
-                        base_filename = generate_filename(meta)
-                        html_path = medium_folder / f"{base_filename}.html"
-                        generate_html_file(meta_with_lang, main_content_html, html_path)
-                        created_files_count += 1
-                    if not resources:
-                        raise ValueError(f"Medium is '{medium}' maar er is geen afbeelding/bestand bijgevoegd.")
-
-                    # Process media files
-                    for idx, resource in enumerate(resources):
-                        mime = resource.findtext('mime', '')
-                        file_name = resource.findtext('file-name', '')
-                        ext = ''
-                        data_b64 = resource.findtext('data')
-                        if not data_b64:
-                            continue
-                        data_bytes = base64.b64decode(data_b64)
-                        if not ext:
-                            if 'jpeg' in mime or 'jpg' in mime:
-                                ext = '.jpg'
-                            elif 'png' in mime:
-                                ext = '.png'
-                            elif 'gif' in mime:
-                                ext = '.gif'
-                            elif 'webp' in mime:
-                                ext = '.webp'
-                            elif 'mp3' in mime:
-                                ext = '.mp3'
-                            elif 'wav' in mime:
-                                ext = '.wav'
-                            elif 'ogg' in mime:
-                                ext = '.ogg'
-                            elif 'flac' in mime:
-                                ext = '.flac'
-                            elif 'aac' in mime:
-                                ext = '.aac'
-                            elif 'm4a' in mime:
-                                ext = '.m4a'
-                            elif 'mp4' in mime:
-                                ext = '.mp4'
-                            elif 'webm' in mime:
-                                ext = '.webm'
-                            elif 'mov' in mime:
-                                ext = '.mov'
-                            elif 'pdf' in mime:
-                                ext = '.pdf'
-                            elif 'svg' in mime:
-                                ext = '.svg'
-                            elif 'audio' in mime:
-                                ext = '.mp3'
-                            else:
-                                ext = '.dat'
-                        version = idx + 1
-                        media_filename = generate_filename(meta, version=version)
-                        media_path = medium_folder / f"{media_filename}{ext}"
-                        media_path.write_bytes(data_bytes)
-                        # print(f"    📄 File saved: {media_path}")  # Verbose output removed
-                        # media_file_status = "Overschreven" if media_path.exists() else "Nieuw"
-                        # created_files_log.append(f"{media_path.name} ({media_file_status})")
+                        # Titelnummering gebeurt hierboven in exportvolgorde; resultaten
+                        # worden in dezelfde volgorde verwerkt, zodat het rapport
+                        # identiek is aan een sequentiële run.
+                        pending.append((note, title_warnings, manifest_key, note_hash, executor.submit(convert_note, note, note_title_raw, dest_dir)))
+                        while len(pending) > workers * 2:
+                            finish_pending_note(*pending.popleft())
+            except ET.ParseError as e:
+                report['failed'].append({'title': f"Bestand: {enex_file.name}", 'reason': f"XML fout na {note_count} notities. Fout: {e}"})
+            except OSError as e:
+                report['failed'].append({'title': f"Bestand: {enex_file.name}", 'reason': f"Kon bestand niet lezen. Fout: {e}"})
+            finally:
+                while pending:
+                    finish_pending_note(*pending.popleft())
+                spool_dir.cleanup()
+                save_manifest(dest_dir, manifest)
+            print(f"  Verwerkt {note_count} notities uit bestand.")
 
-                    report['success'].append({'title': meta.get('title', note_title_raw), 'files': created_files_log})
+    removed_count = remove_stale_files(dest_dir, stale_files, manifest)
+    if removed_count:
+        print(f"\n🧹 {removed_count} verouderde uitvoerbestanden verwijderd")
 
-            except Exception as e:
-                report['failed'].append({'title': note_title_raw, 'reason': str(e)})
+    for title, count in title_counts.items():
+        if count > 1:
+            report['warnings'].append(f"⚠️  Dubbele titel gevonden: '{title}' komt {count} keer voor. Titels zijn genummerd.")
 
     # --- Rapportage ---
     # Legacy category summary removed
@@ -752,6 +1076,9 @@ def process_enex_files(source_dir: pathlib.Path, dest_dir: pathlib.Path):
     # else:
     #     print("  Geen notities succesvol verwerkt.")
 
+    if report['skipped']:
+        print(f"\n⏭️  {len(report['skipped'])} ongewijzigde notities overgeslagen (manifest: {MANIFEST_FILENAME})")
+
     if report['failed']:
         print("\n" + "="*50)
         print("❌ NIET VERWERKTE NOTITIES")
@@ -880,6 +1207,10 @@ def is_file_stable(file_path: pathlib.Path, check_duration: int = 10) -> bool:
     # Get the initial modification time
     initial_mtime = file_path.stat().st_mtime
 
+    # A file that has not been modified for the whole duration is stable already
+    if time.time() - initial_mtime >= check_duration:
+        return True
+
     # Wait for the specified duration
     time.sleep(check_duration)
 
@@ -892,9 +1223,16 @@ def is_file_stable(file_path: pathlib.Path, check_duration: int = 10) -> bool:
 def wait_for_file_stability(file_path: pathlib.Path, max_wait_seconds: int = 60) -> bool:
     """
     Wacht tot een bestand stabiel is (niet meer groeit in grootte).
-    Controleert elke 2 seconden of de bestandsgrootte hetzelfde blijft.
+    Een bestand dat al FILE_SETTLE_SECONDS niet is gewijzigd, is direct stabiel;
+    anders wordt elke 2 seconden gecontroleerd of de bestandsgrootte hetzelfde blijft.
     Retourneert True als bestand stabiel is, False als timeout bereikt.
     """
+    try:
+        if time.time() - file_path.stat().st_mtime >= FILE_SETTLE_SECONDS:
+            return True
+    except OSError:
+        pass
+
     print(f"  🔍 Controleren of bestand volledig is geschreven...")
     
     stable_checks_needed = 3  # Aantal opeenvolgende controles met zelfde grootte
@@ -927,9 +1265,87 @@ def wait_for_file_stability(file_path: pathlib.Path, max_wait_seconds: int = 60)
     print(f"  ⏰ Timeout bereikt na {max_wait_seconds} seconden")
     return False
 
+def scan_enex_files(source_dir: pathlib.Path) -> Dict[str, Tuple[int, float]]:
+    """Geeft (grootte, mtime) per .enex bestand in de map."""
+    signatures = {}
+    for enex_file in source_dir.glob('*.enex'):
+        try:
+            stat = enex_file.stat()
+        except OSError:
+            continue
+        signatures[enex_file.name] = (stat.st_size, stat.st_mtime)
+    return signatures
+
+def start_enex_observer(source_dir: pathlib.Path, wake: threading.Event):
+    """Start een watchdog-observer die `wake` zet bij elke wijziging aan een .enex bestand (None zonder watchdog)."""
+    if Observer is None:
+        return None
+
+    class EnexEventHandler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            paths = (event.src_path, getattr(event, 'dest_path', ''))
+            if any(str(path).lower().endswith('.enex') for path in paths):
+                wake.set()
+
+    observer = Observer()
+    observer.schedule(EnexEventHandler(), str(source_dir), recursive=False)
+    observer.start()
+    return observer
+
+def watch_enex_files(source_dir: pathlib.Path, dest_dir: pathlib.Path, workers: int = 1, force: bool = False):
+    """
+    Blijft draaien en converteert zodra een nieuwe of gewijzigde export
+    FILE_SETTLE_SECONDS niet meer is beschreven. Elke run verwerkt alle exports,
+    zodat de titelnummering klopt; het manifest slaat ongewijzigde notities over.
+    Stoppen met Ctrl+C.
+
+    :param force: Als True, negeer het manifest bij de eerste run
+    """
+    wake = threading.Event()
+    observer = start_enex_observer(source_dir, wake)
+    if observer is not None:
+        print(f"👀 Watch mode - wachten op wijzigingen in {source_dir} (watchdog)")
+    else:
+        print(f"👀 Watch mode - {source_dir} wordt elke {WATCH_POLL_INTERVAL} seconden gescand (installeer watchdog voor events)")
+
+    processed = {}
+    try:
+        while True:
+            signatures = scan_enex_files(source_dir)
+            changed = sorted(name for name, signature in signatures.items() if processed.get(name) != signature)
+            timeout = WATCH_POLL_INTERVAL if observer is None else 60
+            if changed:
+                newest_mtime = max(signatures[name][1] for name in changed)
+                remaining = FILE_SETTLE_SECONDS - (time.time() - newest_mtime)
+                if remaining <= 0:
+                    print(f"\n📥 Gewijzigde export(s): {', '.join(changed)}")
+                    process_enex_files(source_dir, dest_dir, workers=workers, force=force)
+                    force = False
+                    processed = signatures
+                    continue
+                timeout = min(timeout, remaining)
+            wake.wait(timeout)
+            wake.clear()
+    except KeyboardInterrupt:
+        print("\n🛑 Watch mode gestopt.")
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
 if __name__ == "__main__":
     print("========================================")
     print(" Evernote .enex Converter & Generator")
     print("========================================")
-    process_enex_files(SOURCE_ENEX_FOLDER, DESTINATION_MEDIA_FOLDER)
-    print("\n🎉 Alle .enex bestanden zijn verwerkt.")
+    workers = 1
+    if '--workers' in sys.argv:
+        workers = int(sys.argv[sys.argv.index('--workers') + 1])
+        print(f"⚙️  Conversie met {workers} worker-processen")
+    force = '--force' in sys.argv or '-f' in sys.argv
+    if force:
+        print("🔄 FORCE mode - manifest wordt genegeerd, alle notities worden opnieuw gegenereerd")
+    if '--watch' in sys.argv:
+        watch_enex_files(SOURCE_ENEX_FOLDER, DESTINATION_MEDIA_FOLDER, workers=workers, force=force)
+    else:
+        process_enex_files(SOURCE_ENEX_FOLDER, DESTINATION_MEDIA_FOLDER, workers=workers, force=force)
+        print("\n🎉 Alle .enex bestanden zijn verwerkt.")
@@ -8,10 +8,33 @@ import re
 import sys
 import time
 import base64
+import bisect
+import collections
+import concurrent.futures
+import gzip
+import hashlib
+import html
+import mimetypes
+import queue
+import threading
+import sqlite3
+import unicodedata
+import requests
 import firebase_admin
 from firebase_admin import credentials, initialize_app, db, storage
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Set, Tuple
 import xml.etree.ElementTree as ET
+from upload_image_with_cache_control import CACHE_CONTROL
+
+try:
+    import brotli  # Optioneel: extra .br variant van de catalogus
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image, ImageOps  # Optioneel: lokale afgeleide afbeeldingen (Pillow)
+except ImportError:
+    Image = None
 
 # --- CONFIGURATIE ---
 # De bronmap met al uw categorie-submappen (poetry, music, etc.)
@@ -22,6 +45,89 @@ SERVICE_ACCOUNT_KEY_PATH = pathlib.Path(__file__).parent / 'serviceAccountKey_ar
 DATABASE_URL = "https://artwall-by-jr-default-rtdb.europe-west1.firebasedatabase.app/"
 STORAGE_BUCKET = "artwall-by-jr.firebasestorage.app"  # Remove the gs:// prefix
 
+# Lokale cache van geparste HTML bestanden, op (pad, grootte, mtime_ns); uit te zetten met --no-cache
+PARSE_CACHE_PATH = pathlib.Path(__file__).parent / '.artwall-parse-cache.sqlite'
+PARSE_CACHE_VERSION = 2  # Ophogen als parse_html_metadata andere uitvoer geeft
+
+# Journal van afgeronde uploads en database-writes, voor --resume na een onderbroken run
+SYNC_JOURNAL_PATH = pathlib.Path(__file__).parent / '.artwall-sync-journal.jsonl'
+
+# Samenvatting van een run als JSON (--report PAD); per shard samen te voegen met --merge-reports
+SYNC_REPORT_PATH = pathlib.Path(__file__).parent / 'artwall-sync-report.json'
+
+# Upload instellingen
+UPLOAD_WORKERS = 8  # Aantal gelijktijdige uploads naar Storage (--upload-workers N)
+UPLOAD_MAX_RETRIES = 3  # Extra pogingen per bestand na een mislukte upload
+UPLOAD_RETRY_BACKOFF = 1.0  # Seconden wachttijd voor de eerste herhaling, verdubbelt per poging
+RESUMABLE_UPLOAD_THRESHOLD = 8 * 1024 * 1024  # Bestanden vanaf deze grootte gaan via een hervatbare sessie
+RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024  # Bytes per chunk, een veelvoud van 256 KiB
+UPLOAD_SESSIONS_PATH = pathlib.Path(__file__).parent / '.artwall-upload-sessions.json'  # Open sessie-URI's per blob
+
+# Afgeleide afbeeldingen {naam}_{B}x{H}.{ext}, zoals src/utils/image-urls.ts ze verwacht
+DERIVATIVE_SIZES = ((200, 200), (400, 400), (480, 480), (1200, 1200))  # Passend binnen B x H, nooit vergroot
+DERIVATIVE_FORMATS = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.webp': 'WEBP', '.png': 'PNG'}  # Zelfde formaat als het origineel
+# Kwaliteit 90, zoals de storage-resize-images extensie die deze bestanden eerder maakte
+DERIVATIVE_SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True, 'progressive': True},
+    'WEBP': {'quality': 90, 'method': 6},
+    'PNG': {'optimize': True},
+}
+DERIVATIVE_CACHE_DIR = pathlib.Path(__file__).parent / '.artwall-derivatives'  # Per bron-MD5
+DERIVATIVE_CACHE_VERSION = 2  # Ophogen als maten of kwaliteit veranderen
+DERIVATIVE_WORKERS = os.cpu_count() or 1  # Processen voor het schalen
+
+# Pipeline instellingen (--pipeline)
+PIPELINE_QUEUE_DEPTH = 32  # Maximaal aantal kunstwerken tussen scannen en uploaden/schrijven
+
+# Statische catalogus in Storage (publiceren na de sync, of los met --publish-only)
+CATALOG_PREFIX = 'catalog/'  # Pagina's als catalog/{medium}/{inhoudshash}.json.gz en .json.br
+CATALOG_MANIFEST_PATH = 'catalog/manifest.json'  # Vaste naam; verwijst naar de actuele pagina's
+CATALOG_MANIFEST_CACHE_CONTROL = 'public, max-age=60'  # Het manifest verandert per publicatie
+CATALOG_PAGE_SIZE = 200  # Kaarten per pagina
+CATALOG_EXTENSIONS = {'gzip': '.json.gz', 'br': '.json.br'}  # Bestandsextensie per Content-Encoding
+
+# Zoekindex in Storage: posting lists per termprefix in search/{prefix}/{inhoudshash}.json.gz
+SEARCH_PREFIX = 'search/'
+SEARCH_MANIFEST_PATH = 'search/manifest.json'
+SEARCH_INDEX_VERSION = 1  # Ophogen als tokenizer of gewichten veranderen; de index wordt dan herbouwd
+SEARCH_TERM_PREFIX_LENGTH = 2  # Termen met dezelfde eerste letters delen een bestand
+SEARCH_FIELD_WEIGHTS = {'title': 3, 'description': 2, 'content': 1, 'lyrics': 1}  # Ook voor translations/{taal}/{veld}
+SEARCH_MIN_TERM_LENGTH = 2
+SEARCH_STOPWORDS = frozenset(
+    'de het een en van in is dat op te met voor niet zijn die '  # nl
+    'the and of to in is it that for on with as was '  # en
+    'il lo la le gli di che un una per non '  # it
+    'der die das und ist ein eine zu den nicht mit '  # de
+    'les et est une des du que pas pour '  # fr
+    'el los las es por'  # es
+    .split()
+)
+SEARCH_HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+SEARCH_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+SEARCH_FOLD_TABLE = str.maketrans({'æ': 'ae', 'œ': 'oe', 'ø': 'o', 'ł': 'l', 'đ': 'd', 'ı': 'i'})
+
+# Database schrijf instellingen
+MANIFEST_MIGRATED_PATH = 'artwall_manifest_meta/migrated'  # True zodra artwall_manifest alle bestaande records bevat
+INCOMPLETE_CONTENT_HASH = 'incomplete'  # Manifest-hash van een kunstwerk met mislukte uploads; wordt altijd opnieuw gepland
+DB_BATCH_MAX_ITEMS = 250  # Maximaal aantal kunstwerken per multi-path update()
+DB_BATCH_MAX_BYTES = 4 * 1024 * 1024  # Maximale JSON-grootte per update() request
+# Velden met volledige teksten; die staan in artwall_content/{medium}/{key} en niet in
+# de kaart onder artwall/{medium}/{key}, zodat lijsten alleen kaartgegevens ophalen
+CONTENT_FIELDS = ('content', 'lyrics', 'chords', 'translations')
+# De kaart houdt een kort platte-tekstfragment van content (of lyrics) voor de achterkant
+CARD_EXCERPT_LENGTH = 240  # Maximaal aantal tekens in het veld 'excerpt'
+CARD_EXCERPT_BREAK_PATTERN = re.compile(r'<br\s*/?>|</(?:div|p|li|h[1-6])>', re.IGNORECASE)
+CARD_FORMAT_VERSION = 1  # Ophogen als de kaartvelden veranderen; bestaande kaarten worden dan één keer herschreven
+
+# Vooraf berekende index onder artwall_index/, bijgewerkt voor alleen de geschreven kunstwerken:
+#   counts/medium/{medium}                  aantal kunstwerken per medium
+#   counts/{veld}/{medium}/{waarde}         aantal per INDEX_COUNT_FIELDS waarde
+#   {veld}/{waarde}/{medium}/{key} = true   sleutels per INDEX_LIST_FIELDS waarde
+INDEX_PATH = 'artwall_index'
+INDEX_VERSION = 1  # Ophogen als de indexstructuur verandert; de index wordt dan herbouwd (--rebuild-index)
+INDEX_LIST_FIELDS = ('year', 'rating')
+INDEX_COUNT_FIELDS = ('subtype', 'year')
+
 # --- SCRIPT LOGICA ---
 
 
@@ -267,6 +373,36 @@ def normalize_artwork_payload(artwork_payload: Dict[str, Any], media_urls: List[
     
     return artwork_payload
 
+def get_base_key(html_key: str) -> str:
+    """Basissleutel van een kunstwerk: de HTML-naam zonder taalsuffix (_en, _nl, ...)."""
+    if re.search(r'_[a-z]{2}$', html_key):  # Ends with _xx (language code)
+        return html_key[:-3]
+    return html_key
+
+def shard_of_key(base_key: str, shard_count: int) -> int:
+    """
+    Vaste shard (0 .. shard_count - 1) voor een basissleutel. Gebaseerd op een SHA-1 van de
+    sleutel en niet op hash(), zodat elke machine en elk proces dezelfde verdeling maakt.
+    """
+    digest = hashlib.sha1(base_key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % shard_count
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """Zet '--shard i/n' (1-gebaseerd, bv. 2/4) om naar (index, aantal) met een 0-gebaseerde index."""
+    try:
+        number, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Ongeldige shard '{spec}', verwacht i/n zoals 1/4")
+    if count < 1 or not 1 <= number <= count:
+        raise ValueError(f"Ongeldige shard '{spec}', i moet tussen 1 en {count} liggen")
+    return number - 1, count
+
+def shard_path(path: pathlib.Path, shard: Optional[Tuple[int, int]]) -> pathlib.Path:
+    """Eigen lokaal bestand (cache, journal, ...) per shard, zodat processen op één machine elkaar niet raken."""
+    if shard is None:
+        return path
+    return path.with_name(f"{path.stem}.shard{shard[0] + 1}of{shard[1]}{path.suffix}")
+
 def group_artworks_by_base_key(items_to_process: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
     """
     Groups artworks by their base key (without language suffix) and combines language versions
@@ -275,9 +411,7 @@ def group_artworks_by_base_key(items_to_process: Dict[str, Dict[str, Any]]) -> D
     
     for html_key, item_data in items_to_process.items():
         # Extract base key by removing language suffix
-        base_key = html_key
-        if re.search(r'_[a-z]{2}$', html_key):  # Ends with _xx (language code)
-            base_key = html_key[:-3]
+        base_key = get_base_key(html_key)
         
         if base_key not in grouped_items:
             grouped_items[base_key] = {
@@ -340,22 +474,1081 @@ def group_artworks_by_base_key(items_to_process: Dict[str, Dict[str, Any]]) -> D
     
     return grouped_items
 
-def sync_to_firebase(force_update: bool = False):
+class HtmlParseCache:
     """
-    Scant de lokale media map, leest metadata uit .html bestanden,
-    vergelijkt met Firebase, en uploadt/update nieuwe of gewijzigde items.
+    SQLite-cache met het resultaat van parse_html_metadata per HTML bestand en de
+    MD5 per mediabestand. Een entry is alleen geldig zolang grootte en mtime_ns van
+    het bestand gelijk zijn.
+    """
+
+    def __init__(self, cache_path: pathlib.Path = PARSE_CACHE_PATH):
+        # Met --pipeline gebruikt de scan-thread de cache; toegang is nooit gelijktijdig
+        self.connection = sqlite3.connect(str(cache_path), check_same_thread=False)
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != PARSE_CACHE_VERSION:
+            self.connection.execute('DROP TABLE IF EXISTS parsed_html')
+            self.connection.execute('DROP TABLE IF EXISTS file_md5')
+            self.connection.execute(f'PRAGMA user_version = {PARSE_CACHE_VERSION}')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS parsed_html ('
+            'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, metadata TEXT NOT NULL)'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS file_md5 ('
+            'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, md5 TEXT NOT NULL)'
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_path: pathlib.Path, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        row = self.connection.execute(
+            'SELECT metadata FROM parsed_html WHERE path = ? AND size = ? AND mtime_ns = ?',
+            (str(file_path), stat.st_size, stat.st_mtime_ns)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, file_path: pathlib.Path, stat: os.stat_result, metadata: Dict[str, Any]) -> None:
+        self.connection.execute(
+            'INSERT OR REPLACE INTO parsed_html (path, size, mtime_ns, metadata) VALUES (?, ?, ?, ?)',
+            (str(file_path), stat.st_size, stat.st_mtime_ns, json.dumps(metadata, ensure_ascii=False))
+        )
+
+    def get_md5(self, file_path: pathlib.Path, stat: os.stat_result) -> Optional[str]:
+        row = self.connection.execute(
+            'SELECT md5 FROM file_md5 WHERE path = ? AND size = ? AND mtime_ns = ?',
+            (str(file_path), stat.st_size, stat.st_mtime_ns)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put_md5(self, file_path: pathlib.Path, stat: os.stat_result, md5: str) -> None:
+        self.connection.execute(
+            'INSERT OR REPLACE INTO file_md5 (path, size, mtime_ns, md5) VALUES (?, ?, ?, ?)',
+            (str(file_path), stat.st_size, stat.st_mtime_ns, md5)
+        )
+
+    def evict_except(self, seen_paths) -> int:
+        """Verwijdert entries van bestanden die in deze run niet meer zijn gezien."""
+        seen = {str(path) for path in seen_paths}
+        evicted = 0
+        for table in ('parsed_html', 'file_md5'):
+            stale = [(path,) for (path,) in self.connection.execute(f'SELECT path FROM {table}') if path not in seen]
+            self.connection.executemany(f'DELETE FROM {table} WHERE path = ?', stale)
+            evicted += len(stale)
+        return evicted
+
+    def close(self) -> None:
+        self.connection.commit()
+        self.connection.close()
+
+class SyncJournal:
+    """
+    Append-only JSONL journal van afgeronde blob-uploads (met de vingerafdruk van het
+    lokale bestand) en database-writes (met de inhoudshash). Met --resume wordt werk
+    dat al in het journal staat overgeslagen; na een run zonder fouten wordt het
+    journal verwijderd.
+    """
+
+    def __init__(self, journal_path: pathlib.Path = SYNC_JOURNAL_PATH, resume: bool = False):
+        self.journal_path = journal_path
+        self.uploads = {}
+        self.writes = {}
+        if resume and journal_path.exists():
+            with open(journal_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Laatste regel van een afgebroken run kan half geschreven zijn
+                    if entry.get('type') == 'upload':
+                        self.uploads[entry['blob']] = entry
+                    elif entry.get('type') == 'write':
+                        self.writes[entry['key']] = entry['hash']
+        self.lock = threading.Lock()
+        self.file = open(journal_path, 'a' if resume else 'w', encoding='utf-8')
+
+    @staticmethod
+    def fingerprint(file_path: pathlib.Path) -> List[int]:
+        stat = file_path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        with self.lock:
+            self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.file.flush()
+
+    def completed_upload(self, blob_path: str, file_path: pathlib.Path) -> Optional[str]:
+        """Publieke URL als dit bestand, ongewijzigd, al eerder naar `blob_path` is geüpload."""
+        entry = self.uploads.get(blob_path)
+        if entry and entry['file'] == str(file_path) and entry['fingerprint'] == self.fingerprint(file_path):
+            return entry['url']
+        return None
+
+    def record_upload(self, blob_path: str, file_path: pathlib.Path, url: str) -> None:
+        self._append({'type': 'upload', 'blob': blob_path, 'file': str(file_path), 'fingerprint': self.fingerprint(file_path), 'url': url})
+
+    def completed_write(self, db_key: str, content_hash: str) -> bool:
+        return self.writes.get(db_key) == content_hash
+
+    def record_write(self, db_key: str, content_hash: str) -> None:
+        self._append({'type': 'write', 'key': db_key, 'hash': content_hash})
+
+    def close(self, discard: bool = False) -> None:
+        self.file.close()
+        if discard:
+            self.journal_path.unlink()
+
+def build_html_prefix_index(html_files: Dict[str, pathlib.Path]) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Bouwt een index over de HTML-namen van een map: de gesorteerde namen (voor een
+    bisect-zoekactie op prefix) en de oorspronkelijke volgorde van elke naam.
+    """
+    return sorted(html_files), {name: position for position, name in enumerate(html_files)}
+
+def find_matching_html(html_index: Tuple[List[str], Dict[str, int]], prefix: str) -> Optional[str]:
+    """
+    Geeft de HTML-naam die met `prefix` begint en als eerste in de map staat, of None.
+    Alle namen met hetzelfde prefix liggen in de gesorteerde lijst aaneengesloten,
+    dus alleen die kandidaten worden bekeken.
+    """
+    sorted_names, order = html_index
+    best_name = None
+    position = bisect.bisect_left(sorted_names, prefix)
+    while position < len(sorted_names) and sorted_names[position].startswith(prefix):
+        name = sorted_names[position]
+        if best_name is None or order[name] < order[best_name]:
+            best_name = name
+        position += 1
+    return best_name
+
+def compute_file_md5(file_path: pathlib.Path) -> str:
+    """Base64-gecodeerde MD5 van een bestand, in hetzelfde formaat als blob.md5_hash in Storage."""
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return base64.b64encode(digest.digest()).decode('ascii')
+
+def fetch_remote_md5_hashes(bucket, prefixes: List[str]) -> Dict[str, str]:
+    """
+    Haalt met één list_blobs aanroep per prefix de opgeslagen MD5 van alle blobs op.
+    Blobs zonder MD5 (samengestelde objecten) ontbreken en worden dus altijd geüpload.
+    """
+    remote_hashes = {}
+    for prefix in prefixes:
+        try:
+            for blob in bucket.list_blobs(prefix=prefix):
+                if blob.md5_hash:
+                    remote_hashes[blob.name] = blob.md5_hash
+        except Exception as e:
+            print(f"  ⚠️ Kon bestaande bestanden onder {prefix} niet ophalen, alles wordt geüpload: {e}")
+    return remote_hashes
+
+class UploadSessionStore:
+    """
+    Bewaart de URI van open hervatbare upload-sessies per blob in een JSON bestand,
+    samen met de vingerafdruk van het lokale bestand. Een upload die door een
+    afgebroken verbinding of een herstart stopte, gaat daardoor verder waar hij was.
+    """
+
+    def __init__(self, store_path: pathlib.Path = UPLOAD_SESSIONS_PATH):
+        self.store_path = store_path
+        self.lock = threading.Lock()
+        try:
+            self.sessions = json.loads(store_path.read_text('utf-8'))
+        except (OSError, json.JSONDecodeError):
+            self.sessions = {}
+
+    def _save(self) -> None:
+        self.store_path.write_text(json.dumps(self.sessions, indent=1), 'utf-8')
+
+    def get(self, blob_path: str, file_path: pathlib.Path) -> Optional[str]:
+        entry = self.sessions.get(blob_path)
+        if entry and entry['file'] == str(file_path) and entry['fingerprint'] == SyncJournal.fingerprint(file_path):
+            return entry['session_url']
+        return None
+
+    def put(self, blob_path: str, file_path: pathlib.Path, session_url: str) -> None:
+        with self.lock:
+            self.sessions[blob_path] = {'file': str(file_path), 'fingerprint': SyncJournal.fingerprint(file_path), 'session_url': session_url}
+            self._save()
+
+    def remove(self, blob_path: str) -> None:
+        with self.lock:
+            if self.sessions.pop(blob_path, None) is not None:
+                self._save()
+
+def parse_committed_offset(response: requests.Response) -> int:
+    """Aantal bytes dat de server heeft ontvangen, uit de Range-header van een 308-antwoord."""
+    committed_range = response.headers.get('Range')
+    if not committed_range:
+        return 0
+    return int(committed_range.rsplit('-', 1)[1]) + 1
+
+def upload_file_resumable(blob, file_path: pathlib.Path, blob_path: str, session_store: UploadSessionStore, chunk_size: Optional[int] = None) -> None:
+    """
+    Uploadt een groot bestand in chunks via een hervatbare upload-sessie. Een bewaarde
+    sessie wordt eerst gevraagd hoeveel bytes al binnen zijn; alleen de rest wordt verstuurd.
+    """
+    chunk_size = chunk_size or RESUMABLE_CHUNK_SIZE
+    total_size = file_path.stat().st_size
+    session_url = session_store.get(blob_path, file_path)
+    offset = None
+    if session_url:
+        response = requests.put(session_url, headers={'Content-Range': f'bytes */{total_size}'}, timeout=60)
+        if response.status_code in (200, 201):
+            session_store.remove(blob_path)
+            return
+        if response.status_code == 308:
+            offset = parse_committed_offset(response)
+            print(f"  ⏯️  {blob_path} - hervatten vanaf {offset}/{total_size} bytes")
+    if offset is None:
+        # Geen (geldige) sessie meer: een nieuwe starten
+        content_type = mimetypes.guess_type(file_path.name)[0] or 'application/octet-stream'
+        session_url = blob.create_resumable_upload_session(content_type=content_type, size=total_size)
+        session_store.put(blob_path, file_path, session_url)
+        offset = 0
+
+    with open(file_path, 'rb') as f:
+        while True:
+            f.seek(offset)
+            chunk = f.read(chunk_size)
+            end = offset + len(chunk) - 1
+            response = requests.put(session_url, data=chunk, headers={'Content-Range': f'bytes {offset}-{end}/{total_size}'}, timeout=300)
+            if response.status_code in (200, 201):
+                break
+            if response.status_code != 308:
+                response.raise_for_status()
+                raise requests.HTTPError(f"Onverwacht antwoord {response.status_code} van upload-sessie")
+            offset = parse_committed_offset(response)
+    session_store.remove(blob_path)
+
+def upload_file_with_retry(bucket, blob_path: str, file_path: pathlib.Path, max_retries: int = UPLOAD_MAX_RETRIES, retry_backoff: float = UPLOAD_RETRY_BACKOFF, session_store: Optional[UploadSessionStore] = None, cache_control: Optional[str] = None) -> str:
+    """
+    Uploadt één bestand naar `blob_path`, maakt het publiek en geeft de publieke URL terug.
+    Bij een fout wordt het tot `max_retries` keer opnieuw geprobeerd met exponentiële backoff.
+    Bestanden vanaf RESUMABLE_UPLOAD_THRESHOLD gaan in chunks via een hervatbare sessie als
+    er een `session_store` is; een nieuwe poging gaat dan verder vanaf de laatst ontvangen byte.
+    Een `cache_control` wordt met de upload meegestuurd, zodat er geen patch() achteraf nodig is.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            blob = bucket.blob(blob_path)
+            if cache_control is not None:
+                blob.cache_control = cache_control
+            if session_store is not None and file_path.stat().st_size >= RESUMABLE_UPLOAD_THRESHOLD:
+                upload_file_resumable(blob, file_path, blob_path, session_store)
+            else:
+                blob.upload_from_filename(str(file_path))
+            blob.make_public()
+            return blob.public_url
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = retry_backoff * (2 ** attempt)
+            print(f"  🔁 {blob_path} - {e} (nieuwe poging over {delay:.1f}s)")
+            time.sleep(delay)
+
+def upload_file_if_changed(bucket, blob_path: str, file_path: pathlib.Path, remote_md5: Optional[str], max_retries: int = UPLOAD_MAX_RETRIES, retry_backoff: float = UPLOAD_RETRY_BACKOFF, local_md5: Optional[str] = None, journal: Optional[SyncJournal] = None, session_store: Optional[UploadSessionStore] = None) -> Tuple[str, bool]:
+    """
+    Uploadt een bestand alleen als de lokale MD5 afwijkt van `remote_md5`.
+
+    :param local_md5: Al bekende MD5 van het lokale bestand; anders wordt die berekend
+    :param journal: Als gegeven, worden uploads die daar al in staan overgeslagen en nieuwe vastgelegd
+    :param session_store: Open upload-sessies voor grote bestanden (zie upload_file_with_retry)
+    :return: (publieke URL, True als er geüpload is)
+    """
+    if journal is not None:
+        journal_url = journal.completed_upload(blob_path, file_path)
+        if journal_url:
+            return journal_url, False
+    if remote_md5 and (local_md5 or compute_file_md5(file_path)) == remote_md5:
+        return bucket.blob(blob_path).public_url, False
+    url = upload_file_with_retry(bucket, blob_path, file_path, max_retries, retry_backoff, session_store)
+    if journal is not None:
+        journal.record_upload(blob_path, file_path, url)
+    return url, True
+
+def generate_image_derivatives(source_path: str, target_dir: str) -> Dict[str, str]:
+    """
+    Schaalt één afbeelding naar alle DERIVATIVE_SIZES (passend binnen de maat, met behoud van
+    verhouding en EXIF-oriëntatie) in het formaat van het origineel. Draait in een apart proces.
+
+    :return: Pad van het bestand per maat ('200x200', ...)
+    """
+    extension = pathlib.Path(source_path).suffix.lower()
+    image_format = DERIVATIVE_FORMATS[extension]
+    target = pathlib.Path(target_dir)
+    target.mkdir(parents=True, exist_ok=True)
+    derivatives = {}
+    with Image.open(source_path) as source:
+        image = ImageOps.exif_transpose(source)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        for width, height in DERIVATIVE_SIZES:
+            variant = image.copy()
+            variant.thumbnail((width, height), Image.LANCZOS)
+            path = target / f"{width}x{height}{extension}"
+            temp_path = target / f"{width}x{height}.tmp"
+            variant.save(temp_path, image_format, **DERIVATIVE_SAVE_OPTIONS[image_format])
+            os.replace(temp_path, path)
+            derivatives[f"{width}x{height}"] = str(path)
+    return derivatives
+
+def derivative_blob_path(blob_path: str, size: str) -> str:
+    """'drawing/werk_01.jpg' + '400x400' -> 'drawing/werk_01_400x400.jpg'"""
+    base, extension = blob_path.rsplit('.', 1)
+    return f"{base}_{size}.{extension}"
+
+def is_derivative_source(blob_path: str) -> bool:
+    return Image is not None and pathlib.PurePosixPath(blob_path).suffix.lower() in DERIVATIVE_FORMATS
+
+def upload_source_derivatives(bucket, blob_path: str, file_path: pathlib.Path, source_md5: Optional[str], remote_hashes: Dict[str, str], derivative_pool: concurrent.futures.Executor, max_retries: int = UPLOAD_MAX_RETRIES, retry_backoff: float = UPLOAD_RETRY_BACKOFF) -> Dict[str, Any]:
+    """
+    Zorgt dat de afgeleide afbeeldingen van één bron in Storage staan. Ze worden alleen
+    (in `derivative_pool`) gemaakt als de lokale cache voor de MD5 van de bron ze nog niet
+    heeft, en alleen geüpload als hun MD5 afwijkt van Storage. Uploads krijgen direct de
+    immutable CACHE_CONTROL en worden publiek gemaakt.
+
+    :return: Per afgeleid blob_path True (geüpload), False (ongewijzigd) of de Exception
+    """
+    source_md5 = source_md5 or compute_file_md5(file_path)
+    target_dir = DERIVATIVE_CACHE_DIR / f"v{DERIVATIVE_CACHE_VERSION}" / base64.b64decode(source_md5).hex()
+    extension = file_path.suffix.lower()
+    cached = {f"{width}x{height}": target_dir / f"{width}x{height}{extension}" for width, height in DERIVATIVE_SIZES}
+    if not all(path.exists() for path in cached.values()):
+        cached = {size: pathlib.Path(path) for size, path in derivative_pool.submit(generate_image_derivatives, str(file_path), str(target_dir)).result().items()}
+    results = {}
+    for size, path in cached.items():
+        variant_path = derivative_blob_path(blob_path, size)
+        try:
+            if remote_hashes.get(variant_path) == compute_file_md5(path):
+                results[variant_path] = False
+                continue
+            upload_file_with_retry(bucket, variant_path, path, max_retries, retry_backoff, cache_control=CACHE_CONTROL)
+            results[variant_path] = True
+        except Exception as e:
+            results[variant_path] = e
+    return results
+
+def upload_image_derivatives(bucket, sources: List[Tuple[str, pathlib.Path, Optional[str]]], remote_hashes: Dict[str, str], derivative_pool: concurrent.futures.Executor, max_workers: int = UPLOAD_WORKERS) -> Dict[str, Any]:
+    """
+    upload_source_derivatives voor een lijst (blob_path, bestand, bron-MD5); het schalen loopt
+    parallel over de processen van `derivative_pool`, de uploads over `max_workers` threads.
+    """
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(upload_source_derivatives, bucket, blob_path, file_path, source_md5, remote_hashes, derivative_pool): blob_path
+            for blob_path, file_path, source_md5 in sources
+        }
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                results.update(future.result())
+            except Exception as e:
+                results[futures[future]] = e
+    return results
+
+def upload_media_files(bucket, uploads: List[tuple], max_workers: int = UPLOAD_WORKERS, max_retries: int = UPLOAD_MAX_RETRIES, retry_backoff: float = UPLOAD_RETRY_BACKOFF, remote_hashes: Optional[Dict[str, str]] = None, local_hashes: Optional[Dict[str, Optional[str]]] = None, journal: Optional[SyncJournal] = None, session_store: Optional[UploadSessionStore] = None) -> Tuple[Dict[str, Any], Set[str]]:
+    """
+    Uploadt (blob_path, file_path) paren parallel met maximaal `max_workers` gelijktijdige uploads.
+    `bucket` hoeft alleen blob(name) te ondersteunen, met upload_from_filename(), make_public()
+    en public_url op de blob; in tests kan dus een lokale nep-bucket worden gebruikt.
+
+    :param remote_hashes: MD5 per blob_path in Storage (zie fetch_remote_md5_hashes); bestanden
+                          met dezelfde MD5 worden niet opnieuw geüpload
+    :param local_hashes: Al bekende lokale MD5 per blob_path, zodat bestanden niet opnieuw worden gelezen
+    :param journal: SyncJournal voor --resume (zie upload_file_if_changed)
+    :param session_store: UploadSessionStore voor hervatbare uploads van grote bestanden
+    :return: Per blob_path de publieke URL (of de Exception als alle pogingen mislukten),
+             en de blob_paths die ongewijzigd waren
+    """
+    results = {}
+    unchanged = set()
+    if not uploads:
+        return results, unchanged
+    remote_hashes = remote_hashes or {}
+    local_hashes = local_hashes or {}
+    total = len(uploads)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(upload_file_if_changed, bucket, blob_path, file_path, remote_hashes.get(blob_path), max_retries, retry_backoff, local_hashes.get(blob_path), journal, session_store): blob_path
+            for blob_path, file_path in uploads
+        }
+        for done, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+            blob_path = futures[future]
+            try:
+                results[blob_path], uploaded = future.result()
+                if uploaded:
+                    print(f"  ☁️ [{done}/{total}] {blob_path}")
+                else:
+                    unchanged.add(blob_path)
+                    print(f"  ⏭️  [{done}/{total}] {blob_path} - ongewijzigd")
+            except Exception as e:
+                results[blob_path] = e
+                print(f"  ❌ [{done}/{total}] {blob_path} - {e}")
+    return results, unchanged
+
+def compute_payload_hash(payload: Dict[str, Any]) -> str:
+    """Stabiele hash van een payload: gelijke inhoud geeft dezelfde hash, ongeacht de volgorde van sleutels."""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def compute_content_hash(artwork_payload: Dict[str, Any], media_hashes: Dict[str, Optional[str]]) -> str:
+    """
+    Inhoudshash van een kunstwerk: de gecombineerde payload (zonder mtime-afhankelijke
+    velden) plus de MD5 van elk mediabestand per blob-pad. Een nieuwe mtime door een
+    Drive-sync of kopie verandert de hash dus niet.
+    """
+    payload = {key: value for key, value in artwork_payload.items() if key not in ('recordCreationDate', 'contentHash')}
+    return compute_payload_hash({'payload': payload, 'media': media_hashes})
+
+def hash_payload_fields(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Zelfde boomstructuur als de payload, maar met een korte hash per bladwaarde.
+    Wordt in het manifest bewaard om later alleen gewijzigde velden te versturen.
+    """
+    field_hashes = {}
+    for key, value in payload.items():
+        if isinstance(value, dict) and value:
+            field_hashes[key] = hash_payload_fields(value)
+        else:
+            field_hashes[key] = compute_payload_hash({'value': value})[:12]
+    return field_hashes
+
+def flatten_tree(tree: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """Zet een geneste dict om naar {'a/b/c': bladwaarde}."""
+    leaves = {}
+    for key, value in tree.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            leaves.update(flatten_tree(value, f"{path}/"))
+        else:
+            leaves[path] = value
+    return leaves
+
+def build_field_updates(record_path: str, payload: Dict[str, Any], old_field_hashes: Dict[str, Any], new_field_hashes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Multi-path updates voor alleen de gewijzigde bladvelden van een record; velden die
+    niet meer bestaan worden op None gezet. Paden die elkaar overlappen (een veld dat
+    van dict naar waarde verandert of omgekeerd) worden niet dubbel verstuurd.
+    """
+    old_leaves = flatten_tree(old_field_hashes)
+    new_leaves = flatten_tree(new_field_hashes)
+    values = flatten_tree(payload)
+    changed = [path for path, field_hash in new_leaves.items() if old_leaves.get(path) != field_hash]
+    updates = {f"{record_path}/{path}": values[path] for path in changed}
+    for path in old_leaves:
+        if path in new_leaves:
+            continue
+        overlaps = any(path.startswith(f"{other}/") or other.startswith(f"{path}/") for other in changed)
+        if not overlaps:
+            updates[f"{record_path}/{path}"] = None
+    return updates
+
+def build_card_excerpt(record: Dict[str, Any]) -> str:
+    """
+    Kort platte-tekstfragment van content (of anders lyrics) voor de kaart: regels blijven
+    behouden, een eerste regel gelijk aan de titel valt weg en na CARD_EXCERPT_LENGTH
+    tekens wordt op een woordgrens afgebroken.
+    """
+    text = record.get('content') or record.get('lyrics')
+    if not isinstance(text, str):
+        return ''
+    text = html.unescape(SEARCH_HTML_TAG_PATTERN.sub('', CARD_EXCERPT_BREAK_PATTERN.sub('\n', text)))
+    lines = [' '.join(line.split()) for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    if lines and lines[0].casefold() == str(record.get('title') or '').strip().casefold():
+        lines = lines[1:]
+    excerpt = '\n'.join(lines)
+    if len(excerpt) > CARD_EXCERPT_LENGTH:
+        excerpt = re.sub(r'\s+\S*$', '', excerpt[:CARD_EXCERPT_LENGTH]).rstrip(' ,.;:') + '…'
+    return excerpt
+
+def split_artwork_record(record: Dict[str, Any], with_excerpt: bool = True) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Splitst een kunstwerk (of de veldhashes ervan) in de compacte kaart voor artwall/ en
+    de teksten (CONTENT_FIELDS) voor artwall_content/. Lege teksten worden weggelaten.
+    De kaart krijgt het veld 'excerpt' (zie build_card_excerpt) als er tekst is.
+
+    :param with_excerpt: False voor veldhashes, die al een 'excerpt' hash bevatten
+    """
+    card = {key: value for key, value in record.items() if key not in CONTENT_FIELDS}
+    content = {key: record[key] for key in CONTENT_FIELDS if record.get(key)}
+    if with_excerpt:
+        card.pop('excerpt', None)
+        excerpt = build_card_excerpt(record)
+        if excerpt:
+            card['excerpt'] = excerpt
+    return card, content
+
+def index_key(value: Any) -> Optional[str]:
+    """Waarde als geldige database-sleutel (geen . # $ [ ] /), of None als de waarde leeg is."""
+    if value is None:
+        return None
+    key = re.sub(r'[.#$\[\]/]', '_', str(value).strip())
+    return key or None
+
+def artwork_index_values(record: Dict[str, Any]) -> Dict[str, str]:
+    """Waarden van een kunstwerk voor INDEX_LIST_FIELDS en INDEX_COUNT_FIELDS; lege velden ontbreken."""
+    values = {}
+    for field in dict.fromkeys(INDEX_LIST_FIELDS + INDEX_COUNT_FIELDS):
+        key = index_key(record.get(field))
+        if key is not None:
+            values[field] = key
+    return values
+
+def build_index_updates(db_key: str, old_values: Optional[Dict[str, str]], new_values: Dict[str, str]) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """
+    Index-updates voor één geschreven kunstwerk: de sleutel verhuist tussen de
+    {veld}/{waarde} lijsten en de tellers veranderen alleen voor gewijzigde waarden.
+
+    :param old_values: Geïndexeerde waarden uit het manifest, None voor een nieuw kunstwerk
+    :return: ({pad: True/None} multi-path updates, {tellerpad onder INDEX_PATH: verschil})
+    """
+    medium = db_key.split('/', 1)[0]
+    updates = {}
+    count_deltas = collections.Counter()
+    if old_values is None:
+        count_deltas[f"counts/medium/{medium}"] += 1
+        old_values = {}
+    for field in INDEX_LIST_FIELDS:
+        old, new = old_values.get(field), new_values.get(field)
+        if old != new:
+            if old is not None:
+                updates[f"{INDEX_PATH}/{field}/{old}/{db_key}"] = None
+            if new is not None:
+                updates[f"{INDEX_PATH}/{field}/{new}/{db_key}"] = True
+    for field in INDEX_COUNT_FIELDS:
+        old, new = old_values.get(field), new_values.get(field)
+        if old != new:
+            if old is not None:
+                count_deltas[f"counts/{field}/{medium}/{old}"] -= 1
+            if new is not None:
+                count_deltas[f"counts/{field}/{medium}/{new}"] += 1
+    return updates, dict(count_deltas)
+
+def build_full_index(indexed: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
+    """Volledige artwall_index boom uit de geïndexeerde waarden per "{medium}/{key}"."""
+    index = {'version': INDEX_VERSION, 'counts': {'medium': {}}}
+    for db_key, values in indexed.items():
+        medium, key = db_key.split('/', 1)
+        index['counts']['medium'][medium] = index['counts']['medium'].get(medium, 0) + 1
+        for field in INDEX_LIST_FIELDS:
+            if field in values:
+                index.setdefault(field, {}).setdefault(values[field], {}).setdefault(medium, {})[key] = True
+        for field in INDEX_COUNT_FIELDS:
+            if field in values:
+                field_counts = index['counts'].setdefault(field, {}).setdefault(medium, {})
+                field_counts[values[field]] = field_counts.get(values[field], 0) + 1
+    return index
+
+def rebuild_artwork_index(root_ref, artwall_ref, existing_artworks: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Bouwt artwall_index in één keer opnieuw op uit de kaarten onder artwall/ en zet de
+    geïndexeerde waarden in de manifest-entries, als basis voor de incrementele updates.
+    artwall_index/search_pending blijft staan: de zoekindex heeft die kunstwerken nog niet.
+    """
+    indexed = {}
+    for medium in VALID_MEDIUMS:
+        medium_items = artwall_ref.child(medium).get() or {}
+        for key, record in (medium_items.items() if isinstance(medium_items, dict) else []):
+            db_key = f"{medium}/{key}"
+            if db_key in existing_artworks and isinstance(record, dict):
+                indexed[db_key] = artwork_index_values(record)
+    # Multi-path update per topniveau-sleutel in plaats van set() op de hele node
+    index_updates = {key: None for key in (root_ref.child(INDEX_PATH).get(shallow=True) or {}) if key != 'search_pending'}
+    index_updates.update(build_full_index(indexed))
+    root_ref.child(INDEX_PATH).update(index_updates)
+    write_in_batches(root_ref, [
+        (db_key, {f"artwall_manifest/{db_key}/index": values}) for db_key, values in indexed.items()
+    ])
+    for db_key, values in indexed.items():
+        existing_artworks[db_key]['index'] = values
+
+def iter_write_batches(entries: List[Tuple[str, Dict[str, Any]]], max_items: int = DB_BATCH_MAX_ITEMS, max_bytes: int = DB_BATCH_MAX_BYTES):
+    """
+    Verdeelt (item, {pad: waarde}) paren in batches van maximaal `max_items` items en
+    ongeveer `max_bytes` JSON. De paden van één item blijven altijd in dezelfde batch.
+    """
+    batch = []
+    batch_bytes = 0
+    for item_key, updates in entries:
+        updates_bytes = len(json.dumps(updates, ensure_ascii=False).encode('utf-8'))
+        if batch and (len(batch) >= max_items or batch_bytes + updates_bytes > max_bytes):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append((item_key, updates))
+        batch_bytes += updates_bytes
+    if batch:
+        yield batch
+
+def write_in_batches(ref, entries: List[Tuple[str, Dict[str, Any]]], max_items: int = DB_BATCH_MAX_ITEMS, max_bytes: int = DB_BATCH_MAX_BYTES) -> Dict[str, Optional[Exception]]:
+    """
+    Schrijft per item een set {pad: waarde} updates onder `ref` met multi-path update()
+    requests, in plaats van één request per item. Mislukt een batch, dan wordt elk item
+    uit die batch los geschreven, zodat fouten per item bekend zijn.
+
+    :param entries: (item, {pad onder ref: waarde}) paren
+    :return: Per item None bij succes, anders de Exception
+    """
+    results = {}
+    batches = list(iter_write_batches(entries, max_items, max_bytes))
+    for number, batch in enumerate(batches, start=1):
+        combined = {}
+        for _, updates in batch:
+            combined.update(updates)
+        try:
+            ref.update(combined)
+            results.update(dict.fromkeys(item_key for item_key, _ in batch))
+            print(f"  💾 [{number}/{len(batches)}] {len(batch)} items geschreven")
+        except Exception as e:
+            print(f"  ⚠️ Batch {number}/{len(batches)} mislukt ({e}), items worden los geschreven...")
+            for item_key, updates in batch:
+                try:
+                    ref.update(updates)
+                    results[item_key] = None
+                except Exception as item_error:
+                    results[item_key] = item_error
+    return results
+
+def fetch_remote_manifest(root_ref) -> Dict[str, Dict[str, Any]]:
+    """
+    Leest het kleine manifest-node (artwall_manifest/{medium}/{key} = {modified, hash})
+    in één request, in plaats van alle kunstwerken met volledige content.
+
+    :return: Manifest-entry per "{medium}/{key}"
+    """
+    manifest = {}
+    manifest_data = root_ref.child('artwall_manifest').get() or {}
+    for medium, medium_items in manifest_data.items():
+        if isinstance(medium_items, dict):
+            for key, entry in medium_items.items():
+                manifest[f"{medium}/{key}"] = entry
+    return manifest
+
+def build_manifest_from_records(artwall_ref) -> Dict[str, Dict[str, Any]]:
+    """
+    Leest de medium-nodes volledig en maakt er manifest-entries van, voor de eenmalige
+    migratie in complete_manifest_from_records().
+    """
+    manifest = {}
+    for medium in VALID_MEDIUMS:
+        medium_items = artwall_ref.child(medium).get() or {}
+        # Handle both dict and tuple return types from Firebase
+        if isinstance(medium_items, dict):
+            items = medium_items.items()
+        else:
+            items = medium_items if medium_items else []
+        for k, v in items:
+            manifest[f"{medium}/{k}"] = {
+                'modified': v.get('recordCreationDate', 0),
+                'hash': v.get('contentHash'),
+                'split': not any(field in v for field in CONTENT_FIELDS),
+            }
+    return manifest
+
+def complete_manifest_from_records(root_ref, artwall_ref, existing_artworks: Dict[str, Dict[str, Any]]) -> int:
+    """
+    Vult artwall_manifest aan met entries voor bestaande records die er nog niet in staan
+    (eenmalige migratie, ook na een onderbroken migratie) en zet MANIFEST_MIGRATED_PATH als
+    alles geschreven is. Bestaande entries blijven ongewijzigd.
+
+    :return: Aantal toegevoegde entries
+    """
+    missing = {db_key: entry for db_key, entry in build_manifest_from_records(artwall_ref).items() if db_key not in existing_artworks}
+    write_results = write_in_batches(root_ref, [(db_key, {f"artwall_manifest/{db_key}": entry}) for db_key, entry in missing.items()])
+    existing_artworks.update({db_key: entry for db_key, entry in missing.items() if write_results[db_key] is None})
+    if any(error is not None for error in write_results.values()):
+        raise RuntimeError(f"{sum(error is not None for error in write_results.values())} manifest-entries niet geschreven")
+    root_ref.child(MANIFEST_MIGRATED_PATH).set(True)
+    return len(missing)
+
+def date_sort_value(value: Any) -> int:
+    """Jaar/maand/dag als int voor het sorteren; records bevatten zowel ints als strings."""
+    return int(value) if str(value).strip().isdigit() else 0
+
+def build_catalog_pages(cards_by_medium: Dict[str, Dict[str, Any]], page_size: int = CATALOG_PAGE_SIZE) -> Dict[str, List[bytes]]:
+    """
+    Serialiseert de kaarten per medium naar JSON pagina's van `page_size` kaarten. De kaarten
+    staan van oud naar nieuw, zodat een nieuw kunstwerk meestal alleen de laatste pagina
+    verandert en de andere pagina's (en hun namen) gelijk blijven.
+    """
+    pages = {}
+    for medium, cards in sorted(cards_by_medium.items()):
+        ordered = sorted(
+            ({key: value for key, value in card.items() if key != 'contentHash'} for card in cards.values() if isinstance(card, dict)),
+            key=lambda card: (date_sort_value(card.get('year')), date_sort_value(card.get('month')), date_sort_value(card.get('day')), str(card.get('id', '')))
+        )
+        pages[medium] = [
+            json.dumps(ordered[start:start + page_size], ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+            for start in range(0, len(ordered), page_size)
+        ]
+    return pages
+
+def compress_catalog_page(data: bytes) -> Dict[str, bytes]:
+    """Gzip (altijd) en brotli (als het pakket geïnstalleerd is) varianten van een pagina."""
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return variants
+
+def upload_catalog_blob(bucket, blob_path: str, data: bytes, cache_control: str, content_encoding: Optional[str] = None, max_retries: int = UPLOAD_MAX_RETRIES, retry_backoff: float = UPLOAD_RETRY_BACKOFF) -> str:
+    """Uploadt een catalogusbestand met de headers in dezelfde request en geeft de publieke URL terug."""
+    for attempt in range(max_retries + 1):
+        try:
+            blob = bucket.blob(blob_path)
+            blob.cache_control = cache_control
+            blob.content_encoding = content_encoding
+            blob.upload_from_string(data, content_type='application/json')
+            blob.make_public()
+            return blob.public_url
+        except Exception:
+            if attempt == max_retries:
+                raise
+            time.sleep(retry_backoff * (2 ** attempt))
+
+def collect_static_urls(tree: Any) -> Set[str]:
+    """Alle bestands-URL's (waarden van CATALOG_EXTENSIONS sleutels) in een catalogus- of zoekmanifest."""
+    urls = set()
+    if isinstance(tree, dict):
+        for key, value in tree.items():
+            if key in CATALOG_EXTENSIONS and isinstance(value, str):
+                urls.add(value)
+            else:
+                urls |= collect_static_urls(value)
+    elif isinstance(tree, list):
+        for value in tree:
+            urls |= collect_static_urls(value)
+    return urls
+
+def read_previous_manifest(existing_blobs: Dict[str, Any], manifest_path: str) -> Optional[Dict[str, Any]]:
+    """Vorig manifest uit Storage; {} als het er niet is en None als het niet leesbaar is."""
+    if manifest_path not in existing_blobs:
+        return {}
+    try:
+        return json.loads(existing_blobs[manifest_path].download_as_bytes())
+    except Exception as e:
+        print(f"  ⚠️ {manifest_path} niet leesbaar ({e}), oude bestanden blijven staan")
+        return None
+
+def prune_static_blobs(existing_blobs: Dict[str, Any], manifest_path: str, previous_manifest: Optional[Dict[str, Any]], manifest: Dict[str, Any]) -> int:
+    """
+    Verwijdert bestanden die het nieuwe noch het vorige manifest noemen; die van de vorige
+    publicatie blijven staan voor bezoekers die het oude manifest nog in hun cache hebben.
+    """
+    if previous_manifest is None:
+        return 0
+    referenced = collect_static_urls(previous_manifest) | collect_static_urls(manifest)
+    removed = 0
+    for name, blob in existing_blobs.items():
+        if name != manifest_path and blob.public_url not in referenced:
+            blob.delete()
+            removed += 1
+    return removed
+
+def publish_catalog(artwall_ref, bucket, page_size: int = CATALOG_PAGE_SIZE, max_workers: int = UPLOAD_WORKERS) -> Dict[str, int]:
+    """
+    Publiceert de kaarten uit artwall/ als statische, voorgecomprimeerde JSON pagina's in
+    Storage, zodat bezoekers de catalogus van de CDN krijgen in plaats van uit de database.
+    Pagina's hebben een naam op inhoudshash met de immutable CACHE_CONTROL; alleen pagina's
+    die nog niet bestaan worden geüpload. Pagina's die het nieuwe noch het vorige manifest
+    noemen worden daarna verwijderd.
+
+    :return: Aantallen 'uploaded', 'unchanged' en 'removed' bestanden
+    """
+    cards_by_medium = {}
+    for medium in VALID_MEDIUMS:
+        medium_items = artwall_ref.child(medium).get()
+        if isinstance(medium_items, dict) and medium_items:
+            cards_by_medium[medium] = medium_items
+    pages = build_catalog_pages(cards_by_medium, page_size)
+
+    existing_blobs = {blob.name: blob for blob in bucket.list_blobs(prefix=CATALOG_PREFIX)}
+    previous_manifest = read_previous_manifest(existing_blobs, CATALOG_MANIFEST_PATH)
+
+    manifest = {'version': 1, 'generated': int(time.time() * 1000), 'pageSize': page_size, 'mediums': {}}
+    stats = {'uploaded': 0, 'unchanged': 0, 'removed': 0}
+    futures = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for medium, medium_pages in pages.items():
+            medium_entry = {'count': 0, 'pages': []}
+            for data in medium_pages:
+                digest = hashlib.sha256(data).hexdigest()[:20]
+                page_entry = {'hash': digest, 'count': len(json.loads(data))}
+                medium_entry['count'] += page_entry['count']
+                for encoding, compressed in compress_catalog_page(data).items():
+                    blob_path = f"{CATALOG_PREFIX}{medium}/{digest}{CATALOG_EXTENSIONS[encoding]}"
+                    if blob_path in existing_blobs:
+                        page_entry[encoding] = existing_blobs[blob_path].public_url
+                        stats['unchanged'] += 1
+                    else:
+                        futures[executor.submit(upload_catalog_blob, bucket, blob_path, compressed, CACHE_CONTROL, encoding)] = (page_entry, encoding)
+                medium_entry['pages'].append(page_entry)
+            manifest['mediums'][medium] = medium_entry
+        for future in concurrent.futures.as_completed(futures):
+            page_entry, encoding = futures[future]
+            page_entry[encoding] = future.result()
+            stats['uploaded'] += 1
+
+    upload_catalog_blob(bucket, CATALOG_MANIFEST_PATH, json.dumps(manifest, ensure_ascii=False, sort_keys=True).encode('utf-8'), CATALOG_MANIFEST_CACHE_CONTROL)
+
+    stats['removed'] = prune_static_blobs(existing_blobs, CATALOG_MANIFEST_PATH, previous_manifest, manifest)
+    return stats
+
+def fold_search_text(text: str) -> str:
+    """HTML en entities eruit, accenten weg (é -> e, ß -> ss, œ -> oe) en kleine letters."""
+    text = html.unescape(SEARCH_HTML_TAG_PATTERN.sub(' ', text))
+    text = unicodedata.normalize('NFKD', text.casefold().translate(SEARCH_FOLD_TABLE))
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+def tokenize_search_text(text: str) -> List[str]:
+    """Zoektermen uit een (HTML) tekst, zonder stopwoorden en te korte termen."""
+    return [
+        term for term in SEARCH_TOKEN_PATTERN.findall(fold_search_text(text))
+        if len(term) >= SEARCH_MIN_TERM_LENGTH and term not in SEARCH_STOPWORDS
+    ]
+
+def search_terms_for_artwork(record: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Gewogen termen van een volledig kunstwerk (kaart plus teksten): per term de som van de
+    SEARCH_FIELD_WEIGHTS van de velden en vertalingen waarin hij voorkomt.
+    """
+    sources = [record] + [translation for translation in (record.get('translations') or {}).values() if isinstance(translation, dict)]
+    scores = collections.Counter()
+    for source in sources:
+        for field, weight in SEARCH_FIELD_WEIGHTS.items():
+            value = source.get(field)
+            if isinstance(value, str) and value:
+                for term in set(tokenize_search_text(value)):
+                    scores[term] += weight
+    return dict(scores)
+
+def search_shard_of_term(term: str) -> str:
+    return term[:SEARCH_TERM_PREFIX_LENGTH]
+
+def apply_search_postings(shards: Dict[str, Dict[str, Dict[str, int]]], doc_prefixes: Dict[str, List[str]], db_key: str, terms: Optional[Dict[str, int]]) -> Set[str]:
+    """
+    Zet de posting lists van één kunstwerk in `shards` ({prefix: {term: {db_key: score}}}):
+    eerst uit de prefixen waar het stond, dan onder de nieuwe termen. `terms` None
+    verwijdert het kunstwerk. Geeft de gewijzigde prefixen terug.
+    """
+    touched = set(doc_prefixes.pop(db_key, []))
+    for prefix in touched:
+        shard = shards.get(prefix, {})
+        for term in [term for term, postings in shard.items() if db_key in postings]:
+            del shard[term][db_key]
+            if not shard[term]:
+                del shard[term]
+    if terms:
+        prefixes = set()
+        for term, score in terms.items():
+            prefix = search_shard_of_term(term)
+            shards.setdefault(prefix, {}).setdefault(term, {})[db_key] = score
+            prefixes.add(prefix)
+        doc_prefixes[db_key] = sorted(prefixes)
+        touched |= prefixes
+    return touched
+
+def publish_search_index(root_ref, bucket, payloads: Optional[Dict[str, Dict[str, Any]]] = None, rebuild: bool = False, max_workers: int = UPLOAD_WORKERS) -> Dict[str, int]:
+    """
+    Werkt de statische zoekindex in Storage bij voor de kunstwerken onder
+    artwall_index/search_pending (door de sync gezet bij elke write). Alleen de prefix-
+    bestanden waarin die kunstwerken stonden of komen te staan worden gedownload en
+    opnieuw geüpload. Zonder bruikbaar vorig manifest, bij een andere SEARCH_INDEX_VERSION
+    of met `rebuild` wordt de hele index uit artwall/ en artwall_content/ opgebouwd; ook
+    als een bestand uit het vorige manifest ontbreekt of niet leesbaar is.
+
+    :param payloads: Volledige kunstwerken per "{medium}/{key}" die al in het geheugen zijn
+    :return: Aantallen 'documents', 'uploaded', 'unchanged' en 'removed'
+    """
+    payloads = payloads or {}
+    existing_blobs = {blob.name: blob for blob in bucket.list_blobs(prefix=SEARCH_PREFIX)}
+    blobs_by_url = {blob.public_url: blob for blob in existing_blobs.values()}
+    previous_manifest = read_previous_manifest(existing_blobs, SEARCH_MANIFEST_PATH)
+
+    def download_json(entry: Dict[str, Any]) -> Any:
+        return json.loads(gzip.decompress(blobs_by_url[entry['gzip']].download_as_bytes()))
+
+    def load_artwork(db_key: str) -> Optional[Dict[str, Any]]:
+        if db_key in payloads:
+            return payloads[db_key]
+        card = root_ref.child(f"artwall/{db_key}").get()
+        if not isinstance(card, dict):
+            return None
+        return {**card, **(root_ref.child(f"artwall_content/{db_key}").get() or {})}
+
+    pending_data = root_ref.child(f"{INDEX_PATH}/search_pending").get() or {}
+    pending = [f"{medium}/{key}" for medium, items in pending_data.items() if isinstance(items, dict) for key in items]
+    rebuild = rebuild or not previous_manifest or previous_manifest.get('version') != SEARCH_INDEX_VERSION
+
+    shards: Dict[str, Dict[str, Dict[str, int]]] = {}
+    if not rebuild:
+        try:
+            doc_prefixes = download_json(previous_manifest['docs'])
+            new_terms = {}
+            for db_key in pending:
+                record = load_artwork(db_key)
+                new_terms[db_key] = search_terms_for_artwork(record) if record else None
+            # Alleen de prefix-bestanden die de gewijzigde kunstwerken raken
+            needed = set()
+            for db_key, terms in new_terms.items():
+                needed.update(doc_prefixes.get(db_key, []))
+                needed.update(search_shard_of_term(term) for term in terms or {})
+            for prefix in needed:
+                entry = previous_manifest['shards'].get(prefix)
+                shards[prefix] = download_json(entry) if entry else {}
+            changed_prefixes = set()
+            for db_key, terms in new_terms.items():
+                changed_prefixes |= apply_search_postings(shards, doc_prefixes, db_key, terms)
+        except Exception as e:
+            # Een ontbrekend of onleesbaar bestand uit het vorige manifest (handmatig
+            # verwijderd, half geüpload): elke volgende publicatie zou er weer op vastlopen
+            print(f"  ⚠️ Vorige zoekindex niet bruikbaar ({e!r}), volledig opbouwen")
+            rebuild = True
+            shards = {}
+    if rebuild:
+        print("  🔎 Zoekindex volledig opbouwen...")
+        doc_prefixes = {}
+        for medium in VALID_MEDIUMS:
+            cards = root_ref.child(f"artwall/{medium}").get()
+            if not isinstance(cards, dict):
+                continue
+            contents = root_ref.child(f"artwall_content/{medium}").get() or {}
+            for key, card in cards.items():
+                if isinstance(card, dict):
+                    db_key = f"{medium}/{key}"
+                    record = payloads.get(db_key) or {**card, **(contents.get(key) or {})}
+                    apply_search_postings(shards, doc_prefixes, db_key, search_terms_for_artwork(record))
+        changed_prefixes = set(shards)
+
+    manifest = {
+        'version': SEARCH_INDEX_VERSION,
+        'generated': int(time.time() * 1000),
+        'prefixLength': SEARCH_TERM_PREFIX_LENGTH,
+        'documents': len(doc_prefixes),
+        'shards': {} if rebuild else dict(previous_manifest['shards']),
+    }
+    stats = {'documents': len(pending) if not rebuild else len(doc_prefixes), 'uploaded': 0, 'unchanged': 0, 'removed': 0}
+    files = []  # (manifest entry, pad zonder extensie, json bytes)
+    for prefix in sorted(changed_prefixes):
+        if not shards.get(prefix):
+            manifest['shards'].pop(prefix, None)
+            continue
+        data = json.dumps(shards[prefix], ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:20]
+        manifest['shards'][prefix] = {'hash': digest, 'terms': len(shards[prefix])}
+        files.append((manifest['shards'][prefix], f"{SEARCH_PREFIX}{prefix}/{digest}", data))
+    docs_data = json.dumps(doc_prefixes, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    manifest['docs'] = {'hash': hashlib.sha256(docs_data).hexdigest()[:20]}
+    files.append((manifest['docs'], f"{SEARCH_PREFIX}docs/{manifest['docs']['hash']}", docs_data))
+
+    futures = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for entry, base_path, data in files:
+            for encoding, compressed in compress_catalog_page(data).items():
+                blob_path = f"{base_path}{CATALOG_EXTENSIONS[encoding]}"
+                if blob_path in existing_blobs:
+                    entry[encoding] = existing_blobs[blob_path].public_url
+                    stats['unchanged'] += 1
+                else:
+                    futures[executor.submit(upload_catalog_blob, bucket, blob_path, compressed, CACHE_CONTROL, encoding)] = (entry, encoding)
+        for future in concurrent.futures.as_completed(futures):
+            entry, encoding = futures[future]
+            entry[encoding] = future.result()
+            stats['uploaded'] += 1
+
+    upload_catalog_blob(bucket, SEARCH_MANIFEST_PATH, json.dumps(manifest, ensure_ascii=False, sort_keys=True).encode('utf-8'), CATALOG_MANIFEST_CACHE_CONTROL)
+    if pending:
+        # Alleen de verwerkte vlaggen; een shard die intussen schreef houdt de zijne
+        root_ref.update({f"{INDEX_PATH}/search_pending/{db_key}": None for db_key in pending})
+    stats['removed'] = prune_static_blobs(existing_blobs, SEARCH_MANIFEST_PATH, previous_manifest, manifest)
+    return stats
+
+def print_sync_summary(report: Dict[str, Any]) -> None:
+    """Print het overzicht van een run (of van samengevoegde shard-rapporten)."""
+    database_operations = report['database']
+    storage_operations = report['storage']
+    scan_totals = report['scan']
+
+    print(f"\n📊 DATABASE OPERATIES:")
+    print(f"  ✅ Nieuw aangemaakt: {len(database_operations['created'])}")
+    for item in database_operations['created']:
+        print(f"    • {item}")
     
-    :param force_update: Als True, overschrijft alle bestaande items
+    print(f"  🔄 Bijgewerkt: {len(database_operations['updated'])}")
+    for item in database_operations['updated']:
+        print(f"    • {item}")
+    
+    print(f"  ⏭️  Overgeslagen: {len(database_operations['skipped'])}")
+    for item in database_operations['skipped']:
+        print(f"    • {item}")
+    
+    if database_operations['failed']:
+        print(f"  ❌ Mislukt: {len(database_operations['failed'])}")
+        for item in database_operations['failed']:
+            print(f"    • {item}")
+    
+    print(f"\n☁️  STORAGE OPERATIES:")
+    print(f"  ✅ Geüpload: {len(storage_operations['uploaded'])}")
+    for item in storage_operations['uploaded']:
+        print(f"    • {item}")
+    print(f"  ⏭️  Ongewijzigd (checksum): {len(storage_operations['unchanged'])}")
+    print(f"  🖼️  Afgeleide afbeeldingen geüpload: {len(storage_operations.get('derivatives', []))}")
+    
+    if storage_operations['failed']:
+        print(f"  ❌ Mislukt: {len(storage_operations['failed'])}")
+        for item in storage_operations['failed']:
+            print(f"    • {item}")
+    
+    print(f"\n🏁 TOTAAL OVERZICHT:")
+    print(f"  📄 HTML bestanden verwerkt: {scan_totals['html_files']}")
+    print(f"  🎨 Media bestanden verwerkt: {scan_totals['media_files']}")
+    print(f"  🗃️  Database items: {len(database_operations['created']) + len(database_operations['updated'])} actief")
+    print(f"  ☁️  Storage bestanden: {len(storage_operations['uploaded'])} geüpload")
+    
+    if database_operations['failed'] or storage_operations['failed']:
+        print(f"  ⚠️  Fouten: {len(database_operations['failed']) + len(storage_operations['failed'])}")
+    else:
+        print(f"  🎯 Geen fouten!")
+
+def merge_sync_reports(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
-    print("\n🚀 Firebase Synchronisatie Gestart")
-    if force_update:
-        print("🔄 FORCE UPDATE MODE - Alle bestanden worden overschreven")
-    print("=" * 50)
+    Voegt de JSON-rapporten van parallelle shards (--shard i/n --report PAD) samen tot één
+    rapport: tellers worden opgeteld en lijsten aan elkaar geplakt. Ontbrekende of dubbele
+    shards worden gemeld in 'missing_shards' en 'duplicate_shards'.
+    """
+    merged = {
+        'database': {'created': [], 'updated': [], 'skipped': [], 'failed': []},
+        'storage': {'uploaded': [], 'unchanged': [], 'derivatives': [], 'failed': []},
+        'scan': {'html_files': 0, 'media_files': 0, 'items': 0},
+        'shards': [],
+    }
+    for report in reports:
+        for section in ('database', 'storage'):
+            for name, items in report[section].items():
+                merged[section].setdefault(name, []).extend(items)
+        for name, count in report['scan'].items():
+            merged['scan'][name] = merged['scan'].get(name, 0) + count
+        if report.get('shard') is not None:
+            merged['shards'].append(report['shard'])
+    shard_counts = {count for _, count in merged['shards']}
+    if len(shard_counts) > 1:
+        raise ValueError(f"Rapporten komen uit verschillende shard-indelingen: {sorted(shard_counts)}")
+    seen = [index for index, _ in merged['shards']]
+    merged['duplicate_shards'] = sorted({index + 1 for index in seen if seen.count(index) > 1})
+    merged['missing_shards'] = [index + 1 for count in shard_counts for index in range(count) if index not in seen]
+    return merged
 
+def initialize_firebase() -> bool:
+    """Initialiseert de Firebase app (één keer per proces); False als dat niet lukt."""
     if not SERVICE_ACCOUNT_KEY_PATH:
         print("❌ Fout: De omgevingsvariabele GOOGLE_APPLICATION_CREDENTIALS is niet ingesteld.")
         print("   Stel deze variabele in met het pad naar uw serviceAccountKey_artwall.json bestand.")
-        return
+        return False
     
     try:
         cred = credentials.Certificate(SERVICE_ACCOUNT_KEY_PATH)
@@ -367,258 +1560,642 @@ def sync_to_firebase(force_update: bool = False):
                 'storageBucket': STORAGE_BUCKET
             })
         print("✅ Firebase succesvol geïnitialiseerd")
+        return True
     except Exception as e:
         print(f"❌ Fout bij initialiseren Firebase: {e}")
-        return
+        return False
 
+def print_publish_results(stats: Dict[str, int], search_stats: Dict[str, int]) -> None:
+    print(f"  📦 Catalogus: {stats['uploaded']} geüpload, {stats['unchanged']} ongewijzigd, {stats['removed']} verwijderd")
+    print(f"  🔎 Zoekindex: {search_stats['documents']} kunstwerken verwerkt, {search_stats['uploaded']} geüpload, {search_stats['unchanged']} ongewijzigd, {search_stats['removed']} verwijderd")
 
-    print("\n🔍 Ophalen van bestaande data uit de database...")
-    # Use 'artwall' as root and medium as subfolder
-    artwall_ref = db.reference('artwall')
-    # Gather all existing items by medium
-    existing_artworks = {}
-    existing_keys = set()
-    for medium in VALID_MEDIUMS:
-        medium_ref = artwall_ref.child(medium)
-        medium_items = medium_ref.get() or {}
-        # Handle both dict and tuple return types from Firebase
-        if isinstance(medium_items, dict):
-            items = medium_items.items()
-        else:
-            items = medium_items if medium_items else []
-        for k, v in items:
-            existing_artworks[f"{medium}/{k}"] = v
-            existing_keys.add(f"{medium}/{k}")
-    print(f"ℹ️  {len(existing_keys)} bestaande items gevonden")
+def publish_static_files(root_ref, bucket, search_payloads: Optional[Dict[str, Dict[str, Any]]] = None, rebuild_search: bool = False, max_workers: int = UPLOAD_WORKERS) -> None:
+    """Publiceert de statische catalogus en werkt de zoekindex bij."""
+    catalog_stats = publish_catalog(root_ref.child('artwall'), bucket, max_workers=max_workers)
+    search_stats = publish_search_index(root_ref, bucket, search_payloads, rebuild=rebuild_search, max_workers=max_workers)
+    print_publish_results(catalog_stats, search_stats)
 
-    bucket = storage.bucket()
-    items_to_process: Dict[str, Dict[str, Any]] = {}
+class SyncState:
+    """
+    Gedeelde toestand van één sync_to_firebase() run: instellingen, het manifest, de caches
+    en de tellers voor het rapport. De stappen hieronder (scan_files, plan_artwork,
+    finish_artwork, write_artworks) lezen en vullen deze toestand.
+    """
+    def __init__(self, root_ref, bucket, existing_artworks: Dict[str, Dict[str, Any]], journal: SyncJournal, session_store: UploadSessionStore, parse_cache: Optional[HtmlParseCache] = None, force_update: bool = False, full_rewrite: bool = False, shard: Optional[Tuple[int, int]] = None, upload_workers: int = UPLOAD_WORKERS, derivative_pool: Optional[concurrent.futures.Executor] = None):
+        self.root_ref = root_ref
+        self.bucket = bucket
+        self.existing_artworks = existing_artworks
+        self.journal = journal
+        self.session_store = session_store
+        self.parse_cache = parse_cache
+        self.force_update = force_update
+        self.full_rewrite = full_rewrite
+        self.shard = shard
+        self.upload_workers = upload_workers
+        self.derivative_pool = derivative_pool
+        # Elk HTML bestand wordt één keer per run gelezen en geparsed, ook als
+        # meerdere mediabestanden (_01, _02, ...) ernaar verwijzen; ongewijzigde
+        # bestanden komen uit de parse-cache van de vorige run
+        self.parsed_html: Dict[pathlib.Path, Any] = {}
+        self.hashed_files: Set[pathlib.Path] = set()
+        self.scan_totals = {'html_files': 0, 'media_files': 0, 'items': 0}
+        self.database_operations = {'created': [], 'updated': [], 'skipped': [], 'failed': []}
+        self.storage_operations = {'uploaded': [], 'unchanged': [], 'derivatives': [], 'failed': []}
+        # Volledige kunstwerken die deze run geschreven zijn, voor de zoekindex
+        self.search_payloads: Dict[str, Dict[str, Any]] = {}
 
-    print(f"\n📁 Scannen van lokale bestanden en metadata...")
-    print(f"📂 Bron: {SOURCE_MEDIA_FOLDER}")
-    
-    total_html_files = 0
-    total_media_files = 0
-    
+    def get_file_md5(self, file_path: pathlib.Path) -> Optional[str]:
+        try:
+            stat = file_path.stat()
+            md5 = self.parse_cache.get_md5(file_path, stat) if self.parse_cache else None
+            if md5 is None:
+                md5 = compute_file_md5(file_path)
+                if self.parse_cache:
+                    self.parse_cache.put_md5(file_path, stat, md5)
+            self.hashed_files.add(file_path)
+            return md5
+        except OSError:
+            return None
+
+    def get_parsed_html(self, html_path: pathlib.Path) -> Dict[str, Any]:
+        if html_path not in self.parsed_html:
+            try:
+                stat = html_path.stat()
+                metadata = self.parse_cache.get(html_path, stat) if self.parse_cache else None
+                if metadata is None:
+                    metadata = parse_html_metadata(html_path.read_text('utf-8'))
+                    if self.parse_cache:
+                        self.parse_cache.put(html_path, stat, metadata)
+                self.parsed_html[html_path] = metadata
+            except Exception as e:
+                self.parsed_html[html_path] = e
+        result = self.parsed_html[html_path]
+        if isinstance(result, Exception):
+            raise result
+        return dict(result)
+
+    def close_parse_cache(self) -> None:
+        if self.parse_cache:
+            evicted = self.parse_cache.evict_except(set(self.parsed_html) | self.hashed_files)
+            print(f"\n🗄️  Parse-cache: {self.parse_cache.hits} uit cache, {self.parse_cache.misses} geparsed, {evicted} verwijderd")
+            self.parse_cache.close()
+
+    def record_derivative_results(self, results: Dict[str, Any]) -> None:
+        for blob_path, result in sorted(results.items()):
+            if isinstance(result, Exception):
+                print(f"  ❌ {blob_path} - {result}")
+                self.storage_operations['failed'].append(f"{blob_path}: {result}")
+            elif result:
+                self.storage_operations['derivatives'].append(blob_path)
+
+    def print_scan_results(self) -> None:
+        print(f"\n📊 Scan resultaten:")
+        print(f"  📄 Totaal HTML bestanden: {self.scan_totals['html_files']}")
+        print(f"  🎨 Totaal media bestanden: {self.scan_totals['media_files']}")
+        print(f"  🔗 Items om te verwerken: {self.scan_totals['items']}")
+
+def list_category_dirs(state: SyncState):
+    """Geeft per medium-map (alle bestanden, HTML bestanden per naam, HTML prefix-index), gefilterd op de shard."""
+    shard = state.shard
     for category_dir in SOURCE_MEDIA_FOLDER.iterdir():
         if not category_dir.is_dir():
             continue
-        
+
         category = category_dir.name
         print(f"\n  📁 {category}/")
-        
+
         all_files = list(category_dir.iterdir())
         html_files = {f.stem: f for f in all_files if f.suffix == '.html'}
+        html_index = build_html_prefix_index(html_files)
+        if shard is not None:
+            # Bestanden horen bij de shard van hun kunstwerk; media zonder HTML bij die van hun eigen naam
+            def file_shard(file_path: pathlib.Path) -> int:
+                html_key = file_path.stem if file_path.suffix == '.html' else find_matching_html(html_index, re.sub(r'_\d+$', '', file_path.stem))
+                return shard_of_key(get_base_key(html_key or file_path.stem), shard[1])
+            all_files = [f for f in all_files if file_shard(f) == shard[0]]
         media_files = [f for f in all_files if f.suffix != '.html']
-        
-        print(f"    📄 {len(html_files)} HTML bestanden")
+
+        print(f"    📄 {len(all_files) - len(media_files)} HTML bestanden")
         print(f"    🎨 {len(media_files)} media bestanden")
-        
-        total_html_files += len(html_files)
-        total_media_files += len(media_files)
 
-        for file_path in all_files:
-            if file_path.suffix == '.html':
-                # Verwerk HTML bestanden
+        state.scan_totals['html_files'] += len(all_files) - len(media_files)
+        state.scan_totals['media_files'] += len(media_files)
+        yield all_files, html_files, html_index
+
+def scan_files(state: SyncState, files: List[pathlib.Path], html_files: Dict[str, pathlib.Path], html_index, items_to_process: Dict[str, Dict[str, Any]]) -> None:
+    """Voegt de HTML en media bestanden uit `files` toe aan items_to_process, per HTML sleutel."""
+    for file_path in files:
+        if file_path.suffix == '.html':
+            # Verwerk HTML bestanden
+            try:
+                metadata = state.get_parsed_html(file_path)
+
+                if not metadata.get('title'):
+                    metadata = parse_metadata_from_filename(file_path.name)
+
+                if metadata.get('title'):
+                    # Use HTML filename (without extension) as key
+                    html_key = file_path.stem
+
+                    if html_key not in items_to_process:
+                        items_to_process[html_key] = {'metadata': metadata, 'files': []}
+
+                    items_to_process[html_key]['files'].append(file_path)
+                    # Store last modification time
+                    items_to_process[html_key]['last_modified'] = int(file_path.stat().st_mtime * 1000)
+
+            except Exception as e:
+                print(f"    ⚠️ Kon HTML niet lezen: {file_path.name} - {e}")
+
+        else:
+            # Verwerk media bestanden (zoek naar bijbehorend HTML bestand)
+            base_name = file_path.stem
+            # Verwijder versie nummer (_01, _02, etc.) voor matching
+            base_name_clean = re.sub(r'_\d+$', '', base_name)
+
+            # Zoek naar bijbehorend HTML bestand
+            matching_name = find_matching_html(html_index, base_name_clean)
+            matching_html = html_files[matching_name] if matching_name is not None else None
+
+            if matching_html:
                 try:
-                    html_content = file_path.read_text('utf-8')
-                    metadata = parse_html_metadata(html_content)
-                    
-                    if not metadata.get('title'):
-                        metadata = parse_metadata_from_filename(file_path.name)
-                    
+                    metadata = state.get_parsed_html(matching_html)
+
                     if metadata.get('title'):
                         # Use HTML filename (without extension) as key
-                        html_key = file_path.stem
-                        
+                        html_key = matching_html.stem
+
                         if html_key not in items_to_process:
                             items_to_process[html_key] = {'metadata': metadata, 'files': []}
-                        
+
                         items_to_process[html_key]['files'].append(file_path)
-                        # Store last modification time
-                        items_to_process[html_key]['last_modified'] = int(file_path.stat().st_mtime * 1000)
-                        
+                        # Update last modification time if media file is newer
+                        media_modified = int(file_path.stat().st_mtime * 1000)
+                        if 'last_modified' not in items_to_process[html_key] or media_modified > items_to_process[html_key]['last_modified']:
+                            items_to_process[html_key]['last_modified'] = media_modified
+
                 except Exception as e:
-                    print(f"    ⚠️ Kon HTML niet lezen: {file_path.name} - {e}")
-                    
+                    print(f"    ⚠️ Kon bijbehorend HTML niet lezen voor {file_path.name}: {e}")
+
+def plan_artwork(state: SyncState, base_key: str, grouped_item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Bepaalt of een gecombineerd kunstwerk geschreven moet worden; None als het ongewijzigd is."""
+    metadata = grouped_item['metadata']
+    title = metadata['title']
+    local_modified = grouped_item.get('last_modified', 0)
+    database_operations = state.database_operations
+
+    # Show which languages are being combined
+    available_languages = list(grouped_item['languages'].keys())
+    lang_display = f"({', '.join(available_languages)})"
+
+    medium = metadata.get('medium', 'other')
+    db_key = f"{medium}/{base_key}"
+
+    # Use medium for storage path
+    medium_folder = medium if medium in VALID_MEDIUMS else 'other'
+    media_uploads = [
+        (f"{medium_folder}/{file_path.name}", file_path)
+        for file_path in grouped_item['files'] if file_path.suffix != '.html'
+    ]
+    artwork_payload = create_combined_artwork(base_key, grouped_item)
+    media_hashes = {blob_path: state.get_file_md5(file_path) for blob_path, file_path in media_uploads}
+    content_hash = compute_content_hash(artwork_payload, media_hashes)
+
+    if db_key in state.existing_artworks and not state.force_update:
+        existing_item = state.existing_artworks[db_key]
+        remote_hash = existing_item.get('hash')
+        if remote_hash is not None:
+            # De inhoudshash is leidend; mtimes worden dan niet vergeleken
+            has_changes = remote_hash != content_hash
+        else:
+            has_changes = local_modified > existing_item.get('modified', 0)
+        if not has_changes and not existing_item.get('split'):
+            # Record van voor de opsplitsing: teksten nog naar artwall_content verplaatsen
+            print(f"📦 {title} {lang_display} - Teksten verplaatsen naar artwall_content...")
+            has_changes = True
+        elif not has_changes and existing_item.get('card') != CARD_FORMAT_VERSION:
+            # Kaart van voor de huidige CARD_FORMAT_VERSION (bijvoorbeeld zonder 'excerpt')
+            print(f"🃏 {title} {lang_display} - Kaart bijwerken...")
+            has_changes = True
+        if has_changes and state.journal.completed_write(db_key, content_hash):
+            print(f"⏭️  {title} {lang_display} - Al geschreven in de onderbroken run")
+            database_operations['skipped'].append(f"{title} {lang_display}")
+            return None
+        if has_changes:
+            print(f"🔄 {title} {lang_display} - Inhoud gewijzigd, bijwerken...")
+            needs_update = True
+        else:
+            print(f"⏭️  {title} {lang_display} - Geen wijzigingen gedetecteerd")
+            database_operations['skipped'].append(f"{title} {lang_display}")
+            return None
+    elif state.journal.completed_write(db_key, content_hash):
+        print(f"⏭️  {title} {lang_display} - Al geschreven in de onderbroken run")
+        database_operations['skipped'].append(f"{title} {lang_display}")
+        return None
+    else:
+        if db_key in state.existing_artworks:
+            print(f"🔄 {title} {lang_display} - FORCE UPDATE actief, overschrijven...")
+            needs_update = True
+        else:
+            print(f"🆕 {title} {lang_display} - Nieuw gecombineerd item aanmaken...")
+            needs_update = False
+
+    return {
+        'base_key': base_key,
+        'title': title,
+        'lang_display': lang_display,
+        'medium': medium,
+        'needs_update': needs_update,
+        'local_modified': local_modified,
+        'payload': artwork_payload,
+        'media_uploads': media_uploads,
+        'media_hashes': media_hashes,
+        'content_hash': content_hash,
+    }
+
+def finish_artwork(state: SyncState, artwork: Dict[str, Any], upload_results: Dict[str, Any], unchanged_uploads: Set[str]) -> None:
+    """Zet de media URLs van de geslaagde uploads in het kunstwerk en registreert de uploads."""
+    storage_operations = state.storage_operations
+    # Media URLs in de oorspronkelijke bestandsvolgorde, alleen geslaagde uploads
+    media_urls = []
+    artwork['complete'] = True
+    for blob_path, _ in artwork['media_uploads']:
+        result = upload_results[blob_path]
+        if isinstance(result, Exception):
+            storage_operations['failed'].append(f"{blob_path}: {result}")
+            artwork['complete'] = False
+        else:
+            media_urls.append(result)
+            if blob_path in unchanged_uploads:
+                storage_operations['unchanged'].append(blob_path)
             else:
-                # Verwerk media bestanden (zoek naar bijbehorend HTML bestand)
-                base_name = file_path.stem
-                # Verwijder versie nummer (_01, _02, etc.) voor matching
-                base_name_clean = re.sub(r'_\d+$', '', base_name)
-                
-                # Zoek naar bijbehorend HTML bestand
-                matching_html = None
-                for html_name, html_path in html_files.items():
-                    if html_name.startswith(base_name_clean):
-                        matching_html = html_path
-                        break
-                
-                if matching_html:
-                    try:
-                        html_content = matching_html.read_text('utf-8')
-                        metadata = parse_html_metadata(html_content)
-                        
-                        if metadata.get('title'):
-                            # Use HTML filename (without extension) as key
-                            html_key = matching_html.stem
-                            
-                            if html_key not in items_to_process:
-                                items_to_process[html_key] = {'metadata': metadata, 'files': []}
-                            
-                            items_to_process[html_key]['files'].append(file_path)
-                            # Update last modification time if media file is newer
-                            media_modified = int(file_path.stat().st_mtime * 1000)
-                            if 'last_modified' not in items_to_process[html_key] or media_modified > items_to_process[html_key]['last_modified']:
-                                items_to_process[html_key]['last_modified'] = media_modified
-                            
-                    except Exception as e:
-                        print(f"    ⚠️ Kon bijbehorend HTML niet lezen voor {file_path.name}: {e}")
+                storage_operations['uploaded'].append(blob_path)
 
-    print(f"\n📊 Scan resultaten:")
-    print(f"  📄 Totaal HTML bestanden: {total_html_files}")
-    print(f"  🎨 Totaal media bestanden: {total_media_files}")
-    print(f"  🔗 Items om te verwerken: {len(items_to_process)}")
+    artwork_payload = normalize_artwork_payload(artwork['payload'], media_urls, artwork['base_key'])
+    artwork_payload['recordCreationDate'] = artwork['local_modified']
+    if artwork['complete']:
+        # Zonder alle media is het kunstwerk niet af; zonder inhoudshash plant de volgende run het opnieuw
+        artwork_payload['contentHash'] = artwork['content_hash']
+    artwork['payload'] = artwork_payload
+
+def write_artworks(state: SyncState, artworks: List[Dict[str, Any]]) -> None:
+    """Schrijft kaarten, teksten, manifest- en indexwijzigingen van `artworks` in batches."""
+    database_operations = state.database_operations
+    # Save the card to artwall/{medium}/{base_key}, the texts to artwall_content/{medium}/{base_key}
+    # and the manifest entry, in batches
+    write_entries = []
+    for artwork in artworks:
+        db_key = f"{artwork['medium']}/{artwork['base_key']}"
+        card, content = split_artwork_record(artwork['payload'])
+        card_hashes = hash_payload_fields(card)
+        content_hashes = hash_payload_fields(content)
+        field_hashes = {**card_hashes, **content_hashes}
+        remote_entry = state.existing_artworks.get(db_key) or {}
+        remote_fields = remote_entry.get('fields')
+        if artwork['needs_update'] and remote_fields and remote_entry.get('split') and not (state.full_rewrite or state.force_update):
+            # Alleen de velden waarvan de hash afwijkt van het manifest
+            old_card_hashes, old_content_hashes = split_artwork_record(remote_fields, with_excerpt=False)
+            updates = build_field_updates(f"artwall/{db_key}", card, old_card_hashes, card_hashes)
+            updates.update(build_field_updates(f"artwall_content/{db_key}", content, old_content_hashes, content_hashes))
+            print(f"  ✏️ {artwork['title']} {artwork['lang_display']} - {len(updates)} gewijzigde velden")
+        else:
+            updates = {f"artwall/{db_key}": card, f"artwall_content/{db_key}": content or None}
+        index_values = artwork_index_values(card)
+        index_updates, artwork['index_deltas'] = build_index_updates(db_key, remote_entry.get('index', {}) if remote_entry else None, index_values)
+        updates.update(index_updates)
+        # Zoekindex bijwerken bij de volgende publicatie (zie publish_search_index)
+        updates[f"{INDEX_PATH}/search_pending/{db_key}"] = True
+        updates[f"artwall_manifest/{db_key}"] = {
+            'modified': artwork['payload']['recordCreationDate'],
+            'hash': artwork['content_hash'] if artwork['complete'] else INCOMPLETE_CONTENT_HASH,
+            'fields': field_hashes,
+            'split': True,
+            'card': CARD_FORMAT_VERSION,
+            'index': index_values,
+        }
+        write_entries.append((db_key, updates))
+    write_results = write_in_batches(state.root_ref, write_entries)
+    count_deltas = collections.Counter()
+    for artwork in artworks:
+        label = f"{artwork['title']} {artwork['lang_display']}"
+        error = write_results[f"{artwork['medium']}/{artwork['base_key']}"]
+        if error is not None:
+            print(f"  ❌ {label} - Database operatie mislukt: {error}")
+            database_operations['failed'].append(f"{label}: {error}")
+            continue
+        count_deltas.update(artwork['index_deltas'])
+        state.search_payloads[f"{artwork['medium']}/{artwork['base_key']}"] = artwork['payload']
+        if artwork['complete']:
+            state.journal.record_write(f"{artwork['medium']}/{artwork['base_key']}", artwork['content_hash'])
+        if artwork['needs_update']:
+            database_operations['updated'].append(label)
+        else:
+            database_operations['created'].append(label)
+    # Tellers van alle geslaagde writes samen, als server-side increments zodat
+    # parallelle shards elkaars tellingen niet overschrijven
+    count_updates = {f"{INDEX_PATH}/{path}": {'.sv': {'increment': delta}} for path, delta in count_deltas.items() if delta}
+    if count_updates:
+        try:
+            state.root_ref.update(count_updates)
+        except Exception as e:
+            print(f"  ⚠️ Index-tellers niet bijgewerkt ({e}); herstel met --rebuild-index")
+
+def sync_artworks(state: SyncState) -> None:
+    """
+    Sequentiële sync: eerst alles scannen en per kunstwerk bepalen wat er moet gebeuren,
+    dan alle media in één parallelle upload-stap versturen en pas dan de database bijwerken.
+    """
+    items_to_process: Dict[str, Dict[str, Any]] = {}
+    for all_files, html_files, html_index in list_category_dirs(state):
+        scan_files(state, all_files, html_files, html_index, items_to_process)
+    state.scan_totals['items'] = len(items_to_process)
+    state.print_scan_results()
 
     # **🔥 HERE'S THE KEY CHANGE: Group items by base key to combine languages**
     print(f"\n🔄 Groeperen van taalversies...")
     grouped_items = group_artworks_by_base_key(items_to_process)
     print(f"📊 {len(items_to_process)} individuele items gecombineerd tot {len(grouped_items)} unieke kunstwerken")
 
-    # Tracking variables
-    database_operations = {
-        'created': [],
-        'updated': [],
-        'skipped': [],
-        'failed': []
-    }
-    
-    storage_operations = {
-        'uploaded': [],
-        'failed': []
-    }
-
     print(f"\n🔄 Verwerken van gecombineerde items...")
     print("=" * 50)
-    
+
+    artworks_to_write = []
+
     # **🔥 PROCESS GROUPED ITEMS INSTEAD OF INDIVIDUAL ITEMS**
     for base_key, grouped_item in grouped_items.items():
-        primary_lang = grouped_item['primary_language']
-        metadata = grouped_item['metadata']
-        title = metadata['title']
-        local_modified = grouped_item.get('last_modified', 0)
-
-        # Show which languages are being combined
-        available_languages = list(grouped_item['languages'].keys())
-        lang_display = f"({', '.join(available_languages)})"
-
-        medium = metadata.get('medium', 'other')
-        db_key = f"{medium}/{base_key}"
-
-        if db_key in existing_keys and not force_update:
-            existing_item = existing_artworks[db_key]
-            firebase_modified = existing_item.get('recordCreationDate', 0)
-            if local_modified > firebase_modified:
-                print(f"🔄 {title} {lang_display} - Lokale bestanden zijn nieuwer, bijwerken...")
-                needs_update = True
-            else:
-                print(f"⏭️  {title} {lang_display} - Geen wijzigingen gedetecteerd")
-                database_operations['skipped'].append(f"{title} {lang_display}")
-                continue
-        else:
-            if db_key in existing_keys:
-                print(f"🔄 {title} {lang_display} - FORCE UPDATE actief, overschrijven...")
-                needs_update = True
-            else:
-                print(f"🆕 {title} {lang_display} - Nieuw gecombineerd item aanmaken...")
-                needs_update = False
+        artwork = plan_artwork(state, base_key, grouped_item)
+        if artwork is not None:
+            artworks_to_write.append(artwork)
 
-        artwork_payload = create_combined_artwork(base_key, grouped_item)
-        media_urls = []
+    state.close_parse_cache()
 
-        for file_path in grouped_item['files']:
-            if file_path.suffix == '.html':
-                continue
+    all_uploads = list(dict.fromkeys(upload for artwork in artworks_to_write for upload in artwork['media_uploads']))
+    remote_hashes = {}
+    if all_uploads:
+        # Eén list_blobs per medium-map in plaats van een metadata-aanvraag per bestand
+        prefixes = sorted({blob_path.split('/', 1)[0] + '/' for blob_path, _ in all_uploads})
+        remote_hashes = fetch_remote_md5_hashes(state.bucket, prefixes)
+        print(f"\n☁️  Uploaden van {len(all_uploads)} media bestanden ({state.upload_workers} tegelijk, ongewijzigde worden overgeslagen)...")
+    local_hashes = {blob_path: md5 for artwork in artworks_to_write for blob_path, md5 in artwork['media_hashes'].items()}
+    upload_results, unchanged_uploads = upload_media_files(state.bucket, all_uploads, max_workers=state.upload_workers, remote_hashes=remote_hashes, local_hashes=local_hashes, journal=state.journal, session_store=state.session_store)
 
-            # Use medium for storage path (moved outside try block)
-            medium_folder = medium if medium in VALID_MEDIUMS else 'other'
-            
+    if state.derivative_pool is not None:
+        derivative_sources = list(dict.fromkeys(
+            (blob_path, file_path, artwork['media_hashes'].get(blob_path))
+            for artwork in artworks_to_write for blob_path, file_path in artwork['media_uploads']
+            if is_derivative_source(blob_path)
+        ))
+        if derivative_sources:
+            print(f"\n🖼️  Afgeleide afbeeldingen van {len(derivative_sources)} afbeeldingen ({DERIVATIVE_WORKERS} processen)...")
+            state.record_derivative_results(upload_image_derivatives(state.bucket, derivative_sources, remote_hashes, state.derivative_pool, max_workers=state.upload_workers))
+
+    for artwork in artworks_to_write:
+        finish_artwork(state, artwork, upload_results, unchanged_uploads)
+
+    print(f"\n💾 Bijwerken van de database...")
+    write_artworks(state, artworks_to_write)
+
+def sync_artworks_pipelined(state: SyncState) -> None:
+    """
+    Pipeline sync (--pipeline): scannen en parsen lopen in een eigen thread en vullen een
+    begrensde queue; uploads en database-writes starten zodra het eerste kunstwerk klaar is.
+    Per medium-map worden de bestanden per basissleutel gegroepeerd, zodat elk kunstwerk los
+    gepland kan worden. Kunstwerken, afgeleide afbeeldingen en write-batches blijven begrensd
+    door PIPELINE_QUEUE_DEPTH en DB_BATCH_MAX_ITEMS, ook bij een grote bronmap.
+    """
+    artwork_queue = queue.Queue(maxsize=PIPELINE_QUEUE_DEPTH)
+    producer_errors = []
+
+    def produce_artworks() -> None:
+        try:
+            for all_files, html_files, html_index in list_category_dirs(state):
+                # Bestanden per basissleutel (alle taalversies plus hun media), zodat
+                # elk kunstwerk los kan worden gegroepeerd zonder de hele map te parsen
+                files_per_base_key: Dict[str, List[pathlib.Path]] = {}
+                for file_path in all_files:
+                    if file_path.suffix == '.html':
+                        html_key = file_path.stem
+                    else:
+                        html_key = find_matching_html(html_index, re.sub(r'_\d+$', '', file_path.stem))
+                        if html_key is None:
+                            continue
+                    files_per_base_key.setdefault(get_base_key(html_key), []).append(file_path)
+                for files in files_per_base_key.values():
+                    items_to_process: Dict[str, Dict[str, Any]] = {}
+                    scan_files(state, files, html_files, html_index, items_to_process)
+                    state.scan_totals['items'] += len(items_to_process)
+                    for base_key, grouped_item in group_artworks_by_base_key(items_to_process).items():
+                        artwork = plan_artwork(state, base_key, grouped_item)
+                        if artwork is not None:
+                            artwork_queue.put(artwork)
+        except Exception as e:
+            producer_errors.append(e)
+        finally:
+            artwork_queue.put(None)
+
+    producer = threading.Thread(target=produce_artworks, name='artwall-scan', daemon=True)
+    producer.start()
+
+    remote_hashes = {}
+    fetched_prefixes = set()
+    in_flight = collections.deque()
+    derivative_futures = collections.deque()
+    write_buffer = []
+
+    def complete_oldest() -> None:
+        artwork, futures = in_flight.popleft()
+        upload_results = {}
+        unchanged_uploads = set()
+        for blob_path, future in futures:
             try:
-                # Check if it's an image that should be resized
-                is_image = file_path.suffix.lower() in ['.jpg', '.jpeg', '.png', '.webp', '.gif']
-                
-                # Upload original file
-                blob = bucket.blob(f"{medium_folder}/{file_path.name}")
-                blob.upload_from_filename(str(file_path))
-                blob.make_public()
-                media_urls.append(blob.public_url)
-                print(f"  ☁️ {medium_folder}/{file_path.name}")
-                storage_operations['uploaded'].append(f"{medium_folder}/{file_path.name}")
-                
+                upload_results[blob_path], uploaded = future.result()
+                if uploaded:
+                    print(f"  ☁️ {blob_path}")
+                else:
+                    unchanged_uploads.add(blob_path)
             except Exception as e:
-                print(f"  ❌ {medium_folder}/{file_path.name} - {e}")
-                storage_operations['failed'].append(f"{medium_folder}/{file_path.name}: {e}")
-
-        artwork_payload = normalize_artwork_payload(artwork_payload, media_urls, base_key)
-        artwork_payload['recordCreationDate'] = local_modified
+                upload_results[blob_path] = e
+                print(f"  ❌ {blob_path} - {e}")
+        finish_artwork(state, artwork, upload_results, unchanged_uploads)
+        write_buffer.append(artwork)
+        if len(write_buffer) >= DB_BATCH_MAX_ITEMS:
+            write_artworks(state, write_buffer)
+            write_buffer.clear()
 
-        # Save to Firebase under artwall/{medium}/{base_key}
+    def complete_derivatives() -> None:
+        blob_path, future = derivative_futures.popleft()
         try:
-            artwall_ref.child(medium).child(base_key).set(artwork_payload)
-            if needs_update:
-                print(f"  ✅ Database bijgewerkt")
-                database_operations['updated'].append(f"{title} {lang_display}")
-            else:
-                print(f"  ✅ Database entry aangemaakt")
-                database_operations['created'].append(f"{title} {lang_display}")
+            state.record_derivative_results(future.result())
         except Exception as e:
-            print(f"  ❌ Database operatie mislukt: {e}")
-            database_operations['failed'].append(f"{title} {lang_display}: {e}")
+            state.record_derivative_results({blob_path: e})
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, state.upload_workers)) as executor:
+        while True:
+            artwork = artwork_queue.get()
+            if artwork is None:
+                break
+            prefixes = {blob_path.split('/', 1)[0] + '/' for blob_path, _ in artwork['media_uploads']} - fetched_prefixes
+            if prefixes:
+                remote_hashes.update(fetch_remote_md5_hashes(state.bucket, sorted(prefixes)))
+                fetched_prefixes |= prefixes
+            futures = [
+                (blob_path, executor.submit(upload_file_if_changed, state.bucket, blob_path, file_path, remote_hashes.get(blob_path), UPLOAD_MAX_RETRIES, UPLOAD_RETRY_BACKOFF, artwork['media_hashes'].get(blob_path), state.journal, state.session_store))
+                for blob_path, file_path in artwork['media_uploads']
+            ]
+            in_flight.append((artwork, futures))
+            if state.derivative_pool is not None:
+                derivative_futures.extend(
+                    (blob_path, executor.submit(upload_source_derivatives, state.bucket, blob_path, file_path, artwork['media_hashes'].get(blob_path), remote_hashes, state.derivative_pool))
+                    for blob_path, file_path in artwork['media_uploads'] if is_derivative_source(blob_path)
+                )
+            # Afgeronde kunstwerken en afgeleide afbeeldingen in volgorde doorzetten;
+            # nooit meer dan de queue-diepte in de lucht
+            while in_flight and (len(in_flight) > PIPELINE_QUEUE_DEPTH or all(future.done() for _, future in in_flight[0][1])):
+                complete_oldest()
+            while derivative_futures and (len(derivative_futures) > PIPELINE_QUEUE_DEPTH or derivative_futures[0][1].done()):
+                complete_derivatives()
+        while in_flight:
+            complete_oldest()
+        while derivative_futures:
+            complete_derivatives()
+    if write_buffer:
+        write_artworks(state, write_buffer)
+    producer.join()
+    state.close_parse_cache()
+    state.print_scan_results()
+    if producer_errors:
+        raise producer_errors[0]
+
+def sync_to_firebase(force_update: bool = False, upload_workers: int = UPLOAD_WORKERS, use_cache: bool = True, full_rewrite: bool = False, pipeline: bool = False, resume: bool = False, shard: Optional[Tuple[int, int]] = None, report_path: Optional[pathlib.Path] = None, rebuild_index: bool = False, publish: Optional[bool] = None, derivatives: bool = True):
+    """
+    Scant de lokale media map, leest metadata uit .html bestanden,
+    vergelijkt met Firebase, en uploadt/update nieuwe of gewijzigde items.
+    Van gewijzigde items worden alleen de gewijzigde velden verstuurd.
+    
+    :param force_update: Als True, overschrijft alle bestaande items (volledig)
+    :param full_rewrite: Als True, worden gewijzigde items volledig herschreven in plaats van per veld
+    :param pipeline: Als True, overlappen scannen/parsen en uploaden/schrijven via een begrensde queue
+    :param resume: Als True, wordt werk uit het journal van een onderbroken run (SYNC_JOURNAL_PATH) overgeslagen
+    :param upload_workers: Aantal gelijktijdige uploads naar Storage
+    :param use_cache: Als False, worden alle HTML bestanden opnieuw geparsed (PARSE_CACHE_PATH wordt genegeerd)
+    :param shard: (index, aantal) om alleen de kunstwerken te synchroniseren waarvan shard_of_key(basissleutel)
+                  gelijk is aan index; zo kunnen meerdere processen of machines elk een eigen deel doen
+    :param report_path: Als gegeven, wordt de samenvatting als JSON weggeschreven (zie merge_sync_reports)
+    :param rebuild_index: Als True, worden artwall_index en de zoekindex volledig opnieuw opgebouwd;
+                          gebeurt ook automatisch als een index ontbreekt of een oude versie heeft
+    :param publish: True/False om de statische catalogus (zie publish_catalog) wel/niet te publiceren;
+                    None publiceert alleen als er iets geschreven is en er niet per shard gewerkt wordt
+    :param derivatives: Als True (en Pillow is geïnstalleerd), worden de DERIVATIVE_SIZES varianten van
+                        geüploade afbeeldingen lokaal gemaakt en meteen publiek met CACHE_CONTROL geüpload
+    """
+    print("\n🚀 Firebase Synchronisatie Gestart")
+    if force_update:
+        print("🔄 FORCE UPDATE MODE - Alle bestanden worden overschreven")
+    elif full_rewrite:
+        print("📝 FULL MODE - Gewijzigde items worden volledig herschreven")
+    if shard is not None:
+        print(f"🧩 SHARD {shard[0] + 1}/{shard[1]} - Alleen kunstwerken uit deze shard")
+    print("=" * 50)
+
+    if not initialize_firebase():
+        return
+
+    print("\n🔍 Ophalen van bestaande data uit de database...")
+    # Use 'artwall' as root and medium as subfolder; writes go through the root
+    # so the record and its artwall_manifest entry are updated together
+    root_ref = db.reference('/')
+    artwall_ref = db.reference('artwall')
+    # Only the manifest is read for change detection, not the full records
+    existing_artworks = fetch_remote_manifest(root_ref)
+    manifest_completed = 0
+    if not root_ref.child(MANIFEST_MIGRATED_PATH).get():
+        if not existing_artworks and not artwall_ref.get(shallow=True):
+            root_ref.child(MANIFEST_MIGRATED_PATH).set(True)  # Lege database: niets te migreren
+        elif shard is not None:
+            # Een shard kent alleen zijn eigen deel; een half gemigreerd manifest zou de
+            # kunstwerken van andere shards als nieuw laten tellen in artwall_index
+            print("❌ artwall_manifest is nog niet volledig opgebouwd uit de bestaande records.")
+            print("   Draai de sync eerst één keer zonder --shard; daarna kunnen de shards parallel draaien.")
+            return
+        else:
+            print("ℹ️  artwall_manifest aanvullen uit de bestaande records (eenmalig)...")
+            try:
+                manifest_completed = complete_manifest_from_records(root_ref, artwall_ref, existing_artworks)
+            except Exception as e:
+                print(f"❌ artwall_manifest aanvullen mislukt, probeer het opnieuw: {e}")
+                return
+    print(f"ℹ️  {len(existing_artworks)} bestaande items gevonden")
+    if rebuild_index or manifest_completed or root_ref.child(f"{INDEX_PATH}/version").get() != INDEX_VERSION:
+        print("🗂️  artwall_index opnieuw opbouwen uit de bestaande kaarten...")
+        rebuild_artwork_index(root_ref, artwall_ref, existing_artworks)
+
+    bucket = storage.bucket()
+    journal = SyncJournal(shard_path(SYNC_JOURNAL_PATH, shard), resume=resume)
+    session_store = UploadSessionStore(shard_path(UPLOAD_SESSIONS_PATH, shard))
+    if resume:
+        print(f"⏯️  Hervatten: {len(journal.uploads)} uploads en {len(journal.writes)} database-writes uit het journal worden overgeslagen")
+
+    print(f"\n📁 Scannen van lokale bestanden en metadata...")
+    print(f"📂 Bron: {SOURCE_MEDIA_FOLDER}")
+
+    parse_cache = None
+    if use_cache:
+        try:
+            parse_cache = HtmlParseCache(shard_path(PARSE_CACHE_PATH, shard))
+        except sqlite3.Error as e:
+            print(f"⚠️ Parse-cache niet beschikbaar, alles wordt geparsed: {e}")
+
+    derivative_pool = None
+    if derivatives:
+        if Image is None:
+            print("ℹ️  Pillow niet geïnstalleerd: geen lokale afgeleide afbeeldingen (pip install Pillow)")
+        else:
+            derivative_pool = concurrent.futures.ProcessPoolExecutor(max_workers=DERIVATIVE_WORKERS)
+
+    state = SyncState(root_ref, bucket, existing_artworks, journal, session_store, parse_cache=parse_cache, force_update=force_update, full_rewrite=full_rewrite, shard=shard, upload_workers=upload_workers, derivative_pool=derivative_pool)
+    try:
+        if pipeline:
+            sync_artworks_pipelined(state)
+        else:
+            sync_artworks(state)
+    finally:
+        if derivative_pool is not None:
+            derivative_pool.shutdown()
+    database_operations = state.database_operations
+    storage_operations = state.storage_operations
 
-        print()
+    if publish is None:
+        publish = shard is None and bool(database_operations['created'] or database_operations['updated'])
+        if shard is not None:
+            print(f"\nℹ️  Catalogus niet gepubliceerd in shard-modus; draai --publish-only als alle shards klaar zijn")
+    if publish:
+        print(f"\n📦 Publiceren van de statische catalogus en zoekindex...")
+        try:
+            publish_static_files(root_ref, bucket, state.search_payloads, rebuild_search=rebuild_index, max_workers=upload_workers)
+        except Exception as e:
+            print(f"  ❌ Catalogus publiceren mislukt: {e}")
+            storage_operations['failed'].append(f"{CATALOG_MANIFEST_PATH}: {e}")
+    print()
 
     # Summary report
     print("🎉 Synchronisatie voltooid!")
     print("=" * 50)
-    
-    print(f"\n📊 DATABASE OPERATIES:")
-    print(f"  ✅ Nieuw aangemaakt: {len(database_operations['created'])}")
-    for item in database_operations['created']:
-        print(f"    • {item}")
-    
-    print(f"  🔄 Bijgewerkt: {len(database_operations['updated'])}")
-    for item in database_operations['updated']:
-        print(f"    • {item}")
-    
-    print(f"  ⏭️  Overgeslagen: {len(database_operations['skipped'])}")
-    for item in database_operations['skipped']:
-        print(f"    • {item}")
-    
-    if database_operations['failed']:
-        print(f"  ❌ Mislukt: {len(database_operations['failed'])}")
-        for item in database_operations['failed']:
-            print(f"    • {item}")
-    
-    print(f"\n☁️  STORAGE OPERATIES:")
-    print(f"  ✅ Geüpload: {len(storage_operations['uploaded'])}")
-    for item in storage_operations['uploaded']:
-        print(f"    • {item}")
-    
-    if storage_operations['failed']:
-        print(f"  ❌ Mislukt: {len(storage_operations['failed'])}")
-        for item in storage_operations['failed']:
-            print(f"    • {item}")
-    
-    print(f"\n🏁 TOTAAL OVERZICHT:")
-    print(f"  📄 HTML bestanden verwerkt: {total_html_files}")
-    print(f"  🎨 Media bestanden verwerkt: {total_media_files}")
-    print(f"  🗃️  Database items: {len(database_operations['created']) + len(database_operations['updated'])} actief")
-    print(f"  ☁️  Storage bestanden: {len(storage_operations['uploaded'])} geüpload")
-    
+    report = {
+        'shard': list(shard) if shard is not None else None,
+        'database': database_operations,
+        'storage': storage_operations,
+        'scan': state.scan_totals,
+    }
+    print_sync_summary(report)
+    if report_path is not None:
+        report_path.write_text(json.dumps(report, ensure_ascii=False, indent=1), 'utf-8')
+        print(f"  📝 Rapport opgeslagen in {report_path}")
+
     if database_operations['failed'] or storage_operations['failed']:
-        print(f"  ⚠️  Fouten: {len(database_operations['failed']) + len(storage_operations['failed'])}")
+        print(f"  ⏯️  Gebruik --resume om afgerond werk over te slaan bij de volgende run")
+        journal.close()
     else:
-        print(f"  🎯 Geen fouten!")
+        journal.close(discard=True)
 
 # In your sync function, modify the artwork creation
 def create_combined_artwork(base_key: str, grouped_item: Dict[str, Any]) -> Dict[str, Any]:
@@ -677,8 +2254,51 @@ if __name__ == "__main__":
     
     # Check for command line arguments
     force_update = '--force' in sys.argv or '-f' in sys.argv
+    upload_workers = UPLOAD_WORKERS
+    if '--upload-workers' in sys.argv:
+        upload_workers = int(sys.argv[sys.argv.index('--upload-workers') + 1])
+    use_cache = '--no-cache' not in sys.argv
+    full_rewrite = '--full' in sys.argv
+    pipeline = '--pipeline' in sys.argv
+    resume = '--resume' in sys.argv
+    rebuild_index = '--rebuild-index' in sys.argv
+    publish = True if '--publish' in sys.argv else False if '--no-publish' in sys.argv else None
+    derivatives = '--no-derivatives' not in sys.argv
+    shard = None
+    if '--shard' in sys.argv:
+        shard = parse_shard_spec(sys.argv[sys.argv.index('--shard') + 1])
+    report_path = None
+    if '--report' in sys.argv:
+        report_path = pathlib.Path(sys.argv[sys.argv.index('--report') + 1])
+    elif shard is not None:
+        report_path = shard_path(SYNC_REPORT_PATH, shard)
+
+    if '--publish-only' in sys.argv:
+        # Alleen de statische catalogus opnieuw publiceren, bv. nadat alle shards klaar zijn
+        print("\n📦 Publiceren van de statische catalogus en zoekindex...")
+        if not initialize_firebase():
+            sys.exit(1)
+        publish_static_files(db.reference('/'), storage.bucket(), rebuild_search=rebuild_index, max_workers=upload_workers)
+        sys.exit(0)
+
+    if '--merge-reports' in sys.argv:
+        # Samenvoegen van shard-rapporten; er wordt niets gesynchroniseerd
+        report_files = [pathlib.Path(arg) for arg in sys.argv[sys.argv.index('--merge-reports') + 1:]]
+        if not report_files:
+            report_files = sorted(SYNC_REPORT_PATH.parent.glob(f"{SYNC_REPORT_PATH.stem}.shard*{SYNC_REPORT_PATH.suffix}"))
+        merged = merge_sync_reports([json.loads(path.read_text('utf-8')) for path in report_files])
+        print(f"🧩 {len(report_files)} shard-rapporten samengevoegd")
+        print("=" * 50)
+        print_sync_summary(merged)
+        if merged['missing_shards']:
+            print(f"  ⚠️  Ontbrekende shards: {', '.join(map(str, merged['missing_shards']))}")
+        if merged['duplicate_shards']:
+            print(f"  ⚠️  Dubbele shards: {', '.join(map(str, merged['duplicate_shards']))}")
+        sys.exit(1 if merged['missing_shards'] or merged['database']['failed'] or merged['storage']['failed'] else 0)
     
     if force_update:
         print("⚠️  FORCE UPDATE mode geactiveerd via command line argument")
+    if not use_cache:
+        print("⚠️  Parse-cache uitgeschakeld via --no-cache")
     
-    sync_to_firebase(force_update=force_update)
+    sync_to_firebase(force_update=force_update, upload_workers=upload_workers, use_cache=use_cache, full_rewrite=full_rewrite, pipeline=pipeline, resume=resume, shard=shard, report_path=report_path, rebuild_index=rebuild_index, publish=publish, derivatives=derivatives)
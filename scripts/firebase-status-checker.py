@@ -1,6 +1,7 @@
 import os
 import pathlib
 import re
+import sys
 from collections import defaultdict
 from firebase_admin import credentials, initialize_app, db, storage
 import firebase_admin
@@ -27,11 +28,25 @@ def initialize_firebase():
         exit(1)
 
 # --- CHECK DATABASE STATUS ---
-def check_database():
+def check_database(full_scan=False):
     print("\n🔍 Checking Firebase Database...")
     try:
-        artworks_ref = db.reference('artworks')
-        artworks = artworks_ref.get() or {}
+        artwall_ref = db.reference('artwall')
+        counts = None if full_scan else db.reference('artwall_index/counts').get()
+        if counts:
+            # Counts come from the index kept by firebase-master-sync.py; the artwork
+            # keys are read shallowly, without downloading the records
+            artworks = {}
+            for medium in artwall_ref.get(shallow=True) or {}:
+                artworks.update(dict.fromkeys(artwall_ref.child(medium).get(shallow=True) or {}, {}))
+            print(f"📊 Total artworks in database: {len(artworks)}")
+            analyze_index_counts(counts)
+            return artworks
+
+        # Only the card records under artwall/{medium}; texts live in artwall_content
+        artworks = {}
+        for medium_items in (artwall_ref.get() or {}).values():
+            artworks.update(medium_items or {})
         print(f"📊 Total artworks in database: {len(artworks)}")
         
         # Analyze metadata structure
@@ -71,7 +86,7 @@ def analyze_metadata_structure(artworks):
             has_evaluation_field += 1
         if 'rating' in artwork:
             has_rating_field += 1
-        if 'translations' in artwork:
+        if artwork.get('language2'):
             has_translations += 1
 
     print(f"\n🎨 New Mediums:")
@@ -89,6 +104,30 @@ def analyze_metadata_structure(artworks):
     print(f"  rating field      : {has_rating_field:3}/{len(artworks)} artworks ({has_rating_field/len(artworks)*100:.1f}%)")
     print(f"  Translations      : {has_translations:3}/{len(artworks)} artworks ({has_translations/len(artworks)*100:.1f}%)")
 
+# --- ANALYZE INDEX COUNTS ---
+def analyze_index_counts(counts):
+    """Print medium/subtype/year statistics from the precomputed artwall_index/counts node"""
+    print("\n📊 Analyzing Index Counts (artwall_index)...")
+
+    print(f"\n🎨 New Mediums:")
+    for medium, count in sorted((counts.get('medium') or {}).items()):
+        print(f"  {medium:15} : {count:3} artworks")
+
+    print(f"\n🔧 Medium/Subtype Combinations:")
+    for medium, subtypes in sorted((counts.get('subtype') or {}).items()):
+        for subtype, count in sorted(subtypes.items()):
+            if count:
+                print(f"  {medium + '/' + subtype:20} : {count:3} artworks")
+
+    print(f"\n📅 Years:")
+    year_counts = defaultdict(int)
+    for years in (counts.get('year') or {}).values():
+        for year, count in years.items():
+            year_counts[year] += count
+    for year, count in sorted(year_counts.items()):
+        if count:
+            print(f"  {year:15} : {count:3} artworks")
+
 # --- CHECK STORAGE STATUS ---
 def check_storage():
     print("\n🔍 Checking Firebase Storage...")
@@ -169,7 +208,8 @@ if __name__ == "__main__":
     print("\n🚀 Firebase and Local Folder Comparison with Medium/Subtype Analysis")
     print("=" * 70)
     initialize_firebase()
-    database_artworks = check_database()
+    # --full-scan downloads all cards for the field coverage report instead of using the index
+    database_artworks = check_database(full_scan='--full-scan' in sys.argv)
     storage_files = check_storage()
     local_artworks, local_media_files = check_local_folder()
     compare_contents(database_artworks, storage_files, local_artworks, local_media_files)
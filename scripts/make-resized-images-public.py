@@ -4,6 +4,11 @@
 Script to make all resized images in Firebase Storage publicly readable.
 The Firebase Storage Resize Images extension creates resized variants but they 
 are not public by default, causing 403 Forbidden errors.
+
+Only for legacy blobs: the extension is no longer configured in firebase.json and
+firebase-master-sync.py now generates these variants itself (with Pillow), public
+and with the final cache-control. Run this once for variants that the extension
+created before that change.
 """
 
 from firebase_admin import credentials, initialize_app, storage
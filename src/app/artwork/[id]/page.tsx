@@ -224,7 +224,9 @@ export default function ArtworkModalPage() {
         let found = null;
         for (const medium of Object.keys(data)) {
           if (data[medium] && data[medium][id]) {
-            found = { id, type: 'artwork', ...data[medium][id] };
+            // The card holds no texts; merge in artwall_content/{medium}/{id}
+            const contentSnapshot = await get(ref(realtimeDb, `artwall_content/${medium}/${id}`));
+            found = { id, type: 'artwork', ...data[medium][id], ...(contentSnapshot.val() || {}) };
             break;
           }
         }
@@ -2,12 +2,13 @@ declare global {
   // eslint-disable-next-line no-var
   var pushMock: ReturnType<typeof vi.fn>;
 }
-globalThis.pushMock = vi.fn((...args) => Promise.resolve({ key: 'test-id' }));
+globalThis.pushMock = vi.fn((...args) => ({ key: 'test-id' }));
 import { vi } from 'vitest';
 // Move all mocks to the very top before any imports
-globalThis.pushMock = vi.fn((...args) => Promise.resolve({ key: 'test-id' }));
+globalThis.pushMock = vi.fn((...args) => ({ key: 'test-id' }));
 vi.mock('firebase/database', () => {
-  const push = globalThis.pushMock;
+  // push() returns the new reference synchronously; look up pushMock per call so tests can replace it
+  const push = (...args: any[]) => globalThis.pushMock(...args);
   const refMock = vi.fn((db, path) => ({
     key: path?.split('/').pop() || null,
     parent: null,
@@ -19,7 +20,8 @@ vi.mock('firebase/database', () => {
     ref: refMock,
     push,
     update: vi.fn(() => Promise.resolve()),
-    get: vi.fn(() => Promise.resolve({ exists: () => false })),
+    get: vi.fn(() => Promise.resolve({ exists: () => false, val: () => null })),
+    increment: vi.fn((delta: number) => ({ increment: delta })),
     default: { push }
   };
 
@@ -100,7 +102,7 @@ describe('AdminModal', () => {
 
       it('shows submission error when Firebase fails', async () => {
         // Mock pushMock to simulate failure
-        globalThis.pushMock = vi.fn(() => Promise.reject(new Error('Firebase error')));
+        globalThis.pushMock = vi.fn(() => { throw new Error('Firebase error'); });
         renderWithTheme(<AdminModal {...mockProps} />);
         await userEvent.type(screen.getByLabelText('Titel'), 'Test Error');
         await userEvent.selectOptions(screen.getByLabelText('Medium *'), 'writing');
@@ -130,7 +132,7 @@ describe('AdminModal', () => {
 
   beforeEach(() => {
     vi.clearAllMocks();
-    globalThis.pushMock = vi.fn((...args) => Promise.resolve({ key: 'test-id' }));
+    globalThis.pushMock = vi.fn((...args) => ({ key: 'test-id' }));
   });
 
   describe('Modal Behavior', () => {
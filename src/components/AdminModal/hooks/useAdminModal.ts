@@ -4,7 +4,7 @@ import { useState, useEffect } from 'react';
 import { Artwork, ArtworkFormData } from '@/types';
 import { validateArtworkForm } from '../utils/validation';
 import { ValidationErrors } from '../types';
-import { createArtwork, updateArtwork } from '../utils/firebaseOperations';
+import { createArtwork, updateArtwork, fetchArtworkContent } from '@/utils/firebase-operations';
 import { useLoadingState } from './useLoadingState';
 import { useAutoSave } from './useAutoSave';
 import { useSmartFormLogic } from './useSmartFormLogic';
@@ -53,6 +53,8 @@ export const useAdminModal = (artworkToEdit?: Artwork | null) => {
   const [errorTick, setErrorTick] = useState(0); // force re-render on error update
   const [isLoading, setIsLoading] = useState(false);
   const [message, setMessage] = useState('');
+  // Texts of the edited artwork as loaded from artwall_content/; null until loaded
+  const [loadedContent, setLoadedContent] = useState<Record<string, any> | null>(null);
   const { loadingState, setLoading, setError, clearLoading, isFieldLoading } = useLoadingState();
   
   // Smart form logic
@@ -78,8 +80,31 @@ export const useAdminModal = (artworkToEdit?: Artwork | null) => {
 
   // Initialize form data when artwork changes
   useEffect(() => {
+    setLoadedContent(null);
     if (artworkToEdit) {
       setFormData(mapArtworkToFormData(artworkToEdit));
+      // Cards carry no texts; fill content, lyrics and chords from artwall_content/
+      const medium = (artworkToEdit as any).medium;
+      if (!medium) return;
+      let cancelled = false;
+      fetchArtworkContent(medium, artworkToEdit.id).then(result => {
+        if (cancelled) return;
+        if (!result.success) {
+          setMessage('Teksten konden niet worden geladen; ze blijven ongewijzigd bij opslaan.');
+          return;
+        }
+        const texts = result.data || {};
+        setLoadedContent(texts);
+        setFormData(prev => ({
+          ...prev,
+          content: prev.content || texts.content || '',
+          lyrics: prev.lyrics || texts.lyrics || '',
+          chords: prev.chords || texts.chords || ''
+        }));
+      });
+      return () => {
+        cancelled = true;
+      };
     } else {
       // Try to load draft for new artwork
       const draft = loadDraft();
@@ -214,7 +239,7 @@ export const useAdminModal = (artworkToEdit?: Artwork | null) => {
       // eslint-disable-next-line no-console
       console.log('useAdminModal: submitting to Firebase');
       const result = artworkToEdit
-        ? await updateArtwork(artworkToEdit.id, formData)
+        ? await updateArtwork(artworkToEdit.id, formData, loadedContent)
         : await createArtwork(formData);
       // Debug: log result from Firebase operation
       // eslint-disable-next-line no-console
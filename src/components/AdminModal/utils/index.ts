@@ -1,4 +1,3 @@
 // src/components/AdminModal/utils/index.ts
-export * from './firebaseOperations';
 export * from './formLogic';
 export * from './validation';
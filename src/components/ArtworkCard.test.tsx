@@ -31,4 +31,14 @@ describe('ArtworkCard', () => {
     // Prefer heading role to avoid duplicates from generated image overlay
     expect(screen.getByRole('heading', { name: 'Test' })).toBeInTheDocument();
   });
+
+  it('falls back to the excerpt on the back of a card without description', () => {
+    const poem = { ...mockArtwork, id: '2', medium: 'writing', subtype: 'poem', description: '', excerpt: 'Eerste regel van het gedicht' } as Artwork;
+    render(
+      <ThemeProvider theme={atelierTheme}>
+        <ArtworkCard artwork={poem} onSelect={vi.fn()} />
+      </ThemeProvider>
+    );
+    expect(screen.getByText('Eerste regel van het gedicht')).toBeInTheDocument();
+  });
 });
@@ -190,6 +190,16 @@ const CardBackFooter = styled(CardFooter)`
   color: ${({ theme }) => theme.body};
 `;
 
+const CardBackText = styled.p<{ $maxLines: number }>`
+  margin: 0.5rem 0;
+  color: ${({ theme }) => theme.body};
+  white-space: pre-line;
+  overflow: hidden;
+  display: -webkit-box;
+  -webkit-box-orient: vertical;
+  -webkit-line-clamp: ${({ $maxLines }) => $maxLines};
+`;
+
 const CardCategory = styled.div`
   display: flex;
   align-items: center;
@@ -371,37 +381,11 @@ const ArtworkCard = ({ artwork, onSelect, isAdmin, onImageLoaded }: ArtworkCardP
     // Use subtype for sizing, default to drawing size
     const subtype = (artwork.subtype || '').toLowerCase();
 
-    // Determine which text to show on card back: description or content
-    // Only show description on back, never on front
+    // Determine which text to show on card back: the description, else the excerpt.
+    // Cards no longer carry the full texts (those live in artwall_content/ and are loaded
+    // by the modal); the sync stores a short plain-text excerpt of them on the card instead.
     const hasDescription = artwork.description && artwork.description.trim() !== '';
-    // If using content, replace <br> with newlines, then strip other HTML tags
-    const stripHtml = (html: string) =>
-      html
-        .replace(/<br\s*\/?>/gi, '\n') // Replace <br> and <br/> with newlines
-        .replace(/<[^>]+>/g, ''); // Remove all other HTML tags
-
-    // Remove the first and second lines, and the last four lines from content
-    const cleanContent = (content: string) => {
-      const lines = content.split(/\r?\n/);
-      // Remove first two lines
-      let newLines = lines.slice(2);
-      // Remove last four lines
-      if (newLines.length > 4) {
-        newLines = newLines.slice(0, newLines.length - 4);
-      } else {
-        newLines = [];
-      }
-      // Ensure first two lines are blank
-      newLines.unshift('', '');
-      return newLines.join('\n');
-    };
-
-    // Only show description or cleaned content (without embedded date/place)
-    const cardText = hasDescription
-      ? artwork.description.trim()
-      : (artwork.content
-          ? cleanContent(stripHtml(artwork.content)).trim()
-          : '');
+    const cardText = hasDescription ? artwork.description.trim() : (artwork.excerpt || '').trim();
     // Date/place are now only shown from metadata below, not from cardText.
 
     // Calculate max lines based on card size (default: 8, novel: 16, song: 10)
@@ -527,6 +511,7 @@ const ArtworkCard = ({ artwork, onSelect, isAdmin, onImageLoaded }: ArtworkCardP
           </CardFront>
             <CardBack $medium={artwork.medium}>
               <CardBackTitle>{artwork.title}</CardBackTitle>
+              {cardText && <CardBackText $maxLines={maxLines}>{cardText}</CardBackText>}
               <CardBackFooter style={{flexDirection: 'column' }}>
                   {/* Show date, location, medium, and (sub)category in the footer */}
                   <span>{formattedDate}</span>
@@ -14,8 +14,21 @@ interface ModalProps {
 
 import Image from 'next/image';
 
-const Modal: React.FC<ModalProps> = ({ isOpen, onClose, item, isAdmin, onEdit }) => {
+const Modal: React.FC<ModalProps> = ({ isOpen, onClose, item: card, isAdmin, onEdit }) => {
+  // Cards from artwall/ carry no texts; load them from artwall_content/ when the modal opens
+  const [texts, setTexts] = React.useState<Partial<Artwork> | null>(null);
+  React.useEffect(() => {
+    setTexts(null);
+    if (!isOpen || card.content || card.lyrics || !card.medium) return;
+    let cancelled = false;
+    import('@/utils/firebase-operations').then(({ fetchArtworkContent }) => fetchArtworkContent(card.medium, card.id)).then(result => {
+      if (!cancelled && result.success) setTexts(result.data);
+    }).catch(error => console.error('Failed to load artwork texts:', error));
+    return () => { cancelled = true; };
+  }, [isOpen, card.id, card.medium, card.content, card.lyrics]);
+
   if (!isOpen) return null;
+  const item: Artwork = texts ? { ...card, ...texts } : card;
 
   // Overlay click closes modal
   const handleOverlayClick = (e: React.MouseEvent<HTMLDivElement>) => {
@@ -18,6 +18,7 @@ vi.mock('firebase/database', () => ({
   push: vi.fn(),
   update: vi.fn(),
   get: vi.fn(),
+  increment: vi.fn(),
   onValue: vi.fn(),
 }));
 
@@ -57,7 +58,7 @@ describe('AdminModal', () => {
 
   it.skip('handles form submission correctly', async () => {
     const mockPush = vi.fn().mockResolvedValue({ key: 'test-id' });
-    // Provide global pushMock used by firebaseOperations
+    // Provide global pushMock (this file mocks push directly)
     (globalThis as any).pushMock = mockPush;
     
     renderWithTheme(<AdminModal {...mockProps} />);
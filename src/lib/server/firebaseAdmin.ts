@@ -186,6 +186,8 @@ export async function fetchArtworks(): Promise<Artwork[]> {
       // Ensure id and medium exist
       raw.id = raw.id || id;
       raw.medium = raw.medium || mediumKey;
+      // Card records leave translations to artwall_content
+      raw.translations = raw.translations || {};
       // Normalize evaluation/rating numeric fields if present
       const evalRaw = raw.evaluationNum ?? raw.evaluation;
       const ratingRaw = raw.ratingNum ?? raw.rating;
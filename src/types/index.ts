@@ -41,6 +41,7 @@ interface BaseArtwork {
   url2?: string;
   url3?: string;
   content?: string; // Primary language content
+  excerpt?: string; // Short plain-text excerpt of content/lyrics, kept on the card
   
   // NEW: evaluation and rating fields
   evaluation?: string; // Personal assessment (1-5)
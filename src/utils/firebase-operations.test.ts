@@ -0,0 +1,82 @@
+import { describe, it, expect, vi } from 'vitest';
+
+vi.mock('@/firebase', () => ({ db: {}, realtimeDb: {} }));
+vi.mock('firebase/database', () => ({
+  ref: () => ({}),
+  push: () => ({ key: 'nieuw' }),
+  update: vi.fn(),
+  get: vi.fn(),
+  increment: (delta: number) => ({ increment: delta }),
+}));
+
+import { get, update } from 'firebase/database';
+import { splitArtworkRecord, buildCardExcerpt, artworkIndexValues, buildIndexUpdates, updateArtwork } from './firebase-operations';
+
+describe('firebase-operations helpers', () => {
+  it('keeps texts out of the card, like the sync script', () => {
+    const { card, content } = splitArtworkRecord({
+      title: 'Lied',
+      year: 2024,
+      content: '<p>tekst</p>',
+      lyrics: '',
+      translations: { en: { title: 'Song' } },
+    });
+    expect(card).toEqual({ title: 'Lied', year: 2024, excerpt: 'tekst' });
+    expect(content).toEqual({ content: '<p>tekst</p>', translations: { en: { title: 'Song' } } });
+  });
+
+  it('builds the same card excerpt as the sync script', () => {
+    const content = '<div>Golven</div><div>de zee&amp;het <b>strand</b></div><br/><div>' + 'woord '.repeat(100) + '</div>';
+    const excerpt = buildCardExcerpt({ title: 'Golven', content });
+    expect(excerpt.startsWith('de zee&het strand\nwoord woord')).toBe(true);
+    expect(excerpt.endsWith('woord…')).toBe(true);
+    expect(excerpt.length).toBeLessThanOrEqual(241);
+    expect(buildCardExcerpt({ lyrics: 'la<br>la' })).toBe('la\nla');
+    expect(buildCardExcerpt({ title: 'Boom' })).toBe('');
+  });
+
+  it('moves an artwork between index values and counters', () => {
+    const oldValues = artworkIndexValues({ year: 2023, subtype: 'poem', rating: 3 });
+    const newValues = artworkIndexValues({ year: 2024, subtype: 'poem', rating: 3 });
+    expect(buildIndexUpdates('writing', 'abc', oldValues, newValues)).toEqual({
+      'artwall_index/year/2023/writing/abc': null,
+      'artwall_index/year/2024/writing/abc': true,
+      'artwall_index/counts/year/writing/2023': { increment: -1 },
+      'artwall_index/counts/year/writing/2024': { increment: 1 },
+    });
+  });
+
+  it('counts a new artwork in its medium', () => {
+    const updates = buildIndexUpdates('drawing', 'abc', null, artworkIndexValues({ subtype: 'marker' }));
+    expect(updates).toEqual({
+      'artwall_index/counts/medium/drawing': { increment: 1 },
+      'artwall_index/counts/subtype/drawing/marker': { increment: 1 },
+    });
+  });
+
+  describe('updateArtwork', () => {
+    const card = { id: 'zee', title: 'Zee', year: 2024, subtype: 'poem', excerpt: 'golven' };
+    const savedUpdates = async (form: Record<string, any>, loadedContent: Record<string, any> | null) => {
+      vi.mocked(get).mockResolvedValue({ val: () => ({ writing: { zee: card } }) } as any);
+      vi.mocked(update).mockClear();
+      expect(await updateArtwork('zee', form, loadedContent)).toEqual({ success: true });
+      return vi.mocked(update).mock.calls[0][1] as Record<string, any>;
+    };
+
+    it('leaves texts alone that the form never loaded', async () => {
+      const updates = await savedUpdates({ title: 'Zee', content: '', lyrics: '' }, null);
+      expect(Object.keys(updates).filter(path => path.startsWith('artwall_content/'))).toEqual([]);
+      expect(updates['artwall/writing/zee/excerpt']).toBeUndefined();
+      expect(updates['artwall_manifest/writing/zee/hash']).toBeNull();
+      expect(updates['artwall_manifest/writing/zee/fields']).toBeNull();
+    });
+
+    it('writes only the loaded texts that changed', async () => {
+      const loaded = { content: '<div>golven</div>', lyrics: 'la' };
+      const updates = await savedUpdates({ title: 'Zee', content: '<div>branding</div>', lyrics: 'la', chords: '' }, loaded);
+      expect(Object.keys(updates).filter(path => path.startsWith('artwall_content/'))).toEqual(['artwall_content/writing/zee/content']);
+      expect(updates['artwall_content/writing/zee/content']).toBe('<div>branding</div>');
+      expect(updates['artwall/writing/zee/excerpt']).toBe('branding');
+    });
+  });
+});
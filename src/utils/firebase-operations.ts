@@ -1,6 +1,6 @@
 // src/utils/firebase-operations.ts
 import { db, realtimeDb } from '@/firebase';
-import { ref, push, update, get } from 'firebase/database';
+import { ref, push, update, get, increment } from 'firebase/database';
 import { ArtworkFormData } from '@/types';
 
 export interface OperationResult {
@@ -9,18 +9,163 @@ export interface OperationResult {
   error?: string;
 }
 
+// Full texts live in artwall_content/{medium}/{id}, not in the card records under artwall/
+// (same split as split_artwork_record in scripts/firebase-master-sync.py)
+const CONTENT_FIELDS = ['content', 'lyrics', 'chords', 'translations'];
+// The card keeps a short plain-text excerpt of content (or lyrics) for its back face,
+// as CARD_EXCERPT_LENGTH / CARD_FORMAT_VERSION in the sync script
+const CARD_EXCERPT_LENGTH = 240;
+const CARD_FORMAT_VERSION = 1;
+// Fields kept in artwall_index, as INDEX_LIST_FIELDS / INDEX_COUNT_FIELDS in the sync script
+const INDEX_LIST_FIELDS = ['year', 'rating'];
+const INDEX_COUNT_FIELDS = ['subtype', 'year'];
+
+const decodeEntities = (text: string) =>
+  text
+    .replace(/&nbsp;/g, ' ')
+    .replace(/&lt;/g, '<')
+    .replace(/&gt;/g, '>')
+    .replace(/&quot;/g, '"')
+    .replace(/&#39;/g, "'")
+    .replace(/&amp;/g, '&');
+
+// Same rules as build_card_excerpt: keep line breaks, drop a first line equal to the title,
+// cut at a word boundary after CARD_EXCERPT_LENGTH characters
+export const buildCardExcerpt = (record: Record<string, any>): string => {
+  const text = record.content || record.lyrics;
+  if (typeof text !== 'string') return '';
+  let lines = decodeEntities(text.replace(/<br\s*\/?>|<\/(?:div|p|li|h[1-6])>/gi, '\n').replace(/<[^>]+>/g, ''))
+    .split(/\r?\n/)
+    .map(line => line.split(/\s+/).filter(Boolean).join(' '))
+    .filter(Boolean);
+  if (lines.length && lines[0].toLowerCase() === String(record.title || '').trim().toLowerCase()) {
+    lines = lines.slice(1);
+  }
+  let excerpt = lines.join('\n');
+  if (excerpt.length > CARD_EXCERPT_LENGTH) {
+    excerpt = excerpt.slice(0, CARD_EXCERPT_LENGTH).replace(/\s+\S*$/, '').replace(/[ ,.;:]+$/, '') + '…';
+  }
+  return excerpt;
+};
+
+export const splitArtworkRecord = (record: Record<string, any>) => {
+  const card: Record<string, any> = {};
+  const content: Record<string, any> = {};
+  for (const [key, value] of Object.entries(record)) {
+    if (key === 'excerpt') continue;
+    if (!CONTENT_FIELDS.includes(key)) {
+      card[key] = value;
+    } else if (value) {
+      content[key] = value;
+    }
+  }
+  const excerpt = buildCardExcerpt(record);
+  if (excerpt) card.excerpt = excerpt;
+  return { card, content };
+};
+
+const indexKey = (value: unknown): string | null => {
+  if (value === undefined || value === null) return null;
+  const key = String(value).trim().replace(/[.#$[\]\/]/g, '_');
+  return key || null;
+};
+
+export const artworkIndexValues = (record: Record<string, any>): Record<string, string> => {
+  const values: Record<string, string> = {};
+  for (const field of new Set([...INDEX_LIST_FIELDS, ...INDEX_COUNT_FIELDS])) {
+    const key = indexKey(record[field]);
+    if (key !== null) values[field] = key;
+  }
+  return values;
+};
+
+// Multi-path updates that move one artwork between the artwall_index lists and counters;
+// oldValues is null for a new artwork
+export const buildIndexUpdates = (
+  medium: string,
+  id: string,
+  oldValues: Record<string, string> | null,
+  newValues: Record<string, string>
+): Record<string, any> => {
+  const updates: Record<string, any> = {};
+  if (oldValues === null) {
+    updates[`artwall_index/counts/medium/${medium}`] = increment(1);
+    oldValues = {};
+  }
+  for (const field of INDEX_LIST_FIELDS) {
+    const [oldValue, newValue] = [oldValues[field], newValues[field]];
+    if (oldValue === newValue) continue;
+    if (oldValue !== undefined) updates[`artwall_index/${field}/${oldValue}/${medium}/${id}`] = null;
+    if (newValue !== undefined) updates[`artwall_index/${field}/${newValue}/${medium}/${id}`] = true;
+  }
+  for (const field of INDEX_COUNT_FIELDS) {
+    const [oldValue, newValue] = [oldValues[field], newValues[field]];
+    if (oldValue === newValue) continue;
+    if (oldValue !== undefined) updates[`artwall_index/counts/${field}/${medium}/${oldValue}`] = increment(-1);
+    if (newValue !== undefined) updates[`artwall_index/counts/${field}/${medium}/${newValue}`] = increment(1);
+  }
+  return updates;
+};
+
+const processTags = (tags: string[] | string | undefined): string[] => {
+  if (Array.isArray(tags)) {
+    return tags;
+  }
+  if (typeof tags === 'string' && tags.trim()) {
+    return tags.split(',').map((tag: string) => tag.trim()).filter((tag: string) => tag);
+  }
+  return [];
+};
+
+const processMediaUrls = (mediaUrls: string[] | string | undefined): string[] => {
+  if (Array.isArray(mediaUrls)) {
+    return mediaUrls;
+  }
+  if (typeof mediaUrls === 'string' && mediaUrls.trim()) {
+    return mediaUrls.split('\n').map((url: string) => url.trim()).filter((url: string) => url);
+  }
+  return [];
+};
+
+// Form data as stored: tags and media URLs as arrays, without the uploaded File object,
+// the derived excerpt, or undefined values (which update() rejects)
+const prepareFormData = (formData: Partial<ArtworkFormData>): Record<string, any> => {
+  const { uploadedFile, ...data } = formData as Partial<ArtworkFormData> & { excerpt?: string };
+  const prepared: Record<string, any> = { ...data };
+  if ('tags' in prepared) prepared.tags = processTags(prepared.tags);
+  if ('mediaUrls' in prepared) prepared.mediaUrls = processMediaUrls(prepared.mediaUrls);
+  delete prepared.excerpt;
+  for (const key of Object.keys(prepared)) {
+    if (prepared[key] === undefined) delete prepared[key];
+  }
+  return prepared;
+};
+
+const sameValue = (a: unknown, b: unknown) => JSON.stringify(a ?? '') === JSON.stringify(b ?? '');
+
 export const createArtwork = async (artwork: ArtworkFormData): Promise<OperationResult> => {
   try {
-    // Place artwork in artwall/{medium}/{id}
+    // Place the card in artwall/{medium}/{id} and the texts in artwall_content/{medium}/{id}
     const medium = artwork.medium || 'other';
     const artwallRef = ref(realtimeDb, `artwall/${medium}`);
     const pushRef = push(artwallRef);
-    const newId = pushRef.key;
-    await update(ref(realtimeDb, `artwall/${medium}/${newId}`), {
-      ...artwork,
+    const newId = pushRef.key as string;
+    const now = Date.now();
+    const { card, content } = splitArtworkRecord({
+      ...prepareFormData(artwork),
       id: newId,
-      createdAt: Date.now(),
-      recordLastUpdated: Date.now()
+      createdAt: now,
+      recordLastUpdated: now
+    });
+    const indexValues = artworkIndexValues(card);
+    // One multi-path update, so the card, texts, manifest entry and index change together;
+    // search_pending puts the artwork in the search index at the next publish
+    await update(ref(realtimeDb), {
+      [`artwall/${medium}/${newId}`]: card,
+      [`artwall_content/${medium}/${newId}`]: Object.keys(content).length ? content : null,
+      [`artwall_manifest/${medium}/${newId}`]: { modified: now, split: true, card: CARD_FORMAT_VERSION, index: indexValues },
+      [`artwall_index/search_pending/${medium}/${newId}`]: true,
+      ...buildIndexUpdates(medium, newId, null, indexValues)
     });
     return { success: true, data: { id: newId } };
   } catch (error) {
@@ -32,26 +177,60 @@ export const createArtwork = async (artwork: ArtworkFormData): Promise<Operation
   }
 };
 
-export const updateArtwork = async (id: string, artwork: Partial<ArtworkFormData>): Promise<OperationResult> => {
+// loadedContent is the artwall_content record the form was filled from (see fetchArtworkContent).
+// Texts are only written when they were loaded and changed, so a form that never loaded them
+// cannot erase the stored texts; without loadedContent the texts are left alone.
+export const updateArtwork = async (
+  id: string,
+  artwork: Partial<ArtworkFormData>,
+  loadedContent: Record<string, any> | null = null
+): Promise<OperationResult> => {
   try {
-    // Find and update artwork in any medium folder
+    // Find the artwork in any medium folder
     const artwallRef = ref(realtimeDb, 'artwall');
     const snapshot = await get(artwallRef);
     const data = snapshot.val();
-    let foundRef = null;
+    let foundMedium: string | null = null;
     if (data) {
       for (const medium of Object.keys(data)) {
         if (data[medium] && data[medium][id]) {
-          foundRef = ref(realtimeDb, `artwall/${medium}/${id}`);
+          foundMedium = medium;
           break;
         }
       }
     }
-    if (!foundRef) throw new Error('Artwork not found');
-    await update(foundRef, {
-      ...artwork,
-      recordLastUpdated: Date.now()
-    });
+    if (!foundMedium) throw new Error('Artwork not found');
+    const existingCard = data[foundMedium][id];
+    const changes: Record<string, any> = { ...prepareFormData(artwork), recordLastUpdated: Date.now() };
+    const updates: Record<string, any> = {};
+    const newCard = { ...existingCard };
+    const newContent: Record<string, any> = { ...(loadedContent || {}) };
+    for (const [key, value] of Object.entries(changes)) {
+      if (CONTENT_FIELDS.includes(key)) {
+        if (!loadedContent || sameValue(value, loadedContent[key])) continue;
+        updates[`artwall_content/${foundMedium}/${id}/${key}`] = value;
+        newContent[key] = value;
+      } else {
+        updates[`artwall/${foundMedium}/${id}/${key}`] = value;
+        newCard[key] = value;
+      }
+    }
+    if (loadedContent) {
+      // Keep the card excerpt in line with the (possibly edited) texts and title
+      const excerpt = buildCardExcerpt({ ...newContent, title: newCard.title });
+      if (excerpt !== (existingCard.excerpt || '')) {
+        updates[`artwall/${foundMedium}/${id}/excerpt`] = excerpt || null;
+      }
+    }
+    const indexValues = artworkIndexValues(newCard);
+    Object.assign(updates, buildIndexUpdates(foundMedium, id, artworkIndexValues(existingCard), indexValues));
+    updates[`artwall_manifest/${foundMedium}/${id}/index`] = indexValues;
+    // The field hashes no longer describe the record: without them the next sync rewrites it
+    // completely when its source changes, instead of diffing against pre-edit values
+    updates[`artwall_manifest/${foundMedium}/${id}/hash`] = null;
+    updates[`artwall_manifest/${foundMedium}/${id}/fields`] = null;
+    updates[`artwall_index/search_pending/${foundMedium}/${id}`] = true;
+    await update(ref(realtimeDb), updates);
     return { success: true };
   } catch (error) {
     console.error('Failed to update artwork:', error);
@@ -89,4 +268,17 @@ export const fetchArtwork = async (id: string): Promise<OperationResult> => {
       error: error instanceof Error ? error.message : 'Fetch failed' 
     };
   }
-};
\ No newline at end of file
+};
+export const fetchArtworkContent = async (medium: string, id: string): Promise<OperationResult> => {
+  try {
+    // Full texts (content, lyrics, chords, translations) live outside the card records
+    const snapshot = await get(ref(realtimeDb, `artwall_content/${medium}/${id}`));
+    return { success: true, data: snapshot.val() || {} };
+  } catch (error) {
+    console.error('Failed to fetch artwork content:', error);
+    return {
+      success: false,
+      error: error instanceof Error ? error.message : 'Fetch failed'
+    };
+  }
+};
@@ -1,4 +1,11 @@
 import unittest
+import base64
+import contextlib
+import io
+import json
+import pathlib
+import re
+import tempfile
 import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
 import enex_to_artwall_files
@@ -44,5 +51,158 @@ class TestEnexToArtwallFiles(unittest.TestCase):
         filename = enex_to_artwall_files.generate_filename(meta)
         self.assertIn('drawing_marker', filename)
 
+    def test_iter_enex_notes_spools_resources(self):
+        data = b'ID3' + bytes(range(256)) * 40
+        enex = (
+            '<?xml version="1.0" encoding="UTF-8"?><en-export>'
+            '<note><title>Lied</title><content>tekst</content>'
+            f'<resource><data encoding="base64">\n{base64.encodebytes(data).decode()}</data><mime>audio/mpeg</mime></resource>'
+            '</note><note><title>Tweede</title><content>meer</content></note></en-export>'
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = pathlib.Path(tmp)
+            enex_path = tmp_path / 'test.enex'
+            enex_path.write_text(enex, encoding='utf-8')
+            spool_dir = tmp_path / 'spool'
+            spool_dir.mkdir()
+            notes = []
+            for note in enex_to_artwall_files.iter_enex_notes(enex_path, spool_dir):
+                resources = note.findall('resource')
+                spooled = [pathlib.Path(r.get('spool-path')).read_bytes() for r in resources]
+                notes.append((note.findtext('title'), spooled, [r.get('audio-ext') for r in resources]))
+                enex_to_artwall_files.release_note_resources(note)
+            self.assertEqual(notes, [('Lied', [data], ['.mp3']), ('Tweede', [], [])])
+            self.assertEqual(list(spool_dir.iterdir()), [])
+
+    def test_record_note_result(self):
+        report = {'success': [], 'failed': [], 'warnings': []}
+        medium_counts, subtype_counts = {}, {}
+        ok = {'title': 'A', 'warnings': ['w1'], 'medium': 'drawing', 'subtype': 'marker', 'success': {'title': 'A', 'files': []}, 'error': None}
+        failed = {'title': 'B', 'warnings': [], 'medium': 'drawing', 'subtype': 'pencil', 'success': None, 'error': 'kapot'}
+        for result in (ok, failed):
+            enex_to_artwall_files.record_note_result(result, report, medium_counts, subtype_counts)
+        self.assertEqual(medium_counts, {'drawing': 2})
+        self.assertEqual(subtype_counts, {'drawing/marker': 1, 'drawing/pencil': 1})
+        self.assertEqual(report['failed'], [{'title': 'B', 'reason': 'kapot'}])
+        self.assertEqual(report['warnings'], ['w1'])
+
+    def test_is_note_unchanged(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            dest_dir = pathlib.Path(tmp)
+            (dest_dir / 'drawing').mkdir()
+            (dest_dir / 'drawing' / 'a.html').write_text('x', encoding='utf-8')
+            entry = {'hash': 'abc', 'files': ['drawing/a.html']}
+            self.assertTrue(enex_to_artwall_files.is_note_unchanged(entry, 'abc', dest_dir))
+            self.assertFalse(enex_to_artwall_files.is_note_unchanged(entry, 'def', dest_dir))
+            self.assertFalse(enex_to_artwall_files.is_note_unchanged({'hash': 'abc', 'files': ['drawing/b.png']}, 'abc', dest_dir))
+            self.assertFalse(enex_to_artwall_files.is_note_unchanged(None, 'abc', dest_dir))
+
+    def test_find_main_content_media_hashes(self):
+        content = (
+            '<en-note><div>Tekst</div><en-media type="image/png" hash="AAA111"/>'
+            '<en-media hash="bbb222" type="image/png"/>'
+            '<div>---META_BEGIN---</div><div>title: X</div><en-media hash="bbb222"/><div>---META_END---</div>'
+            '<en-media hash="ccc333"/></en-note>'
+        )
+        self.assertEqual(enex_to_artwall_files.find_main_content_media_hashes(content), {'aaa111'})
+
+    def test_unknown_audio_falls_back_to_mime_extension(self):
+        self.assertEqual(enex_to_artwall_files.sniff_audio_extension(b'\x00\x00\x00\x20ftypisom'), '.dat')
+        self.assertEqual(enex_to_artwall_files.get_mime_extension('audio/mp4'), '.mp4')
+        self.assertEqual(enex_to_artwall_files.get_mime_extension('audio/x-m4a'), '.m4a')
+        self.assertEqual(enex_to_artwall_files.get_mime_extension('application/octet-stream'), '.dat')
+
+    def test_remove_stale_files_keeps_files_of_other_notes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            dest_dir = pathlib.Path(tmp)
+            (dest_dir / 'audio').mkdir()
+            for name in ('lied_01.dat', 'lied_01.m4a', 'ander_01.mp3'):
+                (dest_dir / 'audio' / name).write_bytes(b'x')
+            manifest = {'guid:a': {'files': ['audio/lied_01.m4a']}, 'guid:b': {'files': ['audio/ander_01.mp3']}}
+            stale = {'audio/lied_01.dat', 'audio/ander_01.mp3', 'audio/weg_01.mp3'}
+            self.assertEqual(enex_to_artwall_files.remove_stale_files(dest_dir, stale, manifest), 1)
+            self.assertEqual(sorted(p.name for p in (dest_dir / 'audio').iterdir()), ['ander_01.mp3', 'lied_01.m4a'])
+
+    def test_outdated_manifest_keeps_only_file_lists(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            dest_dir = pathlib.Path(tmp)
+            old = {'version': enex_to_artwall_files.MANIFEST_VERSION - 1, 'notes': {'guid:a': {'hash': 'abc', 'files': ['audio/lied_01.dat']}}}
+            (dest_dir / enex_to_artwall_files.MANIFEST_FILENAME).write_text(json.dumps(old), encoding='utf-8')
+            self.assertEqual(enex_to_artwall_files.load_manifest(dest_dir), {'guid:a': {'files': ['audio/lied_01.dat']}})
+
+    def test_clean_html_content_matches_regex_chain(self):
+        html = (
+            '<?xml version="1.0"?><!DOCTYPE en-note SYSTEM "x"><en-note style="a">'
+            '<br/><DIV><br></DIV><div style="display:none;x">verborgen</div>'
+            '<div class="a" style="color: red; display: none">ook verborgen</div>'
+            '<div  style="color:red"><span \n style="font-weight:bold">Regel</span></div>'
+            '<div><br /></div><div>Tweede</div><br><BR/> \n</en-note>'
+        )
+        expected = html
+        for pattern, replacement, flags in (
+            (r'<\?xml[^>]*\?>', '', 0), (r'<!DOCTYPE[^>]*>', '', 0),
+            (r'<en-note[^>]*>', '', 0), (r'</en-note>', '', 0),
+            (r'<div style="display:none;[^"]*"[^>]*>.*?</div>', '', re.DOTALL),
+            (r'<div[^>]*style="[^"]*display:\s*none[^"]*"[^>]*>.*?</div>', '', re.DOTALL),
+            (r'\s*style="[^"]*"', '', 0), (r'<br\s*/?>', '<br>', re.IGNORECASE),
+            (r'<div><br></div>', '<br>', re.IGNORECASE), (r'<div[^>]*>', '', re.IGNORECASE),
+            (r'</div>', '<br>', re.IGNORECASE), (r'^(<br>\s*)+', '', re.IGNORECASE),
+            (r'(<br>\s*)+$', '', re.IGNORECASE),
+        ):
+            expected = re.sub(pattern, replacement, expected, flags=flags)
+        self.assertEqual(enex_to_artwall_files.clean_html_content(html), expected.strip())
+
+    def test_extract_auto_description_matches_legacy(self):
+        import benchmark_html_cleaner
+        html = '<div>Titel</div><DIV class="x">Eerste <b>regel</b>. En meer</DIV><div>Tweede regel,</div><br/>Derde'
+        for category in (None, 'poetry'):
+            self.assertEqual(
+                enex_to_artwall_files.extract_auto_description(html, category=category),
+                benchmark_html_cleaner.legacy_extract_auto_description(html, category=category),
+            )
+
+    def test_process_pool_matches_sequential_output(self):
+        meta = lambda day: (
+            '<div>---META_BEGIN---</div><div>medium: writing</div><div>subtype: poem</div><div>language1: nl</div>'
+            f"<div>year: 2021</div><div>month: 1</div><div>day: {day}</div><div>version: '01'</div><div>---META_END---</div>"
+        )
+        notes = ''.join(
+            f'<note><title>{title}</title><content><![CDATA[<en-note><div>{text}</div>{meta(day)}</en-note>]]></content>'
+            '<created>20210101T000000Z</created></note>'
+            for title, text, day in (('Zee', 'Een', 1), ('Zee', 'Twee', 2), ('Boom', 'Drie', 3), ('Zee', 'Vier', 4))
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            source_dir = pathlib.Path(tmp) / 'enex'
+            source_dir.mkdir()
+            enex_file = source_dir / 'export.enex'
+            enex_file.write_text(f'<?xml version="1.0" encoding="UTF-8"?><en-export>{notes}</en-export>', encoding='utf-8')
+            old = enex_file.stat().st_mtime - enex_to_artwall_files.FILE_SETTLE_SECONDS - 1
+            os.utime(enex_file, (old, old))
+            trees = []
+            for workers in (1, 2):
+                dest_dir = pathlib.Path(tmp) / f"out-{workers}"
+                dest_dir.mkdir()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    enex_to_artwall_files.process_enex_files(source_dir, dest_dir, workers=workers)
+                trees.append({
+                    str(path.relative_to(dest_dir)): path.read_bytes()
+                    for path in dest_dir.rglob('*') if path.is_file() and path.name != enex_to_artwall_files.MANIFEST_FILENAME
+                })
+            self.assertEqual(sorted(trees[0]), [
+                'writing/20210101_writing_poem_zee_nl.html', 'writing/20210102_writing_poem_zee-2_nl.html',
+                'writing/20210103_writing_poem_boom_nl.html', 'writing/20210104_writing_poem_zee-3_nl.html',
+            ])
+            self.assertEqual(trees[1], trees[0])
+
+    def test_settled_file_skips_stability_wait(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            enex_file = pathlib.Path(tmp) / 'export.enex'
+            enex_file.write_text('<en-export/>', encoding='utf-8')
+            old = enex_file.stat().st_mtime - enex_to_artwall_files.FILE_SETTLE_SECONDS - 1
+            os.utime(enex_file, (old, old))
+            self.assertTrue(enex_to_artwall_files.wait_for_file_stability(enex_file, max_wait_seconds=0))
+            self.assertTrue(enex_to_artwall_files.is_file_stable(enex_file, check_duration=1))
+            self.assertEqual(enex_to_artwall_files.scan_enex_files(pathlib.Path(tmp)), {'export.enex': (12, old)})
+
 if __name__ == '__main__':
     unittest.main()
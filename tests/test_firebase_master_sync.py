@@ -1,4 +1,17 @@
 import unittest
+import pathlib
+import tempfile
+import threading
+import gzip
+import json
+import base64
+import contextlib
+import copy
+import hashlib
+import io
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import firebase_master_sync
 from firebase_master_sync import (
     validate_medium_subtype,
     normalize_metadata_fields,
@@ -8,9 +21,209 @@ from firebase_master_sync import (
     normalize_artwork_payload,
     group_artworks_by_base_key,
     sync_to_firebase,
-    create_combined_artwork
+    create_combined_artwork,
+    upload_media_files,
+    compute_file_md5,
+    write_in_batches,
+    build_html_prefix_index,
+    find_matching_html,
+    HtmlParseCache,
+    compute_payload_hash,
+    compute_content_hash,
+    hash_payload_fields,
+    build_field_updates,
+    SyncJournal,
+    UploadSessionStore,
+    upload_file_with_retry,
+    shard_of_key,
+    parse_shard_spec,
+    merge_sync_reports,
+    split_artwork_record,
+    build_card_excerpt,
+    artwork_index_values,
+    build_index_updates,
+    build_full_index,
+    rebuild_artwork_index,
+    build_catalog_pages,
+    compress_catalog_page,
+    tokenize_search_text,
+    search_terms_for_artwork,
+    apply_search_postings,
+    publish_search_index,
+    derivative_blob_path,
+    generate_image_derivatives
 )
 
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.public_url = f"https://storage.example/{name}"
+
+    @property
+    def md5_hash(self):
+        if self.name not in self.bucket.uploaded:
+            return None
+        return base64.b64encode(hashlib.md5(self.bucket.uploaded[self.name]).digest()).decode('ascii')
+
+    def upload_from_filename(self, filename):
+        if self.bucket.failures.get(self.name, 0) > 0:
+            self.bucket.failures[self.name] -= 1
+            raise ConnectionError('tijdelijke fout')
+        self.bucket.uploaded[self.name] = pathlib.Path(filename).read_bytes()
+
+    def upload_from_string(self, data, content_type=None):
+        self.bucket.uploaded[self.name] = data
+
+    def download_as_bytes(self):
+        return self.bucket.uploaded[self.name]
+
+    def delete(self):
+        self.bucket.uploaded.pop(self.name, None)
+
+    def make_public(self):
+        pass
+
+    def create_resumable_upload_session(self, content_type=None, size=None):
+        return self.bucket.upload_endpoint.create_session(self.name)
+
+class FakeBucket:
+    """Lokale vervanger voor storage.bucket() die uploads in het geheugen bewaart."""
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.uploaded = {}
+        self.upload_endpoint = None
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def list_blobs(self, prefix=''):
+        return [FakeBlob(self, name) for name in sorted(self.uploaded) if name.startswith(prefix)]
+
+class FakeDbReference:
+    """Lokale vervanger voor db.reference(): een pad in een gedeelde dict, met multi-path update() en increments."""
+    def __init__(self, data, path=''):
+        self.data = data
+        self.parts = [part for part in path.split('/') if part]
+
+    def child(self, path):
+        return FakeDbReference(self.data, '/'.join(self.parts + [path]))
+
+    def get(self, shallow=False):
+        node = self.data
+        for part in self.parts:
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        if shallow and isinstance(node, dict):
+            return {key: True for key in node}
+        return copy.deepcopy(node)
+
+    def set(self, value):
+        parent = self.data
+        for part in self.parts[:-1]:
+            parent = parent.setdefault(part, {})
+        if value is None:
+            parent.pop(self.parts[-1], None)
+        else:
+            parent[self.parts[-1]] = copy.deepcopy(value)
+
+    def update(self, values):
+        for path, value in values.items():
+            ref = self.child(path)
+            if isinstance(value, dict) and '.sv' in value:
+                value = (ref.get() or 0) + value['.sv']['increment']
+            ref.set(value)
+
+class FakeFirebase:
+    """Bronmap, database en bucket voor een volledige sync_to_firebase() run zonder Firebase."""
+    def __init__(self, tmp, source=None):
+        self.tmp = pathlib.Path(tmp)
+        self.source = source or self.tmp / 'bron'
+        self.data = {}
+        self.bucket = FakeBucket()
+
+    def add_artwork(self, name, media_count=2):
+        folder = self.source / 'drawing'
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"{name}.html").write_text(
+            '<html><body><div class="metadata"><pre>\n'
+            f'title: {name}\nyear: 2024\nmonth: 1\nday: 2\nmedium: drawing\nsubtype: marker\nlanguage1: nl\n'
+            '</pre></div>\n<div class="content">Tekst</div></body></html>', encoding='utf-8')
+        for version in range(1, media_count + 1):
+            (folder / f"{name}_{version:02d}.jpg").write_bytes(f"{name}-{version}".encode())
+
+    def sync(self, **kwargs):
+        kwargs.setdefault('publish', False)
+        kwargs.setdefault('derivatives', False)
+        fake_db = type('FakeDb', (), {'reference': staticmethod(lambda path='/': FakeDbReference(self.data, path))})
+        fake_storage = type('FakeStorage', (), {'bucket': staticmethod(lambda *args: self.bucket)})
+        with mock.patch.multiple(
+            firebase_master_sync,
+            SOURCE_MEDIA_FOLDER=self.source,
+            PARSE_CACHE_PATH=self.tmp / 'cache.sqlite',
+            SYNC_JOURNAL_PATH=self.tmp / 'journal.jsonl',
+            UPLOAD_SESSIONS_PATH=self.tmp / 'sessions.json',
+            db=fake_db,
+            storage=fake_storage,
+            initialize_firebase=lambda: True,
+        ), mock.patch('time.sleep'), contextlib.redirect_stdout(io.StringIO()) as output:
+            sync_to_firebase(**kwargs)
+        return output.getvalue()
+
+class FakeUploadEndpoint:
+    """
+    Lokale HTTP-server die het protocol van een hervatbare upload-sessie nabootst:
+    chunks met Content-Range, 308 met de ontvangen Range, en statusvragen met bytes */totaal.
+    Na `fail_after_chunks` chunks wordt de verbinding één keer verbroken.
+    """
+    def __init__(self, fail_after_chunks=None):
+        self.sessions = {}
+        self.received_ranges = []
+        self.fail_after_chunks = fail_after_chunks
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_PUT(self):
+                endpoint.handle_put(self)
+
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def create_session(self, name):
+        self.sessions[name] = bytearray()
+        return f"http://127.0.0.1:{self.server.server_port}/{name}"
+
+    def handle_put(self, request):
+        name = request.path.lstrip('/')
+        data = request.rfile.read(int(request.headers.get('Content-Length', 0)))
+        spec, total = request.headers['Content-Range'].split(' ')[1].split('/')
+        received = self.sessions[name]
+        if spec != '*':
+            if self.fail_after_chunks is not None and len(self.received_ranges) == self.fail_after_chunks:
+                self.fail_after_chunks = None
+                request.close_connection = True
+                request.connection.shutdown(2)
+                return
+            self.received_ranges.append(spec)
+            start = int(spec.split('-')[0])
+            received[start:] = data
+        if len(received) == int(total):
+            request.send_response(200)
+        else:
+            request.send_response(308)
+            if received:
+                request.send_header('Range', f"bytes=0-{len(received) - 1}")
+        request.send_header('Content-Length', '0')
+        request.end_headers()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
 class TestFirebaseUploader(unittest.TestCase):
     def test_validate_medium_subtype(self):
         # Verwacht False, want functie accepteert alleen bestaande medium/subtype combinaties
@@ -60,6 +273,393 @@ class TestFirebaseUploader(unittest.TestCase):
         combined = create_combined_artwork('1', grouped)
         self.assertIn('title', combined)
 
+    def test_upload_media_files_with_fake_bucket(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            files = []
+            for i in range(5):
+                path = pathlib.Path(tmp) / f"werk_{i:02d}.jpg"
+                path.write_bytes(bytes([i]))
+                files.append((f"drawing/{path.name}", path))
+            bucket = FakeBucket(failures={'drawing/werk_01.jpg': 2, 'drawing/werk_02.jpg': 5})
+            results, unchanged = upload_media_files(bucket, files, max_workers=3, max_retries=2, retry_backoff=0)
+        self.assertEqual(results['drawing/werk_01.jpg'], 'https://storage.example/drawing/werk_01.jpg')
+        self.assertIsInstance(results['drawing/werk_02.jpg'], ConnectionError)
+        self.assertEqual(sorted(bucket.uploaded), ['drawing/werk_00.jpg', 'drawing/werk_01.jpg', 'drawing/werk_03.jpg', 'drawing/werk_04.jpg'])
+        self.assertEqual(unchanged, set())
+
+    def test_upload_media_files_skips_matching_checksums(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            same = pathlib.Path(tmp) / 'same.jpg'
+            changed = pathlib.Path(tmp) / 'changed.jpg'
+            same.write_bytes(b'same')
+            changed.write_bytes(b'new')
+            remote_hashes = {'drawing/same.jpg': compute_file_md5(same), 'drawing/changed.jpg': 'oude-hash'}
+            bucket = FakeBucket()
+            results, unchanged = upload_media_files(bucket, [('drawing/same.jpg', same), ('drawing/changed.jpg', changed)], remote_hashes=remote_hashes)
+        self.assertEqual(unchanged, {'drawing/same.jpg'})
+        self.assertEqual(list(bucket.uploaded), ['drawing/changed.jpg'])
+        self.assertEqual(results['drawing/same.jpg'], 'https://storage.example/drawing/same.jpg')
+
+    def test_write_in_batches_attributes_failures_per_item(self):
+        class FakeRef:
+            def __init__(self):
+                self.updates = []
+            def update(self, values):
+                if 'artwall/music/kapot' in values:
+                    raise ValueError('geweigerd')
+                self.updates.append(dict(values))
+
+        ref = FakeRef()
+        entries = [
+            (f"drawing/werk{i}", {f"artwall/drawing/werk{i}": {'title': f'Werk {i}'}, f"artwall_manifest/drawing/werk{i}": {'hash': str(i)}})
+            for i in range(5)
+        ] + [('music/kapot', {'artwall/music/kapot': {'title': 'Kapot'}})]
+        results = write_in_batches(ref, entries, max_items=2)
+        self.assertEqual([len(update) for update in ref.updates], [4, 4, 2])
+        self.assertIsNone(results['drawing/werk4'])
+        self.assertIsInstance(results['music/kapot'], ValueError)
+
+    def test_compute_payload_hash_ignores_key_order(self):
+        self.assertEqual(compute_payload_hash({'a': 1, 'b': [1, 2]}), compute_payload_hash({'b': [1, 2], 'a': 1}))
+        self.assertNotEqual(compute_payload_hash({'a': 1}), compute_payload_hash({'a': 2}))
+
+    def test_compute_content_hash_ignores_mtime_fields(self):
+        payload = {'title': 'Werk', 'recordCreationDate': 1}
+        media = {'drawing/werk_01.jpg': 'abc'}
+        self.assertEqual(compute_content_hash(payload, media), compute_content_hash({'title': 'Werk', 'recordCreationDate': 2}, media))
+        self.assertNotEqual(compute_content_hash(payload, media), compute_content_hash(payload, {'drawing/werk_01.jpg': 'def'}))
+
+    def test_build_field_updates_sends_only_changed_leaves(self):
+        old = {'title': 'Werk', 'rating': 3, 'translations': {'nl': {'content': 'lang', 'title': 'Werk'}}, 'pdfUrl': 'x.pdf'}
+        new = {'title': 'Werk', 'rating': 4, 'translations': {'nl': {'content': 'lang', 'title': 'Werk!'}}}
+        updates = build_field_updates('artwall/writing/werk', new, hash_payload_fields(old), hash_payload_fields(new))
+        self.assertEqual(updates, {
+            'artwall/writing/werk/rating': 4,
+            'artwall/writing/werk/translations/nl/title': 'Werk!',
+            'artwall/writing/werk/pdfUrl': None,
+        })
+
+    def test_sync_journal_resume_skips_committed_work(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            media = pathlib.Path(tmp) / 'werk_01.jpg'
+            media.write_bytes(b'beeld')
+            journal_path = pathlib.Path(tmp) / 'journal.jsonl'
+            journal = SyncJournal(journal_path)
+            journal.record_upload('drawing/werk_01.jpg', media, 'https://storage.example/drawing/werk_01.jpg')
+            journal.record_write('drawing/werk', 'hash1')
+            journal.close()
+            with open(journal_path, 'a', encoding='utf-8') as f:
+                f.write('{"type": "wri')  # afgebroken laatste regel
+
+            resumed = SyncJournal(journal_path, resume=True)
+            self.assertEqual(resumed.completed_upload('drawing/werk_01.jpg', media), 'https://storage.example/drawing/werk_01.jpg')
+            self.assertTrue(resumed.completed_write('drawing/werk', 'hash1'))
+            self.assertFalse(resumed.completed_write('drawing/werk', 'hash2'))
+            media.write_bytes(b'nieuw beeld')
+            self.assertIsNone(resumed.completed_upload('drawing/werk_01.jpg', media))
+            resumed.close(discard=True)
+            self.assertFalse(journal_path.exists())
+
+    def test_find_matching_html_uses_first_html_in_folder_order(self):
+        html_files = {name: pathlib.Path(f"{name}.html") for name in [
+            '20240101_writing_zee_nl', '20240101_writing_zee_en', '20240101_writing_zeef', '20240202_drawing_boom'
+        ]}
+        html_index = build_html_prefix_index(html_files)
+        self.assertEqual(find_matching_html(html_index, '20240101_writing_zee'), '20240101_writing_zee_nl')
+        self.assertEqual(find_matching_html(html_index, '20240202_drawing_boom'), '20240202_drawing_boom')
+        self.assertIsNone(find_matching_html(html_index, '20240303_drawing_maan'))
+
+    def test_html_parse_cache_keys_on_stat_and_evicts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            html_path = pathlib.Path(tmp) / 'werk.html'
+            html_path.write_text('<div>Test</div>', encoding='utf-8')
+            cache = HtmlParseCache(pathlib.Path(tmp) / 'cache.sqlite')
+            stat = html_path.stat()
+            self.assertIsNone(cache.get(html_path, stat))
+            cache.put(html_path, stat, {'title': 'Werk', 'year': 2024})
+            self.assertEqual(cache.get(html_path, stat), {'title': 'Werk', 'year': 2024})
+            html_path.write_text('<div>Gewijzigd</div>', encoding='utf-8')
+            self.assertIsNone(cache.get(html_path, html_path.stat()))
+            self.assertEqual(cache.evict_except([]), 1)
+            cache.close()
+
+    def test_resumable_upload_continues_after_interruption(self):
+        original = (firebase_master_sync.RESUMABLE_UPLOAD_THRESHOLD, firebase_master_sync.RESUMABLE_CHUNK_SIZE)
+        firebase_master_sync.RESUMABLE_UPLOAD_THRESHOLD = 1024
+        firebase_master_sync.RESUMABLE_CHUNK_SIZE = 1024
+        endpoint = FakeUploadEndpoint(fail_after_chunks=2)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                video_path = pathlib.Path(tmp) / 'film.mp4'
+                video_path.write_bytes(bytes(range(256)) * 18)
+                bucket = FakeBucket()
+                bucket.upload_endpoint = endpoint
+                store = UploadSessionStore(pathlib.Path(tmp) / 'sessions.json')
+                with self.assertRaises(Exception):
+                    upload_file_with_retry(bucket, 'video/film.mp4', video_path, max_retries=0, session_store=store)
+                # Een nieuw proces leest de bewaarde sessie en gaat verder na de laatste ontvangen chunk
+                store = UploadSessionStore(pathlib.Path(tmp) / 'sessions.json')
+                self.assertIsNotNone(store.get('video/film.mp4', video_path))
+                url = upload_file_with_retry(bucket, 'video/film.mp4', video_path, max_retries=0, session_store=store)
+                self.assertEqual(url, 'https://storage.example/video/film.mp4')
+                self.assertEqual(bytes(endpoint.sessions['video/film.mp4']), video_path.read_bytes())
+                self.assertEqual(endpoint.received_ranges, ['0-1023', '1024-2047', '2048-3071', '3072-4095', '4096-4607'])
+                self.assertIsNone(store.get('video/film.mp4', video_path))
+        finally:
+            endpoint.close()
+            firebase_master_sync.RESUMABLE_UPLOAD_THRESHOLD, firebase_master_sync.RESUMABLE_CHUNK_SIZE = original
+
+    def test_shards_partition_base_keys(self):
+        base_keys = [f"202401{day:02d}_drawing_werk-{day}" for day in range(1, 29)]
+        shards = [shard_of_key(base_key, 4) for base_key in base_keys]
+        self.assertEqual(shards, [shard_of_key(base_key, 4) for base_key in base_keys])
+        self.assertTrue(all(0 <= shard < 4 for shard in shards))
+        self.assertGreater(len(set(shards)), 1)
+        self.assertEqual(parse_shard_spec('2/4'), (1, 4))
+        with self.assertRaises(ValueError):
+            parse_shard_spec('5/4')
+
+    def test_merge_sync_reports_combines_shards(self):
+        def report(shard, created, uploaded, html_files):
+            return {
+                'shard': shard,
+                'database': {'created': created, 'updated': [], 'skipped': [], 'failed': []},
+                'storage': {'uploaded': uploaded, 'unchanged': [], 'failed': []},
+                'scan': {'html_files': html_files, 'media_files': len(uploaded), 'items': len(created)},
+            }
+        merged = merge_sync_reports([report([0, 3], ['Boom'], ['drawing/boom.jpg'], 1), report([2, 3], ['Zee', 'Maan'], [], 2)])
+        self.assertEqual(merged['database']['created'], ['Boom', 'Zee', 'Maan'])
+        self.assertEqual(merged['scan'], {'html_files': 3, 'media_files': 1, 'items': 3})
+        self.assertEqual(merged['missing_shards'], [2])
+        with self.assertRaises(ValueError):
+            merge_sync_reports([report([0, 3], [], [], 0), report([0, 2], [], [], 0)])
+
+    def test_split_artwork_record_keeps_texts_out_of_card(self):
+        payload = {
+            'title': 'Zee', 'description': 'Kort', 'year': 2024, 'medium': 'writing', 'language1': 'nl',
+            'content': '<b>Zee</b>', 'lyrics': '', 'mediaUrl': 'https://storage.example/writing/zee.pdf',
+            'translations': {'nl': {'title': 'Zee', 'content': '<b>Zee</b>'}},
+        }
+        card, content = split_artwork_record(payload)
+        self.assertEqual(card, {
+            'title': 'Zee', 'description': 'Kort', 'year': 2024, 'medium': 'writing', 'language1': 'nl',
+            'mediaUrl': 'https://storage.example/writing/zee.pdf',
+        })
+        self.assertEqual(content, {'content': '<b>Zee</b>', 'translations': {'nl': {'title': 'Zee', 'content': '<b>Zee</b>'}}})
+
+    def test_card_keeps_a_short_plain_text_excerpt(self):
+        payload = {
+            'title': 'Golven', 'medium': 'writing',
+            'content': '<div>Golven</div><div>de zee&amp;het <b>strand</b></div><br/><div>' + 'woord ' * 100 + '</div>',
+        }
+        card, content = split_artwork_record(payload)
+        self.assertEqual(content, {'content': payload['content']})
+        self.assertTrue(card['excerpt'].startswith('de zee&het strand\nwoord woord'))
+        self.assertTrue(card['excerpt'].endswith('woord…'))
+        self.assertLessEqual(len(card['excerpt']), firebase_master_sync.CARD_EXCERPT_LENGTH + 1)
+        self.assertEqual(build_card_excerpt({'lyrics': 'la<br>la'}), 'la\nla')
+        self.assertEqual(build_card_excerpt({'title': 'Boom'}), '')
+        hashes, _ = split_artwork_record({'excerpt': 'abc', 'content': 'def'}, with_excerpt=False)
+        self.assertEqual(hashes, {'excerpt': 'abc'})
+
+    def test_index_updates_move_only_changed_values(self):
+        old_values = artwork_index_values({'year': 2024, 'rating': 4, 'subtype': 'poem'})
+        new_values = artwork_index_values({'year': 2019, 'rating': '', 'subtype': 'poem'})
+        updates, deltas = build_index_updates('writing/zee', old_values, new_values)
+        self.assertEqual(updates, {
+            'artwall_index/year/2024/writing/zee': None,
+            'artwall_index/year/2019/writing/zee': True,
+            'artwall_index/rating/4/writing/zee': None,
+        })
+        self.assertEqual(deltas, {'counts/year/writing/2024': -1, 'counts/year/writing/2019': 1})
+        _, deltas = build_index_updates('writing/maan', None, new_values)
+        self.assertEqual(deltas['counts/medium/writing'], 1)
+        self.assertEqual(deltas['counts/subtype/writing/poem'], 1)
+
+    def test_build_full_index_counts_per_medium(self):
+        index = build_full_index({
+            'writing/zee': {'year': '2024', 'subtype': 'poem'},
+            'writing/maan': {'year': '2024', 'subtype': 'poem', 'rating': '5'},
+            'drawing/boom': {'year': '2019'},
+        })
+        self.assertEqual(index['counts']['medium'], {'writing': 2, 'drawing': 1})
+        self.assertEqual(index['counts']['year'], {'writing': {'2024': 2}, 'drawing': {'2019': 1}})
+        self.assertEqual(index['year']['2024'], {'writing': {'zee': True, 'maan': True}})
+        self.assertEqual(index['rating'], {'5': {'writing': {'maan': True}}})
+
+    def test_rebuild_artwork_index_keeps_search_pending(self):
+        data = {
+            'artwall': {'writing': {'zee': {'year': 2024}, 'maan': {'year': 2019}}},
+            'artwall_manifest': {'writing': {'zee': {'hash': 'a'}, 'maan': {'hash': 'b'}}},
+            'artwall_index': {
+                'version': 0, 'year': {'2000': {'writing': {'weg': True}}}, 'oud': {'x': True},
+                'search_pending': {'writing': {'zee': True}, 'drawing': {'boom': True}},
+            },
+        }
+        root_ref = FakeDbReference(data)
+        existing_artworks = {'writing/zee': {'hash': 'a'}, 'writing/maan': {'hash': 'b'}}
+        with contextlib.redirect_stdout(io.StringIO()):
+            rebuild_artwork_index(root_ref, root_ref.child('artwall'), existing_artworks)
+        index = data['artwall_index']
+        self.assertEqual(index['search_pending'], {'writing': {'zee': True}, 'drawing': {'boom': True}})
+        self.assertEqual(index['year'], {'2024': {'writing': {'zee': True}}, '2019': {'writing': {'maan': True}}})
+        self.assertNotIn('oud', index)
+        self.assertEqual(index['counts']['medium'], {'writing': 2})
+        self.assertEqual(existing_artworks['writing/zee']['index'], {'year': '2024'})
+
+    def test_catalog_pages_are_stable_when_an_artwork_is_added(self):
+        cards = {f"werk-{n}": {'id': f"werk-{n}", 'year': 2020 + n, 'month': 1, 'day': 1, 'contentHash': 'x'} for n in range(5)}
+        pages = build_catalog_pages({'drawing': cards}, page_size=2)['drawing']
+        self.assertEqual([card['id'] for card in json.loads(pages[0])], ['werk-0', 'werk-1'])
+        self.assertNotIn('contentHash', json.loads(pages[0])[0])
+        cards['werk-9'] = {'id': 'werk-9', 'year': 2030, 'month': 1, 'day': 1}
+        new_pages = build_catalog_pages({'drawing': cards}, page_size=2)['drawing']
+        self.assertEqual(new_pages[:2], pages[:2])
+        self.assertEqual(len(new_pages), 3)
+        self.assertEqual(gzip.decompress(compress_catalog_page(pages[0])['gzip']), pages[0])
+
+    def test_catalog_pages_sort_mixed_date_types(self):
+        cards = {
+            'a': {'id': 'a', 'year': 2020},
+            'b': {'id': 'b', 'year': '2019'},
+            'c': {'id': 'c', 'year': 2019, 'month': '3', 'day': 'onbekend'},
+            'd': {'id': 'd', 'year': None},
+        }
+        pages = build_catalog_pages({'poetry': cards})['poetry']
+        self.assertEqual([card['id'] for card in json.loads(pages[0])], ['d', 'b', 'c', 'a'])
+
+    def test_tokenize_search_text_folds_diacritics_and_strips_html(self):
+        self.assertEqual(
+            tokenize_search_text('<b>Één</b> Café &amp; crème brûlée in de Straße, perché œuvre'),
+            ['cafe', 'creme', 'brulee', 'strasse', 'perche', 'oeuvre']
+        )
+
+    def test_search_index_is_rebuilt_when_a_shard_blob_is_missing(self):
+        data = {'artwall': {'writing': {'zee': {'title': 'Golven'}, 'maan': {'title': 'Nacht'}}}}
+        root_ref, bucket = FakeDbReference(data), FakeBucket()
+        with contextlib.redirect_stdout(io.StringIO()):
+            publish_search_index(root_ref, bucket, rebuild=True, max_workers=1)
+            shard_blobs = [name for name in bucket.uploaded if name.startswith('search/') and not name.startswith('search/docs/') and name != 'search/manifest.json']
+            for name in shard_blobs:
+                del bucket.uploaded[name]
+            data['artwall']['writing']['zee']['title'] = 'Zee'
+            data['artwall_index'] = {'search_pending': {'writing': {'zee': True}}}
+            stats = publish_search_index(root_ref, bucket, max_workers=1)
+        self.assertEqual(stats['documents'], 2)
+        manifest = json.loads(bucket.uploaded['search/manifest.json'])
+        urls = {blob.public_url for blob in bucket.list_blobs('search/')}
+        self.assertTrue(all(entry['gzip'] in urls for entry in manifest['shards'].values()))
+        self.assertFalse(data['artwall_index']['search_pending'].get('writing'))
+
+    def test_search_postings_move_between_prefix_shards(self):
+        shards, doc_prefixes = {}, {}
+        record = {'title': 'Zee', 'content': '<div>Zee en zand</div>', 'translations': {'en': {'title': 'Sea'}}}
+        self.assertEqual(search_terms_for_artwork(record), {'zee': 4, 'zand': 1, 'sea': 3})
+        apply_search_postings(shards, doc_prefixes, 'writing/zee', search_terms_for_artwork(record))
+        self.assertEqual(shards['ze'], {'zee': {'writing/zee': 4}})
+        touched = apply_search_postings(shards, doc_prefixes, 'writing/zee', {'maan': 3})
+        self.assertEqual(touched, {'ze', 'za', 'se', 'ma'})
+        self.assertEqual(shards['ze'], {})
+        self.assertEqual(doc_prefixes, {'writing/zee': ['ma']})
+        apply_search_postings(shards, doc_prefixes, 'writing/zee', None)
+        self.assertEqual(doc_prefixes, {})
+
+    def test_derivative_blob_path_matches_image_urls(self):
+        self.assertEqual(derivative_blob_path('drawing/werk_01.jpg', '400x400'), 'drawing/werk_01_400x400.jpg')
+        self.assertEqual(derivative_blob_path('photography/zee.v2.PNG', '1200x1200'), 'photography/zee.v2_1200x1200.PNG')
+
+    @unittest.skipIf(firebase_master_sync.Image is None, 'Pillow niet geïnstalleerd')
+    def test_generate_image_derivatives_fits_without_enlarging(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = pathlib.Path(tmp) / 'werk.jpg'
+            firebase_master_sync.Image.new('RGB', (800, 400), (200, 80, 40)).save(source, 'JPEG')
+            derivatives = generate_image_derivatives(str(source), str(pathlib.Path(tmp) / 'cache'))
+            sizes = {size: firebase_master_sync.Image.open(path).size for size, path in derivatives.items()}
+            self.assertEqual(sizes, {'200x200': (200, 100), '400x400': (400, 200), '480x480': (480, 240), '1200x1200': (800, 400)})
+
+    def test_failed_upload_is_planned_again_on_next_run(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            firebase = FakeFirebase(tmp)
+            firebase.add_artwork('20240102_drawing_marker_werk')
+            firebase.bucket.failures = {'drawing/20240102_drawing_marker_werk_02.jpg': 100}
+            firebase.sync()
+            record = firebase.data['artwall']['drawing']['20240102_drawing_marker_werk']
+            manifest = firebase.data['artwall_manifest']['drawing']['20240102_drawing_marker_werk']
+            self.assertNotIn('contentHash', record)
+            self.assertEqual(manifest['hash'], firebase_master_sync.INCOMPLETE_CONTENT_HASH)
+
+            firebase.bucket.failures = {}
+            output = firebase.sync(resume=True)
+            self.assertIn('Inhoud gewijzigd', output)
+            record = firebase.data['artwall']['drawing']['20240102_drawing_marker_werk']
+            self.assertEqual(len(record['mediaUrls']), 2)
+            self.assertEqual(firebase.data['artwall_manifest']['drawing']['20240102_drawing_marker_werk']['hash'], record['contentHash'])
+            self.assertIn('Geen wijzigingen', firebase.sync())
+
+    def test_cards_from_an_older_card_format_are_rewritten_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            firebase = FakeFirebase(tmp)
+            firebase.add_artwork('20240102_drawing_marker_werk')
+            firebase.sync()
+            record = firebase.data['artwall']['drawing']['20240102_drawing_marker_werk']
+            self.assertEqual(record['excerpt'], 'Tekst')
+            del record['excerpt']
+            manifest = firebase.data['artwall_manifest']['drawing']['20240102_drawing_marker_werk']
+            del manifest['card']
+            del manifest['fields']['excerpt']
+
+            self.assertIn('Kaart bijwerken', firebase.sync())
+            self.assertEqual(firebase.data['artwall']['drawing']['20240102_drawing_marker_werk']['excerpt'], 'Tekst')
+            self.assertIn('Geen wijzigingen', firebase.sync())
+
+    def test_pipeline_writes_the_same_as_sequential_sync(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = pathlib.Path(tmp)
+            runs = {}
+            for pipeline in (False, True):
+                firebase = FakeFirebase(tmp / str(pipeline), source=tmp / 'bron')
+                if not pipeline:
+                    for i in range(5):
+                        firebase.add_artwork(f"2024010{i + 1}_drawing_marker_werk-{i}", media_count=i % 3)
+                    (tmp / 'bron' / 'drawing' / 'los_01.jpg').write_bytes(b'zonder html')
+                (tmp / str(pipeline)).mkdir()
+                firebase.bucket.failures = {'drawing/20240103_drawing_marker_werk-2_02.jpg': 100}
+                with mock.patch.object(firebase_master_sync, 'DB_BATCH_MAX_ITEMS', 2), mock.patch.object(firebase_master_sync, 'PIPELINE_QUEUE_DEPTH', 1):
+                    firebase.sync(pipeline=pipeline, report_path=tmp / f"{pipeline}.json")
+                report = json.loads((tmp / f"{pipeline}.json").read_text('utf-8'))
+                operations = {section: {name: sorted(items) for name, items in report[section].items()} for section in ('database', 'storage')}
+                runs[pipeline] = (firebase.data, sorted(firebase.bucket.uploaded), operations, report['scan'])
+        self.assertEqual(runs[False], runs[True])
+        self.assertEqual(len(runs[True][2]['database']['created']), 5)
+        self.assertEqual(runs[True][2]['storage']['failed'], ['drawing/20240103_drawing_marker_werk-2_02.jpg: tijdelijke fout'])
+
+    def test_shards_wait_for_a_complete_manifest_migration(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            firebase = FakeFirebase(tmp)
+            for i in range(6):
+                firebase.add_artwork(f"2024010{i + 1}_drawing_marker_werk-{i}", media_count=1)
+            firebase.sync()
+            expected_counts = copy.deepcopy(firebase.data['artwall_index']['counts'])
+            # Manifest van een eerdere, half afgemaakte migratie: één shard staat er al in
+            del firebase.data['artwall_manifest_meta']
+            manifest = firebase.data['artwall_manifest']['drawing']
+            for key in list(manifest):
+                if shard_of_key(key, 2) != 0:
+                    del manifest[key]
+            partial_keys = set(manifest)
+
+            output = firebase.sync(shard=(1, 2))
+            self.assertIn('zonder --shard', output)
+            self.assertEqual(set(firebase.data['artwall_manifest']['drawing']), partial_keys)
+
+            output = firebase.sync()
+            self.assertNotIn('Nieuw gecombineerd item', output)
+            self.assertEqual(len(firebase.data['artwall_manifest']['drawing']), 6)
+            self.assertEqual(firebase.data['artwall_index']['counts'], expected_counts)
+            output = firebase.sync(shard=(1, 2))
+            self.assertIn('Geen wijzigingen', output)
+            self.assertEqual(firebase.data['artwall_index']['counts'], expected_counts)
+
     def test_sync_to_firebase(self):
         # This test will just check that the function runs
         sync_to_firebase(force_update=False)